@@ -0,0 +1,90 @@
+"""
+Benchmark: extração de áudio MoviePy (decode + re-encode mp3) vs ffmpeg (stream copy / pipe).
+
+Uso:
+    python benchmarks/bench_audio.py caminho/do/video.mp4 [--repeticoes 3]
+
+Cada método roda num processo filho separado; o pico de memória (RSS) é o
+do filho + netos (ffmpeg), lido via os.wait4.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+METODOS = ["moviepy", "ffmpeg_copy", "ffmpeg_pipe"]
+
+
+def _executar_metodo(metodo, video, destino_base):
+    """Roda UMA extração (chamado dentro do processo filho)."""
+    if metodo == "moviepy":
+        from moviepy.editor import VideoFileClip
+        clip = VideoFileClip(video)
+        clip.audio.write_audiofile(destino_base + ".mp3", bitrate="32k", verbose=False, logger=None)
+        clip.close()
+        return destino_base + ".mp3"
+    if metodo == "ffmpeg_copy":
+        from modules.audio import extrair_audio
+        return extrair_audio(video, destino_base)
+    if metodo == "ffmpeg_pipe":
+        from modules.audio import extrair_audio_de_stream
+        with open(video, "rb") as f:
+            return extrair_audio_de_stream(iter(lambda: f.read(256 * 1024), b""), destino_base)
+    raise ValueError(metodo)
+
+
+def medir(metodo, video, repeticoes):
+    tempos, picos, tamanhos = [], [], []
+    for _ in range(repeticoes):
+        with tempfile.TemporaryDirectory() as tmp:
+            destino_base = os.path.join(tmp, "audio")
+            inicio = time.perf_counter()
+            proc = subprocess.Popen(
+                [sys.executable, __file__, "--filho", metodo, video, destino_base],
+                stdout=subprocess.PIPE,
+            )
+            _, status, uso = os.wait4(proc.pid, 0)
+            tempos.append(time.perf_counter() - inicio)
+            saida = proc.stdout.read().decode().strip()
+            proc.stdout.close()
+            if os.waitstatus_to_exitcode(status) != 0 or not saida:
+                raise RuntimeError(f"{metodo} falhou")
+            picos.append(uso.ru_maxrss / 1024)  # KB -> MB (Linux)
+            tamanhos.append(os.path.getsize(saida) / 1e6)
+    return {
+        "metodo": metodo,
+        "tempo_s": statistics.median(tempos),
+        "pico_rss_mb": max(picos),
+        "saida_mb": tamanhos[0],
+    }
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--filho":
+        _, _, metodo, video, destino_base = sys.argv
+        print(_executar_metodo(metodo, video, destino_base))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--metodos", nargs="+", default=METODOS, choices=METODOS)
+    args = parser.parse_args()
+
+    print(f"{'método':<14}{'tempo (s)':>12}{'pico RSS (MB)':>16}{'saída (MB)':>13}")
+    for metodo in args.metodos:
+        try:
+            r = medir(metodo, args.video, args.repeticoes)
+            print(f"{r['metodo']:<14}{r['tempo_s']:>12.2f}{r['pico_rss_mb']:>16.1f}{r['saida_mb']:>13.2f}")
+        except Exception as e:
+            print(f"{metodo:<14}  erro: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Benchmark ponta a ponta, offline, dos fluxos do Viral Analyzer (Pag 01) e do
+Gerador de Carrosséis (Pag 04), com Apify/Groq/Gemini/Sheets simulados
+(benchmarks/fakes.py) e vídeos servidos por um HTTP local.
+
+Uso:
+    python benchmarks/bench_e2e.py [--perfis 3] [--posts 10] [--top 5] [--repeticoes 5]
+    python benchmarks/bench_e2e.py --latencia whisper=0.8 --erro chat=0.05
+    python benchmarks/bench_e2e.py --salvar base.json
+    python benchmarks/bench_e2e.py --comparar base.json [--tolerancia 0.2]
+
+Com --comparar, sai com código 1 se algum cenário ficou mais lento (p95) ou
+com menos vazão que a referência além da tolerância.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+CENARIOS = ["viral_sequencial", "viral_job", "carrossel_reels", "carrossel_post", "carrossel_youtube"]
+
+# Latência média (s) de cada serviço simulado; jitter = 25% da média
+LATENCIAS = {
+    "apify_run": 0.5,
+    "apify_dataset": 0.05,
+    "ytdlp": 0.8,
+    "download": 0.05,
+    "whisper": 0.4,
+    "chat": 0.3,
+    "gemini": 0.5,
+    "sheets": 0.2,
+}
+
+SECRETS_FALSOS = {
+    "apify_token": "bench",
+    "groq": {"api_key": "bench"},
+    "gemini": {"api_key": "bench"},
+    "gcp_service_account": {},
+}
+
+
+class JobFalso:
+    """Mesma interface do ContextoJob (modules/jobs.py), sem banco de jobs."""
+
+    def __init__(self, dir_temp):
+        self.id = "bench"
+        self.dir_temp = dir_temp
+        self.eventos = []
+
+    def etapa(self, nome, progresso=None): pass
+    def parcial(self, resultado): pass
+    def verificar_cancelamento(self): pass
+
+    def log(self, mensagem, tipo="info"): self.eventos.append((tipo, mensagem))
+    def info(self, mensagem): self.log(mensagem, "info")
+    def write(self, mensagem): self.log(mensagem, "write")
+    def warning(self, mensagem): self.log(mensagem, "warning")
+    def error(self, mensagem): self.log(mensagem, "error")
+
+
+def _pares(valores, tipo):
+    saida = {}
+    for par in valores or []:
+        chave, _, valor = par.partition("=")
+        if chave not in LATENCIAS:
+            raise SystemExit(f"Serviço desconhecido: {chave} (use {', '.join(LATENCIAS)})")
+        saida[chave] = tipo(valor)
+    return saida
+
+
+def preparar(args, dir_trabalho):
+    """Troca segredos e clientes por fakes. Retorna (servidor de vídeos, gspread falso)."""
+    # .cache/ (réplica SQLite, cache de transcrições, jobs) fica isolado nesta execução
+    os.chdir(dir_trabalho)
+
+    import streamlit as st
+    st.secrets = SECRETS_FALSOS
+
+    from modules import clients, instagram, rate_limit
+    from modules.audio import ffmpeg_exe
+
+    # O run falso dura décimos de segundo: lê o dataset na mesma escala
+    instagram.INTERVALO_LEITURA_DATASET = 0.05
+
+    if not args.com_limites:
+        # Mede o nosso código, não a cota da conta
+        rate_limit.LIMITES = {}
+        rate_limit.LIMITE_PADRAO = {"rpm": None, "tpm": None, "audio_s_hora": None}
+
+    latencias = {**LATENCIAS, **_pares(args.latencia, float)}
+    erros = _pares(args.erro, float)
+    perfil = {
+        nome: fakes.Perfil(latencias[nome] * args.escala, latencias[nome] * args.escala * 0.25, erros.get(nome, 0.0))
+        for nome in LATENCIAS
+    }
+
+    # Um vídeo diferente por post: o cache de transcrição não pode acertar entre cenários
+    n_videos = 2 * args.perfis * args.posts + 2 * args.repeticoes
+    pasta_videos = os.path.join(tempfile.gettempdir(), "bench_e2e_videos")
+    fakes.gerar_videos(ffmpeg_exe(), pasta_videos, n_videos)
+    servidor = fakes.ServidorVideos(pasta_videos, perfil["download"])
+    with open(os.path.join(pasta_videos, "legenda.json3"), "w") as f:
+        f.write(fakes.legenda_json3())
+
+    apify = fakes.FakeApify(servidor, n_videos, args.posts, perfil["apify_run"], perfil["apify_dataset"])
+    groq = fakes.FakeGroq(perfil["whisper"], perfil["chat"])
+    gemini = fakes.FakeGemini(perfil["gemini"])
+    ytdlp = fakes.FakeYtdlp(lambda url: fakes.info_youtube(url, f"{servidor.url_base}/legenda.json3"), perfil["ytdlp"])
+    gspread = fakes.FakeGspread(perfil["sheets"])
+
+    clients.registrar_fabrica("apify", lambda: apify)
+    clients.registrar_fabrica("groq", lambda: groq)
+    clients.registrar_fabrica("gemini", lambda: gemini)
+    clients.registrar_fabrica("ytdlp", lambda: ytdlp)
+    clients.registrar_fabrica("gspread", lambda: gspread)
+    return servidor, gspread
+
+
+# --- CENÁRIOS ---
+# Cada cenário devolve (latências por item em segundos, quantidade de erros).
+
+def cenario_viral_sequencial(args, dir_temp):
+    """pegar_dados_apify -> download -> analisar_video_groq -> salvar, um vídeo por vez."""
+    from datetime import datetime
+    from modules.database import conectar_sheets, salvar_linha_instagram, obter_buffer_escrita
+    from modules.instagram import pegar_dados_apify, baixar_video_with_retry
+    from modules.ai_processor import analisar_video_groq
+
+    sheet = conectar_sheets()
+    buffer = obter_buffer_escrita()
+    log = JobFalso(dir_temp)
+    latencias, erros = [], 0
+    for p in range(args.perfis):
+        perfil = f"seq_perfil{p}"
+        videos = pegar_dados_apify(perfil, 30, log) or []
+        for v in sorted(videos, key=lambda x: x['views'], reverse=True)[:args.top]:
+            inicio = time.perf_counter()
+            caminho = os.path.join(dir_temp, f"{v['pk']}.mp4")
+            if baixar_video_with_retry(v['download_url'], caminho):
+                ia = analisar_video_groq(caminho, log)
+            else:
+                ia = {"transcricao": "Erro Download", "ganchos_verbais": ""}
+            if os.path.exists(caminho): os.remove(caminho)
+            linha = [v['pk'], datetime.now().strftime("%d/%m/%Y"), f"@{perfil}", v['data_str'], v['link'],
+                     v['views'], v['likes'], v['comments'], ia.get('transcricao', ''),
+                     ia.get('ganchos_verbais', ''), v['caption']]
+            salvar_linha_instagram(sheet, linha, buffer)
+            latencias.append(time.perf_counter() - inicio)
+            erros += str(ia.get("transcricao", "")).startswith("Erro")
+    erros += len(buffer.descarregar())
+    return latencias, erros
+
+
+def cenario_viral_job(args, dir_temp):
+    """O job da Pag 01 (modules/viral_analyzer.py): mesmos passos, em pipeline."""
+    from modules import viral_analyzer
+
+    # Latência por item = entrada no 1º estágio -> saída do último
+    inicios, latencias, falhas = {}, [], set()
+    download, analise = viral_analyzer.etapa_download, viral_analyzer.etapa_analise
+
+    def etapa_download(ctx):
+        inicios[ctx["video"]["pk"]] = time.perf_counter()
+        return download(ctx)
+
+    def etapa_analise(ctx):
+        ctx = analise(ctx)
+        latencias.append(time.perf_counter() - inicios[ctx["video"]["pk"]])
+        # Mesmo critério do sequencial: análise que falhou conta como erro
+        if ctx.get("erro") or ctx["ia_data"].get("ganchos_verbais") == "-":
+            falhas.add(ctx["video"]["pk"])
+        return ctx
+
+    viral_analyzer.etapa_download, viral_analyzer.etapa_analise = etapa_download, etapa_analise
+    try:
+        resultado = viral_analyzer.executar_analise({
+            "perfis": [f"job_perfil{p}" for p in range(args.perfis)],
+            "dias": 30,
+            "top_videos": args.top,
+            "top_analise_ia": args.top,
+            "modo_lote": True,
+            "gancho_s": args.gancho,
+        }, JobFalso(dir_temp))
+    finally:
+        viral_analyzer.etapa_download, viral_analyzer.etapa_analise = download, analise
+    falhas.update(v["id"] for b in resultado["perfis"] for v in b["videos"] if v["estado"] == "error")
+    return latencias, len(falhas) + len(resultado["erros_envio"])
+
+
+def _cenario_carrossel(args, dir_temp, tipo_conteudo, url_de):
+    """Job de extração + tempestade da Pag 04, seguido do Arquiteto em streaming."""
+    from modules.carrossel import executar_extracao
+    from modules.ai_processor import agente_arquiteto_carrossel_stream
+    from modules.database import obter_buffer_escrita
+
+    latencias, erros = [], 0
+    for i in range(args.repeticoes):
+        inicio = time.perf_counter()
+        try:
+            resultado = executar_extracao(
+                {"tipo_conteudo": tipo_conteudo, "url": url_de(i), "foco": "Conteúdo (Viral)"}, JobFalso(dir_temp)
+            )
+            final = None
+            for evento, dado in agente_arquiteto_carrossel_stream(resultado["ideias"][0], resultado["conteudo_base"]):
+                if evento == "final":
+                    final = dado
+            erros += final is None
+        except Exception:
+            erros += 1
+        latencias.append(time.perf_counter() - inicio)
+    erros += len(obter_buffer_escrita().descarregar())
+    return latencias, erros
+
+
+def cenario_carrossel_reels(args, dir_temp):
+    return _cenario_carrossel(args, dir_temp, "Reels (Instagram)",
+                              lambda i: f"https://www.instagram.com/reel/reel{i}/")
+
+
+def cenario_carrossel_post(args, dir_temp):
+    return _cenario_carrossel(args, dir_temp, "Carrossel (Instagram)",
+                              lambda i: f"https://www.instagram.com/p/car{i}/")
+
+
+def cenario_carrossel_youtube(args, dir_temp):
+    return _cenario_carrossel(args, dir_temp, "YouTube",
+                              lambda i: f"https://www.youtube.com/watch?v=bench{i}")
+
+
+# --- MEDIÇÃO ---
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    k = (len(ordenados) - 1) * p / 100
+    baixo = int(k)
+    alto = min(baixo + 1, len(ordenados) - 1)
+    return ordenados[baixo] + (ordenados[alto] - ordenados[baixo]) * (k - baixo)
+
+
+def medir(nome, args, dir_trabalho):
+    dir_temp = tempfile.mkdtemp(prefix=f"{nome}_", dir=dir_trabalho)
+    tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    latencias, erros = globals()[f"cenario_{nome}"](args, dir_temp)
+    total = time.perf_counter() - inicio
+    _, pico_heap = tracemalloc.get_traced_memory()
+    shutil.rmtree(dir_temp, ignore_errors=True)
+    return {
+        "itens": len(latencias),
+        "erros": erros,
+        "total_s": total,
+        "vazao_itens_s": len(latencias) / total if total else 0.0,
+        "p50_s": _percentil(latencias, 50),
+        "p95_s": _percentil(latencias, 95),
+        "pico_heap_mb": pico_heap / 1e6,
+    }
+
+
+def comparar(resultados, referencia, tolerancia):
+    """Lista de regressões (texto) em relação à referência salva."""
+    regressoes = []
+    for nome, r in resultados.items():
+        base = referencia.get(nome)
+        if not base:
+            continue
+        if base["p95_s"] and r["p95_s"] > base["p95_s"] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p95 {base['p95_s']:.2f}s -> {r['p95_s']:.2f}s")
+        if base["vazao_itens_s"] and r["vazao_itens_s"] < base["vazao_itens_s"] * (1 - tolerancia):
+            regressoes.append(f"{nome}: vazão {base['vazao_itens_s']:.2f} -> {r['vazao_itens_s']:.2f} itens/s")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cenarios", nargs="+", default=CENARIOS, choices=CENARIOS)
+    parser.add_argument("--perfis", type=int, default=3)
+    parser.add_argument("--posts", type=int, default=10, help="posts devolvidos por perfil")
+    parser.add_argument("--top", type=int, default=5, help="vídeos analisados por perfil")
+    parser.add_argument("--repeticoes", type=int, default=5, help="links por cenário da Pag 04")
+    parser.add_argument("--gancho", type=int, default=0, metavar="SEG",
+                        help="viral_job no modo gancho (só os primeiros SEG segundos)")
+    parser.add_argument("--latencia", action="append", metavar="SERVICO=SEG",
+                        help=f"latência média por serviço ({', '.join(LATENCIAS)})")
+    parser.add_argument("--erro", action="append", metavar="SERVICO=TAXA", help="probabilidade de erro (0-1)")
+    parser.add_argument("--escala", type=float, default=1.0, help="multiplica todas as latências")
+    parser.add_argument("--com-limites", action="store_true", help="mantém os limites de modules/rate_limit.py")
+    parser.add_argument("--salvar", metavar="ARQUIVO", help="grava os resultados em JSON (referência)")
+    parser.add_argument("--comparar", metavar="ARQUIVO", help="compara com uma referência salva")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    args = parser.parse_args()
+
+    salvar = os.path.abspath(args.salvar) if args.salvar else None
+    referencia = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            referencia = json.load(f)
+
+    dir_trabalho = tempfile.mkdtemp(prefix="bench_e2e_")
+    tracemalloc.start()
+    try:
+        servidor, gspread = preparar(args, dir_trabalho)
+        resultados = {}
+        print(f"{'cenário':<20}{'itens':>6}{'erros':>6}{'total (s)':>11}{'itens/s':>9}"
+              f"{'p50 (s)':>9}{'p95 (s)':>9}{'heap (MB)':>11}")
+        for nome in args.cenarios:
+            r = medir(nome, args, dir_trabalho)
+            resultados[nome] = r
+            print(f"{nome:<20}{r['itens']:>6}{r['erros']:>6}{r['total_s']:>11.2f}{r['vazao_itens_s']:>9.2f}"
+                  f"{r['p50_s']:>9.2f}{r['p95_s']:>9.2f}{r['pico_heap_mb']:>11.1f}")
+        servidor.fechar()
+    finally:
+        os.chdir(RAIZ)
+        shutil.rmtree(dir_trabalho, ignore_errors=True)
+
+    # ru_maxrss em KB no Linux; filhos = ffmpeg
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"\nPico RSS: processo {rss:.0f} MB, maior filho (ffmpeg) {rss_filhos:.0f} MB; "
+          f"chamadas ao Sheets: {gspread.planilha.chamadas()}")
+
+    if salvar:
+        with open(salvar, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+    if referencia is not None:
+        regressoes = comparar(resultados, referencia, args.tolerancia)
+        for r in regressoes:
+            print(f"REGRESSÃO {r}")
+        sys.exit(1 if regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Benchmark: extração de YouTube via yt-dlp local (modules/youtube_local.py) vs o
+caminho anterior (ator streamers/youtube-scraper da Apify + Cobalt/Whisper).
+
+As chamadas externas são reproduzidas a partir de gravações (fixtures): o `info`
+do yt-dlp, a legenda, o item do dataset da Apify e o tempo que cada etapa levou
+de verdade. Legenda, áudio e Cobalt saem de um HTTP local com essas latências;
+o código medido é o de produção.
+
+Uso:
+    python benchmarks/bench_youtube.py [--fixtures benchmarks/fixtures/youtube] [--repeticoes 5]
+    python benchmarks/bench_youtube.py --gravar URL [URL ...]   (precisa de rede; APIFY_TOKEN opcional)
+
+As fixtures versionadas (exemplo_*.json) são sintéticas, só para o script rodar
+offline; grave as reais com --gravar antes de comparar números.
+"""
+import argparse
+import glob
+import http.server
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakes  # noqa: E402
+
+PASTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "youtube")
+CAMINHOS = ["local", "apify"]
+GRAVADO = "gravado://"  # prefixo das URLs gravadas; no replay vira o HTTP local
+
+SECRETS_FALSOS = {"apify_token": "bench", "groq": {"api_key": "bench"}}
+
+
+# --- REPLAY ---
+
+class ServidorGravacoes:
+    """GET /legenda, GET /audio (bytes novos a cada pedido: o cache de transcrição não acerta) e POST /cobalt."""
+
+    def __init__(self, fixture):
+        servidor = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _responder(self, corpo, tipo):
+                self.send_response(200)
+                self.send_header("Content-Type", tipo)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def do_GET(self):
+                rota = self.path.strip("/")
+                time.sleep(servidor.latencias.get(rota, 0.0))
+                if rota == "legenda" and servidor.fixture.get("legenda"):
+                    self._responder(servidor.fixture["legenda"]["conteudo"].encode(), "text/plain; charset=utf-8")
+                elif rota == "audio":
+                    self._responder(os.urandom(servidor.fixture.get("audio_bytes", 256 * 1024)), "audio/mp4")
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                time.sleep(servidor.latencias.get("cobalt", 0.0))
+                self._responder(json.dumps({"url": f"{servidor.url_base}/audio"}).encode(), "application/json")
+
+            def log_message(self, *args):
+                pass
+
+        self.fixture = fixture
+        self.latencias = fixture.get("latencias", {})
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url_base = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.httpd.shutdown()
+
+
+def _trocar_urls(valor, url_base):
+    """gravado://legenda -> http://127.0.0.1:<porta>/legenda (em qualquer nível do info)."""
+    if isinstance(valor, dict):
+        return {k: _trocar_urls(v, url_base) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_trocar_urls(v, url_base) for v in valor]
+    if isinstance(valor, str) and valor.startswith(GRAVADO):
+        return f"{url_base}/{valor[len(GRAVADO):]}"
+    return valor
+
+
+class ApifyGravada:
+    """ApifyClient que devolve o item gravado do youtube-scraper, com as latências gravadas."""
+
+    def __init__(self, fixture):
+        self.item = fixture.get("apify_item")
+        self.latencias = fixture.get("latencias", {})
+
+    def actor(self, ator):
+        fake = self
+
+        class _Ator:
+            def call(self, run_input=None, **kwargs):
+                time.sleep(fake.latencias.get("apify_run", 0.0))
+                return {"id": "gravado", "defaultDatasetId": "gravado"}
+
+        return _Ator()
+
+    def dataset(self, dataset_id):
+        time.sleep(self.latencias.get("apify_dataset", 0.0))
+        return SimpleNamespace(list_items=lambda: SimpleNamespace(items=[self.item] if self.item else []))
+
+
+def preparar(dir_trabalho):
+    os.chdir(dir_trabalho)
+
+    import streamlit as st
+    st.secrets = SECRETS_FALSOS
+
+    from modules import clients, rate_limit
+    rate_limit.LIMITES = {}
+    rate_limit.LIMITE_PADRAO = {"rpm": None, "tpm": None, "audio_s_hora": None}
+    groq = fakes.FakeGroq(fakes.Perfil(0.4, 0.1))
+    clients.registrar_fabrica("groq", lambda: groq)
+
+
+def medir(fixture, caminho, repeticoes):
+    from modules import clients, youtube_utils
+
+    servidor = ServidorGravacoes(fixture)
+    info = _trocar_urls(fixture["info"], servidor.url_base)
+    ytdlp = fakes.FakeYtdlp({fixture["url"]: info}, fakes.Perfil(fixture["latencias"].get("extract_info", 0.0)))
+    clients.registrar_fabrica("ytdlp", lambda: ytdlp)
+    clients.registrar_fabrica("apify", lambda: ApifyGravada(fixture))
+    youtube_utils.COBALT_INSTANCIAS = [f"{servidor.url_base}/cobalt"]
+
+    funcao = youtube_utils.pegar_dados_youtube_local if caminho == "local" else youtube_utils.pegar_dados_youtube_via_apify
+    tempos, dados = [], {}
+    try:
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            try:
+                dados = funcao(fixture["url"]) or {}
+            except Exception as e:
+                dados = {"erro": str(e)}
+            tempos.append(time.perf_counter() - inicio)
+    finally:
+        servidor.fechar()
+    return {
+        "mediana_s": statistics.median(tempos),
+        "max_s": max(tempos),
+        "caracteres": len(dados.get("transcricao") or ""),
+        "fonte": dados.get("fonte") or ("erro" if "erro" in dados else "legenda/cobalt"),
+    }
+
+
+# --- GRAVAÇÃO ---
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, round(time.perf_counter() - inicio, 3)
+
+
+def gravar(url, pasta):
+    """Roda o caminho real uma vez, guardando respostas (enxutas) e tempos."""
+    import requests
+    import yt_dlp
+    from modules import youtube_local
+
+    latencias = {}
+    with yt_dlp.YoutubeDL(youtube_local.OPCOES_YTDLP) as ydl:
+        info, latencias["extract_info"] = _cronometrar(lambda: ydl.sanitize_info(ydl.extract_info(url, download=False)))
+
+    enxuto = {k: info.get(k) for k in ("id", "title", "description", "channel", "uploader", "upload_date",
+                                       "view_count", "like_count", "language")}
+    fixture = {"url": url, "sintetico": False, "gravado_em": datetime.now().isoformat(timespec="seconds"),
+               "latencias": latencias, "info": enxuto, "legenda": None, "apify_item": None}
+
+    legenda = youtube_local.escolher_legenda(info)
+    for fonte in ("subtitles", "automatic_captions"):
+        enxuto[fonte] = {}
+    if legenda:
+        idioma, formato = legenda
+        fonte = "subtitles" if idioma in (info.get("subtitles") or {}) else "automatic_captions"
+        enxuto[fonte][idioma] = [{"ext": formato["ext"], "url": GRAVADO + "legenda"}]
+        resposta, latencias["legenda"] = _cronometrar(lambda: requests.get(formato["url"], timeout=30))
+        fixture["legenda"] = {"ext": formato["ext"], "conteudo": resposta.content.decode("utf-8", errors="replace")}
+
+    audio = youtube_local.escolher_audio(info)
+    enxuto["formats"] = []
+    if audio:
+        enxuto["formats"] = [{k: audio.get(k) for k in ("format_id", "ext", "acodec", "vcodec", "abr", "protocol")}]
+        enxuto["formats"][0]["url"] = GRAVADO + "audio"
+        resposta, latencias["audio"] = _cronometrar(lambda: requests.get(audio["url"], headers=audio.get("http_headers"), timeout=120))
+        fixture["audio_bytes"] = len(resposta.content)
+
+    token = os.environ.get("APIFY_TOKEN")
+    if token:
+        from apify_client import ApifyClient
+        client = ApifyClient(token)
+        run, latencias["apify_run"] = _cronometrar(lambda: client.actor("streamers/youtube-scraper").call(run_input={
+            "startUrls": [{"url": url}], "maxResults": 1, "downloadSubtitles": True, "saveSubsToKVS": False
+        }))
+        itens, latencias["apify_dataset"] = _cronometrar(lambda: client.dataset(run["defaultDatasetId"]).list_items().items)
+        fixture["apify_item"] = itens[0] if itens else None
+    else:
+        print("APIFY_TOKEN ausente: a fixture fica sem o caminho da Apify gravado.")
+
+    destino = os.path.join(pasta, f"{enxuto['id']}.json")
+    with open(destino, "w", encoding="utf-8") as f:
+        json.dump(fixture, f, ensure_ascii=False, indent=1)
+    print(f"Gravado: {destino} ({', '.join(f'{k}={v}s' for k, v in latencias.items())})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=PASTA_FIXTURES)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--caminhos", nargs="+", default=CAMINHOS, choices=CAMINHOS)
+    parser.add_argument("--gravar", nargs="+", metavar="URL", help="grava fixtures novas em --fixtures")
+    args = parser.parse_args()
+
+    if args.gravar:
+        os.makedirs(args.fixtures, exist_ok=True)
+        for url in args.gravar:
+            gravar(url, args.fixtures)
+        return
+
+    arquivos = sorted(glob.glob(os.path.join(os.path.abspath(args.fixtures), "*.json")))
+    if not arquivos:
+        raise SystemExit(f"Nenhuma fixture em {args.fixtures}")
+
+    dir_trabalho = tempfile.mkdtemp(prefix="bench_youtube_")
+    try:
+        preparar(dir_trabalho)
+        print(f"{'fixture':<28}{'caminho':<8}{'mediana (s)':>13}{'máx (s)':>10}{'caracteres':>12}  fonte")
+        for arquivo in arquivos:
+            with open(arquivo, encoding="utf-8") as f:
+                fixture = json.load(f)
+            nome = os.path.splitext(os.path.basename(arquivo))[0] + (" *" if fixture.get("sintetico") else "")
+            for caminho in args.caminhos:
+                r = medir(fixture, caminho, args.repeticoes)
+                print(f"{nome:<28}{caminho:<8}{r['mediana_s']:>13.2f}{r['max_s']:>10.2f}{r['caracteres']:>12}  {r['fonte']}")
+        print("* fixture sintética")
+    finally:
+        shutil.rmtree(dir_trabalho, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
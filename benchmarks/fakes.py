@@ -0,0 +1,426 @@
+"""
+Substitutos locais das APIs externas (Apify, yt-dlp, Groq, Gemini, Google Sheets)
+e um servidor HTTP de vídeos, para rodar os fluxos sem gastar cota.
+
+Cada fake tem latência e taxa de erro configuráveis (ver `Perfil`). Os clientes
+entram no app pelo registro de modules/clients.py (registrar_fabrica), então o
+código medido é exatamente o de produção.
+"""
+import copy
+import http.server
+import itertools
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+
+class ErroSimulado(Exception):
+    """Falha injetada por um fake (equivale a um 5xx da API real)."""
+
+
+class Perfil:
+    """Latência (média ± jitter, em segundos) e probabilidade de erro de um serviço."""
+
+    def __init__(self, latencia=0.0, jitter=0.0, taxa_erro=0.0):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.taxa_erro = taxa_erro
+
+    def simular(self, nome=""):
+        atraso = max(0.0, random.gauss(self.latencia, self.jitter)) if self.jitter else self.latencia
+        if atraso:
+            time.sleep(atraso)
+        if self.taxa_erro and random.random() < self.taxa_erro:
+            raise ErroSimulado(f"Erro simulado em {nome}")
+
+
+# --- SERVIDOR DE VÍDEOS (CDN do Instagram) ---
+
+def gerar_videos(ffmpeg, pasta, quantidade, duracao=6):
+    """Gera `quantidade` mp4 pequenos com áudio diferente (o cache de transcrição não pode acertar)."""
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    for i in range(quantidade):
+        caminho = os.path.join(pasta, f"{i}.mp4")
+        if not os.path.exists(caminho):
+            subprocess.run(
+                [ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+                 "-f", "lavfi", "-i", f"testsrc=size=160x284:rate=15:duration={duracao}",
+                 "-f", "lavfi", "-i", f"sine=frequency={220 + i * 7}:duration={duracao}",
+                 "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-b:a", "96k",
+                 "-shortest", caminho],
+                check=True,
+            )
+        caminhos.append(caminho)
+    return caminhos
+
+
+class ServidorVideos:
+    """Serve /video/<n>.mp4 a partir de `pasta`, com a latência/erros do `perfil`."""
+
+    def __init__(self, pasta, perfil):
+        servidor = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    servidor.perfil.simular("download")
+                except ErroSimulado:
+                    self.send_error(503)
+                    return
+                caminho = os.path.join(servidor.pasta, os.path.basename(self.path))
+                if not os.path.exists(caminho):
+                    self.send_error(404)
+                    return
+                with open(caminho, "rb") as f:
+                    dados = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "video/mp4")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.pasta = pasta
+        self.perfil = perfil
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url_base = f"http://127.0.0.1:{self.httpd.server_port}/video"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def url(self, n):
+        return f"{self.url_base}/{n}.mp4"
+
+    def fechar(self):
+        self.httpd.shutdown()
+
+
+# --- APIFY ---
+
+class _Dataset:
+    def __init__(self, itens, perfil):
+        self._itens = itens
+        self._perfil = perfil
+
+    def list_items(self, offset=0, limit=None):
+        self._perfil.simular("apify dataset")
+        itens = self._itens() if callable(self._itens) else self._itens
+        return SimpleNamespace(items=list(itens[offset:offset + limit if limit else None]))
+
+    def iterate_items(self):
+        self._perfil.simular("apify dataset")
+        yield from (self._itens() if callable(self._itens) else self._itens)
+
+
+class FakeApify:
+    """
+    ApifyClient: `actor(...).call(run_input)` "roda" o scraper e guarda o dataset.
+    `actor(...).start(run_input)` volta na hora: os itens aparecem no dataset aos
+    poucos, ao longo da latência do run (como o scraper real empurra os posts).
+    Posts do Instagram apontam para o ServidorVideos (um vídeo diferente por post).
+    """
+
+    def __init__(self, servidor, n_videos, posts_por_perfil=12, perfil_run=None, perfil_dataset=None):
+        self.servidor = servidor
+        self.n_videos = n_videos
+        self.posts_por_perfil = posts_por_perfil
+        self.perfil_run = perfil_run or Perfil()
+        self.perfil_dataset = perfil_dataset or Perfil()
+        self._datasets = {}
+        self._runs = {}  # id -> (início, duração, itens) dos runs iniciados com start()
+        self._ids = itertools.count(1)
+        self._videos = itertools.count()
+        self._lock = threading.Lock()
+
+    def _proximo_video(self):
+        with self._lock:
+            return self.servidor.url(next(self._videos) % self.n_videos)
+
+    def _post(self, dono, n, agora, tipo="Video"):
+        pk = f"{dono}_{n}"
+        item = {
+            "id": pk,
+            "type": tipo,
+            "shortCode": pk,
+            "ownerUsername": dono,
+            "timestamp": (agora - timedelta(hours=6 * n + 1)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "caption": f"Legenda do post {n} de @{dono}. " * 5,
+            "likesCount": random.randint(100, 10000),
+            "commentsCount": random.randint(0, 500),
+        }
+        if tipo == "Sidecar":
+            item["childPosts"] = [{"type": "Image", "alt": f"Slide {i + 1}: texto do slide {i + 1}."} for i in range(6)]
+            item["viewCount"] = 0
+        else:
+            item["videoUrl"] = self._proximo_video()
+            item["videoViewCount"] = random.randint(1000, 500000)
+        return item
+
+    def _rodar(self, ator, run_input):
+        agora = datetime.now(timezone.utc)
+        itens = []
+        if ator == "streamers/youtube-scraper":
+            url = run_input["startUrls"][0]["url"]
+            itens.append({
+                "id": url.rsplit("=", 1)[-1], "title": "Vídeo simulado", "description": "Descrição simulada",
+                "subtitles": [{"lines": [{"text": f"Linha {i} da legenda simulada do vídeo."} for i in range(40)]}],
+            })
+        else:
+            for url in run_input.get("directUrls", []):
+                partes = [p for p in url.rstrip("/").split("/") if p]
+                if "/p/" in url or "/reel/" in url:
+                    codigo = partes[-1]
+                    tipo = "Sidecar" if codigo.startswith("car") else "Video"
+                    item = self._post(codigo, 0, agora, tipo)
+                    itens.append(item)
+                else:
+                    dono = partes[-1]
+                    limite = min(run_input.get("resultsLimit", self.posts_por_perfil), self.posts_por_perfil)
+                    itens.extend(self._post(dono, n, agora) for n in range(limite))
+        return itens
+
+    def actor(self, ator):
+        fake = self
+
+        class _Ator:
+            def call(self, run_input=None, **kwargs):
+                fake.perfil_run.simular("apify run")
+                dataset_id = f"ds{next(fake._ids)}"
+                fake._datasets[dataset_id] = fake._rodar(ator, run_input or {})
+                return {"id": dataset_id, "defaultDatasetId": dataset_id}
+
+            def start(self, run_input=None, **kwargs):
+                p = fake.perfil_run
+                duracao = max(0.0, random.gauss(p.latencia, p.jitter)) if p.jitter else p.latencia
+                run_id = f"ds{next(fake._ids)}"
+                fake._runs[run_id] = (time.monotonic(), duracao, fake._rodar(ator, run_input or {}))
+                return {"id": run_id, "defaultDatasetId": run_id, "status": "RUNNING"}
+
+        return _Ator()
+
+    def _progresso(self, run_id):
+        inicio, duracao, itens = self._runs[run_id]
+        fracao = 1.0 if not duracao else min(1.0, (time.monotonic() - inicio) / duracao)
+        return fracao, itens[:int(len(itens) * fracao)]
+
+    def run(self, run_id):
+        fake = self
+        return SimpleNamespace(get=lambda: {"id": run_id, "status": "SUCCEEDED" if fake._progresso(run_id)[0] >= 1 else "RUNNING"})
+
+    def dataset(self, dataset_id):
+        if dataset_id in self._runs:
+            return _Dataset(lambda: self._progresso(dataset_id)[1], self.perfil_dataset)
+        return _Dataset(self._datasets.get(dataset_id, []), self.perfil_dataset)
+
+
+# --- YT-DLP ---
+
+def info_youtube(url, url_legenda):
+    """`info` do yt-dlp de um vídeo com legenda automática em pt (json3 em `url_legenda`)."""
+    video_id = url.rsplit("=", 1)[-1]
+    return {
+        "id": video_id, "title": "Vídeo simulado", "description": "Descrição simulada",
+        "channel": "Canal simulado", "upload_date": "20240131", "view_count": 12345, "like_count": 678,
+        "language": "pt", "subtitles": {},
+        "automatic_captions": {"pt-orig": [{"ext": "json3", "url": url_legenda}]},
+        "formats": [],
+    }
+
+
+def legenda_json3(linhas=40):
+    eventos = [{"segs": [{"utf8": f"Linha {i} da legenda simulada do vídeo."}]} for i in range(linhas)]
+    return json.dumps({"events": eventos})
+
+
+class FakeYtdlp:
+    """
+    Módulo yt_dlp: `YoutubeDL(opcoes).extract_info(url)` devolve o info de `infos`
+    (dict url -> info, ou função url -> info) após a latência do `perfil`.
+    """
+
+    def __init__(self, infos, perfil=None):
+        self.infos = infos
+        self.perfil = perfil or Perfil()
+
+    def YoutubeDL(self, opcoes=None):
+        fake = self
+
+        class _YoutubeDL:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def extract_info(self, url, download=False):
+                fake.perfil.simular("yt-dlp")
+                info = fake.infos(url) if callable(fake.infos) else fake.infos.get(url)
+                if info is None:
+                    raise ErroSimulado(f"ERROR: [youtube] {url}: Video unavailable")
+                return copy.deepcopy(info)
+
+        return _YoutubeDL()
+
+
+# --- GROQ ---
+
+_IDEIAS = [
+    {"titulo": f"Conceito {i}", "estrutura": "Lista", "por_que_funciona": "Simulado."} for i in range(1, 4)
+]
+_CARROSSEL = {
+    "meta_dados": {"tema": "Simulado", "complexidade_detectada": "Média", "total_slides": 6},
+    "carrossel": [
+        {"painel": i, "fase": "Desenvolvimento", "texto": f"Texto do slide {i}.", "nota_engenharia": "-"}
+        for i in range(1, 7)
+    ],
+}
+
+
+def _resposta_chat(mensagens):
+    """Escolhe um conteúdo plausível pelo prompt (gancho, tempestade ou arquiteto)."""
+    texto = " ".join(str(m.get("content", "")) for m in mensagens)
+    if "CONCEITO:" in texto:
+        return json.dumps(_CARROSSEL, ensure_ascii=False)
+    if mensagens and mensagens[0].get("role") == "system":
+        return json.dumps(_IDEIAS, ensure_ascii=False)
+    return json.dumps({"ganchos_verbais": "Gancho simulado", "ganchos_visuais": "Visual simulado"})
+
+
+class FakeGroq:
+    """Groq: audio.transcriptions.create e chat.completions.create (com e sem stream)."""
+
+    def __init__(self, perfil_whisper=None, perfil_chat=None, tokens_por_segundo=400):
+        self.perfil_whisper = perfil_whisper or Perfil()
+        self.perfil_chat = perfil_chat or Perfil()
+        self.tokens_por_segundo = tokens_por_segundo
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcrever))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._completar))
+
+    def _transcrever(self, file=None, model=None, **kwargs):
+        self.perfil_whisper.simular("whisper")
+        nome, conteudo = file
+        return f"Transcrição simulada de {nome} ({len(conteudo)} bytes). " * 20
+
+    def _completar(self, messages=None, model=None, stream=False, **kwargs):
+        self.perfil_chat.simular("chat")
+        conteudo = _resposta_chat(messages or [])
+        if not stream:
+            prompt = sum(len(str(m.get("content", ""))) for m in messages) // 4
+            uso = SimpleNamespace(prompt_tokens=prompt, completion_tokens=len(conteudo) // 4,
+                                  total_tokens=prompt + len(conteudo) // 4)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=conteudo))], usage=uso
+            )
+        return self._stream(conteudo)
+
+    def _stream(self, conteudo, tamanho=16):
+        intervalo = tamanho / 4 / self.tokens_por_segundo
+        for i in range(0, len(conteudo), tamanho):
+            time.sleep(intervalo)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=conteudo[i:i + tamanho]))])
+
+    def close(self):
+        pass
+
+
+# --- GEMINI ---
+
+class FakeGemini:
+    """Imita o módulo google.generativeai já configurado."""
+
+    def __init__(self, perfil=None):
+        self.perfil = perfil or Perfil()
+
+    def GenerativeModel(self, nome):
+        fake = self
+
+        class _Modelo:
+            def generate_content(self, prompt):
+                fake.perfil.simular("gemini")
+                pautas = [{"titulo": f"Pauta {i}", "hype": "Alto", "gancho": "Gancho"} for i in range(5)]
+                return SimpleNamespace(text=json.dumps(pautas, ensure_ascii=False))
+
+        return _Modelo()
+
+
+# --- GOOGLE SHEETS ---
+
+class FakeAba:
+    def __init__(self, planilha, titulo, perfil):
+        self.spreadsheet = planilha
+        self.title = titulo
+        self._perfil = perfil
+        self._linhas = [["ID_Unico", "Data_Coleta", "Perfil", "Data_Postagem", "URL_Original",
+                         "Views", "Likes", "Comments", "Transcricao"]]
+        self._lock = threading.Lock()
+        self.chamadas = 0
+
+    def _chamada(self, nome):
+        self.chamadas += 1
+        self._perfil.simular(f"sheets {nome}")
+
+    def append_row(self, linha, **kwargs):
+        self.append_rows([linha])
+
+    def append_rows(self, linhas, **kwargs):
+        self._chamada("append_rows")
+        with self._lock:
+            self._linhas.extend([list(map(str, l)) for l in linhas])
+
+    def get_all_values(self):
+        self._chamada("get_all_values")
+        with self._lock:
+            return [list(l) for l in self._linhas]
+
+    def get(self, intervalo):
+        self._chamada("get")
+        inicio = int("".join(c for c in intervalo.split(":")[0] if c.isdigit()))
+        with self._lock:
+            return [list(l) for l in self._linhas[inicio - 1:]]
+
+    def col_values(self, coluna):
+        self._chamada("col_values")
+        with self._lock:
+            return [l[coluna - 1] if len(l) >= coluna else "" for l in self._linhas]
+
+    def find(self, valor):
+        self._chamada("find")
+        with self._lock:
+            for i, l in enumerate(self._linhas):
+                if valor in l:
+                    return SimpleNamespace(row=i + 1, col=l.index(valor) + 1)
+        return None
+
+    def row_values(self, linha):
+        self._chamada("row_values")
+        with self._lock:
+            return list(self._linhas[linha - 1])
+
+
+class FakePlanilha:
+    def __init__(self, perfil, abas=("instagram", "carrossel", "Youtube")):
+        self._abas = {t: FakeAba(self, t, perfil) for t in abas}
+        self._perfil = perfil
+
+    def worksheet(self, titulo):
+        return self._abas[titulo]
+
+    def add_worksheet(self, title, rows=None, cols=None):
+        return self._abas.setdefault(title, FakeAba(self, title, self._perfil))
+
+    def chamadas(self):
+        return sum(a.chamadas for a in self._abas.values())
+
+
+class FakeGspread:
+    def __init__(self, perfil=None):
+        self.planilha = FakePlanilha(perfil or Perfil())
+
+    def open(self, nome):
+        return self.planilha
@@ -0,0 +1,131 @@
+"""
+Tempo de import (cold start) de cada página e do main.py, com orçamento.
+
+Cada script roda num interpretador novo: primeiro `import streamlit` (custo fixo,
+igual para todas as páginas), depois só as linhas de import do topo da página.
+O tempo medido é o dessas linhas. Também falha se a página carregar alguma
+dependência pesada que deveria ser importada sob demanda (ver PESADOS).
+
+Uso:
+    python benchmarks/import_budget.py                  # tabela; sai com 1 se estourar
+    python benchmarks/import_budget.py --perfil         # + módulos mais lentos (-X importtime)
+    python benchmarks/import_budget.py --orcamento-ms 200 --repeticoes 5
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ORCAMENTO_MS = 300
+# Páginas com orçamento próprio (caminho relativo à raiz -> ms)
+ORCAMENTOS = {}
+
+# Não podem ser carregados só por abrir uma página (são importados dentro das funções)
+PESADOS = [
+    "moviepy", "imageio", "google.generativeai", "grpc", "groq", "apify_client",
+    "gspread", "oauth2client", "httpx", "requests", "altair", "pandas",
+]
+
+_CODIGO = """
+import json, sys, time
+import streamlit
+antes = set(sys.modules)
+inicio = time.perf_counter()
+{imports}
+ms = (time.perf_counter() - inicio) * 1000
+print(json.dumps({{"ms": ms, "novos": sorted(set(sys.modules) - antes)}}))
+"""
+
+
+def scripts():
+    return [os.path.join(RAIZ, "main.py")] + sorted(glob.glob(os.path.join(RAIZ, "pages", "*.py")))
+
+
+def imports_do_topo(caminho):
+    """As linhas `import`/`from ... import` do nível do módulo (sem o streamlit)."""
+    with open(caminho, encoding="utf-8") as f:
+        arvore = ast.parse(f.read(), caminho)
+    linhas = []
+    for no in arvore.body:
+        if isinstance(no, ast.Import):
+            nomes = [a for a in no.names if a.name != "streamlit"]
+            if nomes:
+                linhas.append(ast.unparse(ast.Import(names=nomes)))
+        elif isinstance(no, ast.ImportFrom):
+            linhas.append(ast.unparse(no))
+    return linhas
+
+
+def medir(caminho, perfil=False):
+    codigo = _CODIGO.format(imports="\n".join(imports_do_topo(caminho)))
+    args = [sys.executable] + (["-X", "importtime"] if perfil else []) + ["-c", codigo]
+    proc = subprocess.run(args, cwd=RAIZ, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "falhou")
+    resultado = json.loads(proc.stdout.strip().splitlines()[-1])
+    if perfil:
+        resultado["perfil"] = _mais_lentos(proc.stderr)
+    return resultado
+
+
+def _mais_lentos(saida_importtime, n=8):
+    """Módulos de nível 0/1 com maior tempo acumulado (depois do streamlit)."""
+    linhas = saida_importtime.splitlines()
+    # Ignora tudo até o streamlit terminar de importar (ele é o custo fixo)
+    corte = next((i for i, l in enumerate(linhas) if l.rstrip().endswith("| streamlit")), -1)
+    entradas = []
+    for linha in linhas[corte + 1:]:
+        partes = linha.split("|")
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        nome = partes[2].rstrip()
+        nivel = (len(nome) - len(nome.lstrip()) - 1) // 2
+        if nivel <= 1:
+            entradas.append((int(partes[1]) / 1000, nome.strip()))
+    return sorted(entradas, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orcamento-ms", type=float, default=ORCAMENTO_MS)
+    parser.add_argument("--repeticoes", type=int, default=3, help="usa o menor tempo entre N processos")
+    parser.add_argument("--perfil", action="store_true", help="mostra os imports mais lentos de cada página")
+    args = parser.parse_args()
+
+    falhas = []
+    print(f"{'script':<42}{'import (ms)':>12}{'orçamento':>11}")
+    for caminho in scripts():
+        nome = os.path.relpath(caminho, RAIZ)
+        orcamento = ORCAMENTOS.get(nome, args.orcamento_ms)
+        try:
+            medidas = [medir(caminho) for _ in range(args.repeticoes)]
+        except RuntimeError as e:
+            print(f"{nome:<42}  erro: {e}")
+            falhas.append(f"{nome}: import falhou")
+            continue
+        ms = min(m["ms"] for m in medidas)
+        pesados = sorted({p for p in PESADOS for mod in medidas[0]["novos"] if mod == p or mod.startswith(p + ".")})
+        marca = "" if ms <= orcamento else "  ESTOUROU"
+        print(f"{nome:<42}{ms:>12.1f}{orcamento:>11.0f}{marca}")
+        if ms > orcamento:
+            falhas.append(f"{nome}: {ms:.0f} ms > {orcamento:.0f} ms")
+        if pesados:
+            print(f"{'':<4}carregou dependências pesadas: {', '.join(pesados)}")
+            falhas.append(f"{nome}: importa {', '.join(pesados)} no topo")
+        if args.perfil:
+            for tempo, modulo in medir(caminho, perfil=True)["perfil"]:
+                print(f"{'':<4}{tempo:>8.1f} ms  {modulo}")
+
+    if falhas:
+        print("\nFALHOU:\n  " + "\n  ".join(falhas))
+        sys.exit(1)
+    print("\nOK: todas as páginas dentro do orçamento.")
+
+
+if __name__ == "__main__":
+    main()
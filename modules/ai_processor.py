@@ -1,8 +1,17 @@
 import streamlit as st
 import os
+import re
 import json
-from groq import Groq
-from moviepy.editor import VideoFileClip
+import shutil
+import tempfile
+import difflib
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from modules import clients, prompt_budget, rate_limit, tracing
+from modules.audio import extrair_audio, duracao_audio, planejar_partes, cortar_parte
+from modules.transcricao_cache import transcrever_com_cache
 
 # Importa TODOS os prompts necessários (Página 01 e 04)
 from modules.prompts import (
@@ -28,65 +37,119 @@ def limpar_json(texto):
         return texto[start_obj:end_obj+1]
     return texto
 
-def transcrever_audio_groq(filepath):
+MODELO_WHISPER = "whisper-large-v3"
+
+MODELO_LLAMA = "llama-3.3-70b-versatile"
+
+# Orçamento dos prompts (modules/prompt_budget.py): latência alvo (s) e tamanho típico da resposta (tokens).
+# O conteúdo que não cabe é resumido (frases inteiras), não cortado no meio.
+ALVO_S_GANCHO, SAIDA_GANCHO = 3, 200
+TETO_TOKENS_GANCHO = 1200   # o gancho está no começo: mais que isso não muda a análise
+ALVO_S_TEMPESTADE, SAIDA_TEMPESTADE = 6, 700
+ALVO_S_ARQUITETO, SAIDA_ARQUITETO = 9, 1400
+
+def whisper_groq(nome_arquivo, conteudo, idioma=None, client=None, duracao_s=None):
+    """
+    Ponto único de chamada ao Whisper: todas as transcrições passam pelo cache
+    em disco (hash do áudio + modelo + idioma) e, no cache miss, pelo agendador
+    de limites (segundos de áudio/hora). Levanta exceção em caso de erro.
+    `duracao_s` pode ser uma função: só é chamada no cache miss (ex.: ffprobe do arquivo).
+    """
+    def chamar_api():
+        duracao = duracao_s() if callable(duracao_s) else duracao_s
+        client_groq = client or clients.groq_client()
+        params = {"file": (nome_arquivo, conteudo), "model": MODELO_WHISPER, "response_format": "text"}
+        if idioma:
+            params["language"] = idioma
+        return str(rate_limit.chamar(
+            MODELO_WHISPER,
+            lambda: client_groq.audio.transcriptions.create(**params),
+            audio_s=rate_limit.estimar_segundos_audio(conteudo, duracao),
+        ))
+
+    return transcrever_com_cache(conteudo, MODELO_WHISPER, idioma, chamar_api)
+
+def whisper_groq_arquivo(caminho, idioma=None, client=None):
+    def duracao():
+        # Subprocesso do ffmpeg: só no cache miss, quando o agendador precisa dos segundos de áudio
+        try:
+            return duracao_audio(caminho)
+        except Exception:
+            return None
+    with open(caminho, "rb") as file:
+        return whisper_groq(os.path.basename(caminho), file.read(), idioma, client, duracao)
+
+def transcrever_audio_groq(filepath, container_log=st):
     """Transcreve áudio usando Whisper na Groq (Usado na Pag 04)"""
-    if "groq" not in st.secrets: return None
-    client = Groq(api_key=st.secrets["groq"]["api_key"])
+    if "groq" not in st.secrets:
+        container_log.error("Chave Groq não configurada.")
+        return None
     try:
-        with open(filepath, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=(filepath, file.read()),
-                model="whisper-large-v3",
-                response_format="text"
-            )
-        return str(transcription)
+        return whisper_groq_arquivo(filepath)
     except Exception as e:
-        st.error(f"Erro na Transcrição: {e}")
+        container_log.error(f"Erro na Transcrição: {e}")
         return None
 
 # --- FUNÇÕES PARA PÁGINA 01 (INSTAGRAM ANALYZER) ---
 
+def _cliente_groq():
+    if "groq" in st.secrets and "api_key" in st.secrets["groq"]:
+        return clients.groq_client()
+    return None
+
+def extrair_audio_video(video_path, duracao_max=None):
+    """Extrai o áudio do mp4 (stream copy via ffmpeg) e retorna o caminho do áudio."""
+    return extrair_audio(video_path, duracao_max=duracao_max)
+
+def transcrever_whisper_groq(audio_path, client_groq=None):
+    """Transcreve um arquivo de áudio com Whisper (levanta exceção em caso de erro)."""
+    client_groq = client_groq or _cliente_groq()
+    if client_groq is None:
+        raise RuntimeError("Chave Groq não configurada")
+    return whisper_groq_arquivo(audio_path, client=client_groq)
+
+def analisar_gancho_groq(texto_transcrito_completo, client_groq=None):
+    """Manda o início da transcrição para o Llama 3 e retorna o JSON de ganchos."""
+    client_groq = client_groq or _cliente_groq()
+    if client_groq is None:
+        raise RuntimeError("Chave Groq não configurada")
+
+    # O prompt só olha o começo: frases inteiras do início, dentro do orçamento
+    texto = prompt_budget.caber(
+        texto_transcrito_completo, MODELO_LLAMA, alvo_s=ALVO_S_GANCHO, saida=SAIDA_GANCHO,
+        fixos=(PROMPT_ANALISE_GANCHO,), foco="inicio", teto=TETO_TOKENS_GANCHO,
+    )
+    prompt_final = PROMPT_ANALISE_GANCHO.format(texto_transcrito=texto)
+    
+    completion = rate_limit.chat_groq(
+        client_groq,
+        model=MODELO_LLAMA,
+        messages=[{"role": "user", "content": prompt_final}],
+        temperature=0.1, 
+        response_format={"type": "json_object"}
+    )
+    return json.loads(completion.choices[0].message.content)
+
 def analisar_video_groq(video_path, status_box):
     """Extrai áudio, transcreve e analisa ganchos (Usado na Pag 01)"""
-    if "groq" in st.secrets and "api_key" in st.secrets["groq"]:
-        client_groq = Groq(api_key=st.secrets["groq"]["api_key"])
-    else:
+    client_groq = _cliente_groq()
+    if client_groq is None:
         return {"transcricao": "Erro: Chave Groq não configurada", "ganchos_verbais": "-"}
 
-    audio_path = video_path.replace(".mp4", ".mp3")
+    audio_path = ""
 
     try:
         status_box.write("🔊 Extraindo áudio...")
         try:
-            video_clip = VideoFileClip(video_path)
-            video_clip.audio.write_audiofile(audio_path, bitrate="32k", verbose=False, logger=None)
-            video_clip.close()
+            audio_path = extrair_audio_video(video_path)
         except Exception as e:
-            return {"transcricao": f"Erro MoviePy: {e}", "ganchos_verbais": "-"}
+            return {"transcricao": f"Erro áudio: {e}", "ganchos_verbais": "-"}
 
         status_box.write("📝 Transcrevendo (Whisper)...")
-        with open(audio_path, "rb") as file:
-            transcription = client_groq.audio.transcriptions.create(
-                file=(audio_path, file.read()),
-                model="whisper-large-v3", 
-                response_format="text"
-            )
-        texto_transcrito_completo = str(transcription)
+        texto_transcrito_completo = transcrever_whisper_groq(audio_path, client_groq)
 
         status_box.write("🧠 Analisando com Llama 3...")
-        
-        prompt_final = PROMPT_ANALISE_GANCHO.format(
-            texto_transcrito=texto_transcrito_completo[:4000]
-        )
-        
-        completion = client_groq.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt_final}],
-            temperature=0.1, 
-            response_format={"type": "json_object"}
-        )
-
-        resultado_ia = json.loads(completion.choices[0].message.content)
+        resultado_ia = analisar_gancho_groq(texto_transcrito_completo, client_groq)
 
         if os.path.exists(audio_path): os.remove(audio_path)
 
@@ -98,17 +161,20 @@ def analisar_video_groq(video_path, status_box):
 
     except Exception as e:
         status_box.error(f"Erro Groq: {e}")
-        if os.path.exists(audio_path): os.remove(audio_path)
+        if audio_path and os.path.exists(audio_path): os.remove(audio_path)
         return {"transcricao": "Erro API", "ganchos_verbais": "-"}
 
 # --- FUNÇÕES PARA PÁGINA 04 (GERADOR DE CARROSSEL) ---
 
-def agente_tempestade_ideias(conteudo_base, modo="Conteúdo (Viral)"):
+def agente_tempestade_ideias(conteudo_base, modo="Conteúdo (Viral)", container_log=st):
     """
     Gera conceitos baseados no modo escolhido (Viral ou Mentor).
+    `container_log` recebe os erros (st na página, o ContextoJob num job).
     """
-    if "groq" not in st.secrets: return None
-    client = Groq(api_key=st.secrets["groq"]["api_key"])
+    if "groq" not in st.secrets:
+        container_log.error("Chave Groq não configurada.")
+        return None
+    client = clients.groq_client()
     
     # Lógica de Seleção de Persona
     if modo == "Vendas (Mentor)":
@@ -119,100 +185,333 @@ def agente_tempestade_ideias(conteudo_base, modo="Conteúdo (Viral)"):
         instruction_extra = "Foque em viralidade, retenção e topo de funil. Gere 3 conceitos em JSON."
 
     try:
+        conteudo = prompt_budget.caber(
+            conteudo_base, MODELO_LLAMA, alvo_s=ALVO_S_TEMPESTADE, saida=SAIDA_TEMPESTADE,
+            fixos=(system_prompt, instruction_extra),
+        )
         prompt_user = f"""
         {instruction_extra}
         
         CONTEÚDO BASE PARA ANÁLISE:
-        {conteudo_base[:12000]}
+        {conteudo}
         """
         
-        completion = client.chat.completions.create(
+        completion = rate_limit.chat_groq(
+            client,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt_user}
             ],
-            model="llama-3.3-70b-versatile",
+            model=MODELO_LLAMA,
             temperature=0.5,
             response_format={"type": "json_object"}
         )
         texto_limpo = limpar_json(completion.choices[0].message.content)
         return json.loads(texto_limpo)
     except Exception as e:
-        st.error(f"Erro na IA Tempestade ({modo}): {e}")
+        container_log.error(f"Erro na IA Tempestade ({modo}): {e}")
         return None
 
-def agente_arquiteto_carrossel(ideia_escolhida, conteudo_base):
-    """
-    Gera o roteiro detalhado do carrossel.
-    """
-    if "groq" not in st.secrets: return None
-    client = Groq(api_key=st.secrets["groq"]["api_key"])
-    try:
-        prompt_user = f"""
+def _mensagens_arquiteto(ideia_escolhida, conteudo_base):
+    conteudo = prompt_budget.caber(
+        conteudo_base, MODELO_LLAMA, alvo_s=ALVO_S_ARQUITETO, saida=SAIDA_ARQUITETO,
+        fixos=(SYSTEM_PROMPT_ARQUITETO, json.dumps(ideia_escolhida, ensure_ascii=False)),
+    )
+    prompt_user = f"""
         INSTRUÇÃO CRÍTICA: Baseie-se ESTRITAMENTE na transcrição/conteúdo abaixo.
         === CONTEÚDO ORIGINAL ===
-        "{conteudo_base[:15000]}" 
+        "{conteudo}" 
         =========================
         CONCEITO: {ideia_escolhida.get('titulo')}
         ESTRUTURA: {ideia_escolhida.get('estrutura')}
         LÓGICA: {ideia_escolhida.get('por_que_funciona')}
         """
-        
-        completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT_ARQUITETO},
-                {"role": "user", "content": prompt_user}
-            ],
-            model="llama-3.3-70b-versatile",
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT_ARQUITETO},
+        {"role": "user", "content": prompt_user}
+    ]
+
+def _roteiro_arquiteto(ideia_escolhida, conteudo_base):
+    """Roteiro do carrossel (JSON). Exceções sobem: roda também fora da página (pré-geração)."""
+    if "groq" not in st.secrets:
+        raise RuntimeError("Chave Groq não configurada.")
+    completion = rate_limit.chat_groq(
+        clients.groq_client(),
+        messages=_mensagens_arquiteto(ideia_escolhida, conteudo_base),
+        model=MODELO_LLAMA,
+        temperature=0.5,
+        top_p=0.9,
+        max_tokens=2048,
+        response_format={"type": "json_object"}
+    )
+    return json.loads(limpar_json(completion.choices[0].message.content))
+
+def agente_arquiteto_carrossel(ideia_escolhida, conteudo_base, container_log=st):
+    """
+    Gera o roteiro detalhado do carrossel.
+    """
+    try:
+        return _roteiro_arquiteto(ideia_escolhida, conteudo_base)
+    except Exception as e:
+        container_log.error(f"Erro na IA Arquiteto: {e}")
+        return None
+
+# --- PRÉ-GERAÇÃO ESPECULATIVA (Pag 04) ---
+# Assim que as ideias chegam, o Arquiteto roda para todas em paralelo; o clique
+# em "Gerar Carrossel" só pega o resultado pronto (ou espera o que já está rodando).
+# O pool e o dicionário são do processo; cada sessão guarda as próprias chaves
+# (com o `escopo` da sessão) e só descarta essas.
+
+MAX_PRE_GERACOES = 30
+_pool_arquiteto = ThreadPoolExecutor(max_workers=3, thread_name_prefix="arquiteto")
+_pre_geracoes = OrderedDict()  # chave -> Future do roteiro
+_lock_pre_geracoes = threading.Lock()
+
+def chave_ideia(ideia_escolhida, conteudo_base, escopo=""):
+    h = hashlib.sha1(json.dumps(ideia_escolhida, sort_keys=True, ensure_ascii=False).encode())
+    h.update(conteudo_base.encode())
+    return f"{escopo}:{h.hexdigest()}"
+
+def pre_gerar_carrosseis(ideias, conteudo_base, escopo=""):
+    """Dispara o Arquiteto para cada ideia ainda não pré-gerada. Retorna as chaves (na ordem de `ideias`)."""
+    chaves = []
+    with _lock_pre_geracoes:
+        for ideia in ideias:
+            chave = chave_ideia(ideia, conteudo_base, escopo)
+            chaves.append(chave)
+            if chave not in _pre_geracoes:
+                _pre_geracoes[chave] = _pool_arquiteto.submit(_roteiro_arquiteto, ideia, conteudo_base)
+            _pre_geracoes.move_to_end(chave)
+        while len(_pre_geracoes) > MAX_PRE_GERACOES:
+            _, futuro = _pre_geracoes.popitem(last=False)
+            futuro.cancel()
+    return chaves
+
+def estado_pre_geracao(chave):
+    """None (não pré-gerado), "gerando", "pronto" ou "erro"."""
+    with _lock_pre_geracoes:
+        futuro = _pre_geracoes.get(chave)
+    if futuro is None or futuro.cancelled():
+        return None
+    if not futuro.done():
+        return "gerando"
+    return "pronto" if futuro.exception() is None and futuro.result() else "erro"
+
+def roteiro_pre_gerado(chave, timeout=None):
+    """Roteiro pré-gerado da chave (espera terminar se ainda está rodando) ou None."""
+    with _lock_pre_geracoes:
+        futuro = _pre_geracoes.get(chave)
+    if futuro is None or futuro.cancelled():
+        return None
+    try:
+        return futuro.result(timeout=timeout)
+    except Exception:
+        return None
+
+def descartar_pre_geracoes(chaves):
+    """
+    Esquece os roteiros dessas chaves (só as da sessão que chama). O que ainda está
+    na fila é cancelado; o que já está na Groq termina e o resultado é jogado fora.
+    """
+    with _lock_pre_geracoes:
+        for chave in chaves:
+            futuro = _pre_geracoes.pop(chave, None)
+            if futuro is not None:
+                futuro.cancel()
+
+class ParserCarrosselIncremental:
+    """
+    Lê o JSON do carrossel em pedaços (streaming) e devolve cada slide assim que
+    o objeto dele fecha dentro do array "carrossel".
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = None          # próximo caractere a examinar (depois do '[' de "carrossel")
+        self.em_string = False
+        self.escape = False
+        self.profundidade = 0
+        self.inicio_obj = None
+        self.fechado = False
+
+    def alimentar(self, pedaco):
+        """Acrescenta texto e retorna a lista de slides que fecharam neste pedaço."""
+        self.buffer += pedaco
+        slides = []
+        if self.fechado:
+            return slides
+        if self.pos is None:
+            m = re.search(r'"carrossel"\s*:\s*\[', self.buffer)
+            if not m:
+                return slides
+            self.pos = m.end()
+
+        i = self.pos
+        while i < len(self.buffer):
+            c = self.buffer[i]
+            if self.em_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.em_string = False
+            elif c == '"':
+                self.em_string = True
+            elif c == "{":
+                if self.profundidade == 0:
+                    self.inicio_obj = i
+                self.profundidade += 1
+            elif c == "}":
+                self.profundidade -= 1
+                if self.profundidade == 0 and self.inicio_obj is not None:
+                    try:
+                        slides.append(json.loads(self.buffer[self.inicio_obj:i + 1]))
+                    except ValueError:
+                        pass
+                    self.inicio_obj = None
+            elif c == "]" and self.profundidade == 0:
+                self.fechado = True
+                i += 1
+                break
+            i += 1
+        self.pos = i
+        return slides
+
+def agente_arquiteto_carrossel_stream(ideia_escolhida, conteudo_base):
+    """
+    Versão em streaming do Arquiteto. Gera eventos:
+      ("slide", dict)   -> cada slide, assim que o objeto dele fecha
+      ("final", dict)   -> roteiro completo (None em caso de erro)
+    """
+    if "groq" not in st.secrets:
+        yield "final", None
+        return
+    client = clients.groq_client()
+    parser = ParserCarrosselIncremental()
+    texto = ""
+    try:
+        # JSON mode da Groq não aceita stream: o formato vem do system prompt
+        stream = rate_limit.chat_groq(
+            client,
+            messages=_mensagens_arquiteto(ideia_escolhida, conteudo_base),
+            model=MODELO_LLAMA,
             temperature=0.5,
             top_p=0.9,
             max_tokens=2048,
-            response_format={"type": "json_object"}
+            stream=True
         )
-        texto_limpo = limpar_json(completion.choices[0].message.content)
-        return json.loads(texto_limpo)
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content or ""
+            texto += delta
+            for slide in parser.alimentar(delta):
+                yield "slide", slide
+        yield "final", json.loads(limpar_json(texto))
     except Exception as e:
         st.error(f"Erro na IA Arquiteto: {e}")
-        return None
+        yield "final", None
 
 def transcrever_arquivo_upload_groq(uploaded_file):
     """
-    Recebe um arquivo do st.file_uploader, salva temporariamente,
-    transcreve via Groq (Ultra Rápido) e retorna o texto.
+    Recebe um arquivo do st.file_uploader e transcreve via Groq (Ultra Rápido).
+    Os bytes vão direto da memória para a API (sem arquivo temporário) e um
+    arquivo idêntico já transcrito volta do cache.
     """
     if "groq" not in st.secrets:
         st.error("Chave Groq não configurada.")
         return None
 
-    client = Groq(api_key=st.secrets["groq"]["api_key"])
-    
-    # 1. Salvar o arquivo temporariamente no disco
-    # O Streamlit mantém o arquivo na RAM, a Groq precisa ler do disco ou buffer nomeado
-    temp_filename = f"temp_{uploaded_file.name}"
-    
     try:
-        with open(temp_filename, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        # 2. Enviar para a Groq (Modelo Whisper Large v3)
-        # Isso substitui o processamento local pesado
-        with open(temp_filename, "rb") as file:
-            transcription = client.audio.transcriptions.create(
-                file=(temp_filename, file.read()),
-                model="whisper-large-v3", # Modelo mais preciso e rápido do mundo atualmente
-                response_format="text",
-                language="pt" # Força português
-            )
-            
-        # 3. Limpeza
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-            
-        return str(transcription)
+        # Modelo Whisper Large v3, forçando português
+        return whisper_groq(uploaded_file.name, uploaded_file.getvalue(), idioma="pt")
+    except Exception as e:
+        st.error(f"Erro na transcrição: {e}")
+        return None
+
+
+# --- TRANSCRIÇÃO EM PARTES (ARQUIVOS ACIMA DE 25 MB - PÁGINA 05) ---
+
+LIMITE_UPLOAD_MB = 24
+WORKERS_TRANSCRICAO = 4
+
+def _palavras_norm(texto):
+    return [re.sub(r"[^\w]", "", p.lower()) for p in texto.split()]
+
+def costurar_transcricoes(textos, janela=40):
+    """
+    Junta as transcrições das partes removendo o trecho repetido na emenda
+    (partes sobrepostas transcrevem as mesmas palavras no fim de uma e início da outra).
+    """
+    resultado = []
+    for texto in textos:
+        texto = (texto or "").strip()
+        if not texto: continue
+        if not resultado:
+            resultado.append(texto)
+            continue
+
+        anterior = _palavras_norm(" ".join(resultado)[-2000:])[-janela:]
+        palavras = texto.split()
+        atual = _palavras_norm(texto)[:janela]
+
+        match = difflib.SequenceMatcher(None, anterior, atual, autojunk=False).find_longest_match(
+            0, len(anterior), 0, len(atual)
+        )
+        # Só corta se o trecho comum fecha o texto anterior e abre o atual (é a sobreposição)
+        if match.size >= 3 and len(anterior) - (match.a + match.size) <= 3 and match.b <= 3:
+            palavras = palavras[match.b + match.size:]
+        if palavras:
+            resultado.append(" ".join(palavras))
+    return " ".join(resultado)
+
+def transcrever_arquivo_em_partes(caminho, idioma="pt", max_workers=WORKERS_TRANSCRICAO, ao_concluir=None):
+    """
+    Divide o áudio em partes (cortes em silêncios), transcreve as partes em paralelo
+    e costura o resultado. `ao_concluir(indice, texto, total)` é chamado na thread de
+    quem chamou, conforme cada parte termina (para mostrar texto parcial na tela).
+    """
+    cortes = planejar_partes(caminho)
+    dir_partes = tempfile.mkdtemp(prefix="partes_")
+
+    def processar(indice, inicio, fim):
+        destino = os.path.join(dir_partes, f"parte_{indice:03d}.mp3")
+        try:
+            cortar_parte(caminho, inicio, fim, destino)
+            return whisper_groq_arquivo(destino, idioma)
+        finally:
+            if os.path.exists(destino): os.remove(destino)
 
+    textos = [None] * len(cortes)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futuros = {
+                pool.submit(tracing.propagar(processar), i, inicio, fim): i
+                for i, (inicio, fim) in enumerate(cortes)
+            }
+            for futuro in as_completed(futuros):
+                indice = futuros[futuro]
+                textos[indice] = futuro.result()
+                if ao_concluir:
+                    ao_concluir(indice, textos[indice], len(cortes))
+    finally:
+        shutil.rmtree(dir_partes, ignore_errors=True)
+    return costurar_transcricoes(textos)
+
+def transcrever_upload_em_partes(uploaded_file, ao_concluir=None):
+    """Versão para o st.file_uploader de transcrever_arquivo_em_partes (arquivos grandes)."""
+    if "groq" not in st.secrets:
+        st.error("Chave Groq não configurada.")
+        return None
+
+    # O ffmpeg precisa do arquivo em disco para pular direto em cada trecho
+    dir_temp = tempfile.mkdtemp(prefix="upload_")
+    caminho = os.path.join(dir_temp, os.path.basename(uploaded_file.name))
+    try:
+        with open(caminho, "wb") as f:
+            f.write(uploaded_file.getbuffer())
+        return transcrever_arquivo_em_partes(caminho, idioma="pt", ao_concluir=ao_concluir)
     except Exception as e:
         st.error(f"Erro na transcrição: {e}")
-        # Garante a limpeza mesmo se der erro
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        return None
\ No newline at end of file
+        return None
+    finally:
+        shutil.rmtree(dir_temp, ignore_errors=True)
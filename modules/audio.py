@@ -0,0 +1,209 @@
+# modules/audio.py
+"""
+Extração de áudio com ffmpeg.
+
+Em vez de decodificar o vídeo inteiro e re-encodar o áudio (MoviePy), copia a
+faixa de áudio como está (AAC do Instagram vira .m4a) e só transcodifica quando
+o codec não é aceito pelo Whisper.
+"""
+import os
+import re
+import shutil
+import subprocess
+
+from modules import tracing
+
+# Codecs aceitos pelo Whisper da Groq sem conversão -> extensão do arquivo de saída
+CONTAINER_POR_CODEC = {
+    "aac": ".m4a",
+    "mp3": ".mp3",
+    "opus": ".ogg",
+    "vorbis": ".ogg",
+    "flac": ".flac",
+}
+
+# Quando precisa transcodificar: mono, 16 kHz, 32 kbps (suficiente para fala)
+ARGS_TRANSCODE = ["-ac", "1", "-ar", "16000", "-c:a", "libmp3lame", "-b:a", "32k"]
+
+_ffmpeg = None
+
+
+def ffmpeg_exe():
+    """Binário do ffmpeg (o do imageio-ffmpeg, que já vem no requirements, ou o do PATH)."""
+    global _ffmpeg
+    if _ffmpeg is None:
+        try:
+            import imageio_ffmpeg
+            _ffmpeg = imageio_ffmpeg.get_ffmpeg_exe()
+        except Exception:
+            _ffmpeg = shutil.which("ffmpeg")
+        if not _ffmpeg:
+            raise RuntimeError("ffmpeg não encontrado")
+    return _ffmpeg
+
+
+@tracing.rastrear("ffmpeg:detectar_codec")
+def detectar_codec_audio(caminho):
+    """Lê o cabeçalho do arquivo e retorna o codec da faixa de áudio (ou None se não houver)."""
+    proc = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-i", caminho],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="ignore",
+    )
+    m = re.search(r"Stream #\S+.*?: Audio: (\w+)", proc.stderr)
+    return m.group(1).lower() if m else None
+
+
+def _rodar_ffmpeg(args):
+    proc = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y"] + args,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode(errors="ignore").strip()[-500:] or "ffmpeg falhou")
+
+
+def _args_corte(duracao_max):
+    return ["-t", f"{float(duracao_max):.2f}"] if duracao_max else []
+
+
+@tracing.rastrear("ffmpeg:extrair_audio")
+def extrair_audio(video_path, destino_base=None, duracao_max=None):
+    """
+    Extrai a faixa de áudio de `video_path` e retorna o caminho do arquivo gerado.
+    `destino_base` é o caminho sem extensão (padrão: o do vídeo).
+    `duracao_max` (segundos) corta o áudio no início (ex.: só o gancho).
+    """
+    destino_base = destino_base or os.path.splitext(video_path)[0]
+    corte = _args_corte(duracao_max)
+
+    codec = detectar_codec_audio(video_path)
+    if codec is None:
+        raise RuntimeError("Vídeo sem faixa de áudio")
+
+    extensao = CONTAINER_POR_CODEC.get(codec)
+    if extensao:
+        destino = destino_base + extensao
+        try:
+            # Stream copy: só remuxa, sem decodificar nada
+            _rodar_ffmpeg(["-i", video_path, "-vn", "-map", "0:a:0", "-c:a", "copy"] + corte + [destino])
+            return destino
+        except RuntimeError:
+            if os.path.exists(destino): os.remove(destino)
+
+    destino = destino_base + ".mp3"
+    _rodar_ffmpeg(["-i", video_path, "-vn", "-map", "0:a:0"] + ARGS_TRANSCODE + corte + [destino])
+    return destino
+
+
+@tracing.rastrear("ffmpeg:audio_do_stream")
+def extrair_audio_de_stream(chunks, destino_base, duracao_max=None):
+    """
+    Recebe os bytes do vídeo (iterável de chunks, ex.: r.iter_content) direto no stdin
+    do ffmpeg, sem gravar o mp4 em disco. Sempre gera mp3 mono 32k.
+    Com `duracao_max`, o ffmpeg para ao atingir o tempo e o resto do download é abandonado.
+
+    Só funciona com mp4 "faststart" (moov no início); se falhar, baixe para arquivo
+    e use extrair_audio().
+    """
+    destino = destino_base + ".mp3"
+    proc = subprocess.Popen(
+        [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", "-i", "pipe:0", "-vn", "-map", "0:a:0"]
+        + ARGS_TRANSCODE + _args_corte(duracao_max) + [destino],
+        stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        for chunk in chunks:
+            if chunk:
+                proc.stdin.write(chunk)
+    except BrokenPipeError:
+        pass  # ffmpeg encerrou antes; o erro aparece no stderr abaixo
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+    erro = proc.stderr.read().decode(errors="ignore")
+    if proc.wait() != 0 or not os.path.exists(destino) or os.path.getsize(destino) == 0:
+        if os.path.exists(destino): os.remove(destino)
+        raise RuntimeError(erro.strip()[-500:] or "ffmpeg falhou")
+    return destino
+
+
+@tracing.rastrear("ffmpeg:pcm")
+def pcm_mono(caminho, segundos, taxa=8000):
+    """Primeiros `segundos` do áudio decodificados em PCM 16-bit mono (bytes), para análise."""
+    proc = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-i", caminho, "-vn", "-t", f"{float(segundos):.2f}",
+         "-ac", "1", "-ar", str(taxa), "-f", "s16le", "pipe:1"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode(errors="ignore").strip()[-500:] or "ffmpeg falhou")
+    return proc.stdout
+
+
+# --- DIVISÃO EM PARTES (áudios longos / acima de 25 MB) ---
+
+@tracing.rastrear("ffmpeg:duracao")
+def duracao_audio(caminho):
+    """Duração em segundos, lida do cabeçalho pelo ffmpeg (ou None)."""
+    proc = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-i", caminho],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="ignore",
+    )
+    m = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", proc.stderr)
+    if not m:
+        return None
+    h, mi, se = m.groups()
+    return int(h) * 3600 + int(mi) * 60 + float(se)
+
+
+@tracing.rastrear("ffmpeg:silencios")
+def detectar_silencios(caminho, ruido_db=-35, min_silencio=0.4):
+    """Lista com o ponto médio (segundos) de cada trecho de silêncio do áudio."""
+    proc = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-nostats", "-i", caminho, "-vn",
+         "-af", f"silencedetect=noise={ruido_db}dB:d={min_silencio}", "-f", "null", "-"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors="ignore",
+    )
+    inicios = [float(x) for x in re.findall(r"silence_start: (-?\d+(?:\.\d+)?)", proc.stderr)]
+    fins = [float(x) for x in re.findall(r"silence_end: (\d+(?:\.\d+)?)", proc.stderr)]
+    return [(max(0.0, i) + f) / 2 for i, f in zip(inicios, fins)]
+
+
+def planejar_cortes(duracao, silencios, duracao_parte=600, janela=60, sobreposicao=4):
+    """
+    Define as partes [(inicio, fim), ...]. Cada corte cai no silêncio mais próximo
+    do alvo (dentro de `janela` segundos); sem silêncio por perto, as partes se
+    sobrepõem `sobreposicao` segundos para não perder palavras na emenda.
+    """
+    partes = []
+    inicio = 0.0
+    while duracao - inicio > duracao_parte + janela:
+        alvo = inicio + duracao_parte
+        candidatos = [s for s in silencios if abs(s - alvo) <= janela and s > inicio + janela]
+        if candidatos:
+            corte = min(candidatos, key=lambda s: abs(s - alvo))
+            partes.append((inicio, corte))
+            inicio = corte
+        else:
+            partes.append((inicio, alvo + sobreposicao))
+            inicio = alvo
+    partes.append((inicio, duracao))
+    return partes
+
+
+def planejar_partes(caminho, duracao_parte=600):
+    """Lê duração e silêncios do áudio e retorna os cortes [(inicio, fim), ...]."""
+    duracao = duracao_audio(caminho)
+    if not duracao:
+        raise RuntimeError("Não foi possível ler a duração do áudio")
+    return planejar_cortes(duracao, detectar_silencios(caminho), duracao_parte)
+
+
+@tracing.rastrear("ffmpeg:cortar_parte")
+def cortar_parte(caminho, inicio, fim, destino):
+    """Extrai o trecho [inicio, fim) como mp3 mono 32k (uma parte de 10 min fica ~2,4 MB)."""
+    _rodar_ffmpeg(["-ss", f"{inicio:.2f}", "-t", f"{fim - inicio:.2f}", "-i", caminho,
+                   "-vn", "-map", "0:a:0"] + ARGS_TRANSCODE + [destino])
+    return destino
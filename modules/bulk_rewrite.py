@@ -0,0 +1,266 @@
+# modules/bulk_rewrite.py
+"""
+Fábrica de Roteiros (Pag 02): reescreve em lote os vídeos de uma planilha,
+usando a estrutura de cada viral para um novo tema. Roda como job em segundo
+plano (ver modules/jobs.py).
+
+- Várias linhas ao mesmo tempo; quem segura o ritmo é o rate_limit da Groq.
+- Linhas que já têm roteiro são puladas.
+- A coluna de resultado é gravada em lotes (um batch_update por lote, linhas
+  vizinhas no mesmo range) em vez de uma chamada por célula.
+- Cada roteiro gerado passa antes pelo SQLite local: se o processo cair, o job
+  volta para a fila e grava primeiro o que já tinha sido gerado (se a linha,
+  o tema e o CTA ainda forem os mesmos).
+"""
+import hashlib
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from modules import jobs, clients, prompt_budget, rate_limit, local_store, tracing
+from modules.database import erro_de_cota
+from modules.prompts import PROMPT_REESCRITA_VIRAL
+
+TIPO_JOB = jobs.TIPO_REESCRITA_LOTE
+MODELO_LLAMA = "llama-3.3-70b-versatile"
+
+COLUNA_TRANSCRICAO = "Transcrição"
+COLUNA_GANCHO = "Gancho Verbal"
+COLUNA_RESULTADO = "Novo Roteiro Viral"
+
+MIN_CARACTERES = 50      # transcrições menores não valem a chamada
+ALVO_S, SAIDA = 6, 700   # orçamento do prompt (ver modules/prompt_budget.py)
+WORKERS = 4
+LOTE_ESCRITA = 20        # roteiros por batch_update
+MAX_SEGUNDOS_LOTE = 30   # ...ou a cada N segundos, o que vier primeiro
+TENTATIVAS = 5
+MAX_ULTIMOS = 20         # roteiros mostrados na página enquanto o job roda
+
+
+def gerar_roteiro_reescrito(transcricao, gancho, tema, cta):
+    """Novo roteiro sobre `tema` com o mesmo gatilho do viral. Exceções sobem (a linha não é gravada)."""
+    # Transcrição longa vira resumo extrativo (frases inteiras) dentro do orçamento
+    transcricao = prompt_budget.caber(
+        transcricao, MODELO_LLAMA, alvo_s=ALVO_S, saida=SAIDA, fixos=(PROMPT_REESCRITA_VIRAL, tema, cta, gancho),
+    )
+    prompt = PROMPT_REESCRITA_VIRAL.format(tema=tema, cta=cta, gancho=gancho, transcricao=transcricao)
+    completion = rate_limit.chat_groq(
+        clients.groq_client(),
+        model=MODELO_LLAMA,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.75,
+        max_tokens=1024
+    )
+    return completion.choices[0].message.content
+
+
+# --- PLANILHA ---
+
+def abrir_aba(nome_planilha):
+    """Primeira aba da planilha, com a coluna de resultado criada se ainda não existir."""
+    with tracing.span("sheets:conectar", planilha=nome_planilha):
+        sheet = clients.gspread_client().open(nome_planilha).sheet1
+        cabecalho = sheet.row_values(1)
+    if COLUNA_RESULTADO not in cabecalho:
+        sheet.update_cell(1, len(cabecalho) + 1, COLUNA_RESULTADO)
+    return sheet
+
+
+def _celula(linha, idx):
+    return linha[idx] if len(linha) > idx else ""
+
+
+def analisar_linhas(rows):
+    """
+    Retorna (coluna_resultado, pendentes, preenchidas).
+    coluna_resultado é 1-based; pendentes = [(num_linha, transcricao, gancho)] sem roteiro ainda.
+    """
+    cabecalho = rows[0] if rows else []
+    try:
+        idx_transcricao = cabecalho.index(COLUNA_TRANSCRICAO)
+        idx_gancho = cabecalho.index(COLUNA_GANCHO)
+    except ValueError:
+        raise RuntimeError(f"Colunas '{COLUNA_TRANSCRICAO}' ou '{COLUNA_GANCHO}' não encontradas.")
+    idx_resultado = cabecalho.index(COLUNA_RESULTADO) if COLUNA_RESULTADO in cabecalho else len(cabecalho)
+
+    pendentes, preenchidas = [], set()
+    for num, linha in enumerate(rows[1:], start=2):
+        if _celula(linha, idx_resultado):
+            preenchidas.add(num)
+            continue
+        transcricao = _celula(linha, idx_transcricao)
+        if len(transcricao) > MIN_CARACTERES:
+            pendentes.append((num, transcricao, _celula(linha, idx_gancho)))
+    return idx_resultado + 1, pendentes, preenchidas
+
+
+def _intervalos(textos, coluna):
+    """{linha: texto} -> ranges do batch_update (linhas consecutivas viram um range só)."""
+    from gspread.utils import rowcol_to_a1
+    dados, bloco = [], []
+    for linha in sorted(textos):
+        if bloco and linha != bloco[-1] + 1:
+            dados.append(bloco)
+            bloco = []
+        bloco.append(linha)
+    if bloco:
+        dados.append(bloco)
+    return [{
+        "range": f"{rowcol_to_a1(b[0], coluna)}:{rowcol_to_a1(b[-1], coluna)}",
+        "values": [[textos[linha]] for linha in b],
+    } for b in dados]
+
+
+class EscritorColuna:
+    """
+    Acumula {linha: texto} de uma coluna e grava com batch_update.
+    Descarrega ao atingir `max_linhas`, após `max_segundos` ou no fim do job.
+    Só o que foi confirmado pelo Sheets sai do checkpoint local.
+    """
+
+    def __init__(self, sheet, planilha, coluna, max_linhas=LOTE_ESCRITA, max_segundos=MAX_SEGUNDOS_LOTE):
+        self.sheet = sheet
+        self.planilha = planilha
+        self.coluna = coluna
+        self.max_linhas = max_linhas
+        self.max_segundos = max_segundos
+        self.gravadas = 0
+        self._pendentes = {}
+        self._primeira_pendente = None
+
+    def adicionar(self, linha, texto):
+        self._pendentes[linha] = texto
+        if self._primeira_pendente is None:
+            self._primeira_pendente = time.monotonic()
+        if (len(self._pendentes) >= self.max_linhas
+                or time.monotonic() - self._primeira_pendente >= self.max_segundos):
+            self.descarregar()
+
+    def descarregar(self):
+        if not self._pendentes:
+            return
+        lote = dict(self._pendentes)
+        self._batch_update_com_backoff(_intervalos(lote, self.coluna), len(lote))
+        local_store.apagar_reescritas(self.planilha, list(lote))
+        for linha in lote:
+            self._pendentes.pop(linha, None)
+        self._primeira_pendente = None
+        self.gravadas += len(lote)
+
+    def _batch_update_com_backoff(self, dados, linhas):
+        for tentativa in range(TENTATIVAS):
+            try:
+                with tracing.span("sheets:batch_update", ranges=len(dados), linhas=linhas):
+                    self.sheet.batch_update(dados, value_input_option="RAW")
+                return
+            except Exception as e:
+                if not erro_de_cota(e) or tentativa == TENTATIVAS - 1:
+                    raise
+                # Backoff exponencial com jitter (cota de escrita do Sheets é por minuto)
+                time.sleep(min(60, 2 ** tentativa) + random.uniform(0, 1))
+
+
+def assinatura_entrada(transcricao, gancho, tema, cta):
+    """Hash do que gerou o roteiro; o checkpoint só vale enquanto a entrada for a mesma."""
+    return hashlib.sha1(json.dumps([transcricao, gancho, tema, cta], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# --- JOB ---
+
+def executar_reescrita(params, job):
+    planilha = params["planilha"]
+    tema = params["tema"]
+    cta = params["cta"]
+    workers = max(1, int(params.get("workers", WORKERS)))
+
+    job.etapa("Conectando à planilha", 0.0)
+    sheet = abrir_aba(planilha)
+    with tracing.span("sheets:get_all_values"):
+        rows = sheet.get_all_values()
+    coluna, pendentes, preenchidas = analisar_linhas(rows)
+    escritor = EscritorColuna(sheet, planilha, coluna)
+
+    # Retomada: roteiros gerados antes de uma interrupção que não chegaram à planilha
+    # (linhas inseridas/apagadas ou tema/CTA trocados invalidam o roteiro salvo: é gerado de novo)
+    salvos = local_store.reescritas_pendentes(planilha)
+    retomados = {
+        num: salvos[num][0] for num, transcricao, gancho in pendentes
+        if num in salvos and salvos[num][1] == assinatura_entrada(transcricao, gancho, tema, cta)
+    }
+    local_store.apagar_reescritas(planilha, [linha for linha in salvos if linha not in retomados])
+    pendentes = [p for p in pendentes if p[0] not in retomados]
+
+    resultado = {
+        "total": max(len(rows) - 1, 0),
+        "ja_preenchidas": len(preenchidas),
+        "retomados": len(retomados),
+        "pendentes": len(pendentes),
+        "gerados": 0,
+        "gravados": 0,
+        "erros": [],
+        "ultimos": [],
+    }
+    job.info(f"📊 {resultado['total']} linhas: {len(preenchidas)} já têm roteiro, {len(pendentes)} para gerar.")
+    if retomados:
+        job.info(f"♻️ Retomando {len(retomados)} roteiro(s) já gerados em uma execução anterior.")
+    job.parcial(resultado)
+
+    try:
+        for num, texto in retomados.items():
+            escritor.adicionar(num, texto)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reescrita") as pool:
+            fila = iter(pendentes)
+            em_voo = {}
+
+            def enviar_proxima():
+                item = next(fila, None)
+                if item:
+                    num, transcricao, gancho = item
+                    futuro = pool.submit(tracing.propagar(gerar_roteiro_reescrito), transcricao, gancho, tema, cta)
+                    em_voo[futuro] = (num, assinatura_entrada(transcricao, gancho, tema, cta))
+
+            # Poucas chamadas à frente dos workers: cancelar não deixa centenas na fila
+            for _ in range(workers * 2):
+                enviar_proxima()
+
+            try:
+                while em_voo:
+                    prontos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        num, assinatura = em_voo.pop(futuro)
+                        try:
+                            texto = futuro.result()
+                        except Exception as e:
+                            resultado["erros"].append(f"Linha {num}: {e}")
+                            job.warning(f"Linha {num}: {e}")
+                        else:
+                            local_store.salvar_reescrita(planilha, num, texto, assinatura)
+                            escritor.adicionar(num, texto)
+                            resultado["gerados"] += 1
+                            resultado["ultimos"] = ([{"linha": num, "texto": texto}] + resultado["ultimos"])[:MAX_ULTIMOS]
+                        enviar_proxima()
+
+                    feitos = resultado["gerados"] + len(resultado["erros"])
+                    resultado["gravados"] = escritor.gravadas
+                    job.etapa(f"{feitos} de {len(pendentes)} roteiros", feitos / max(len(pendentes), 1))
+                    job.parcial(resultado)
+                    job.verificar_cancelamento()
+            finally:
+                for futuro in em_voo:
+                    futuro.cancel()
+    finally:
+        # O que não for gravado agora continua no checkpoint para a próxima execução
+        job.etapa("Gravando na planilha", 1.0)
+        try:
+            escritor.descarregar()
+        except Exception as e:
+            resultado["erros"].append(f"Gravação na planilha: {e}")
+        resultado["gravados"] = escritor.gravadas
+        job.parcial(resultado)
+
+    return resultado
+
+
+jobs.registrar_tipo(TIPO_JOB, executar_reescrita)
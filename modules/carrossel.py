@@ -0,0 +1,166 @@
+# modules/carrossel.py
+"""
+Extração do conteúdo base + tempestade de ideias do Gerador de Carrosséis (Pag 04)
+como job em segundo plano (ver modules/jobs.py).
+
+O Arquiteto (roteiro slide a slide) continua na página, em streaming.
+"""
+import os
+
+from modules import jobs
+from modules.database import conectar_sheets, verificar_existencia_db, salvar_no_db, obter_buffer_escrita
+from modules.instagram import get_instagram_data_apify, baixar_audio_video
+from modules.ai_processor import agente_tempestade_ideias, transcrever_audio_groq
+from modules.youtube_utils import pegar_dados_youtube_apify
+
+TIPO_JOB = jobs.TIPO_CARROSSEL_EXTRACAO
+
+
+def aba_do_tipo(tipo_conteudo):
+    """Nome da aba do banco para cada origem."""
+    if tipo_conteudo == "YouTube":
+        return "Youtube"
+    if tipo_conteudo == "Carrossel (Instagram)":
+        return "carrossel"
+    return "instagram"  # Reels
+
+
+def texto_do_carrossel(data):
+    """A Groq não vê imagem, então montamos um "Roteiro de Leitura" com legenda + alt text dos slides."""
+    txt_final = f"=== LEGENDA DO POST ===\n{data.get('caption', '')}\n\n"
+    txt_final += "=== CONTEÚDO DOS SLIDES (TEXTO ALTERNATIVO/OCR) ===\n"
+
+    slides = data.get('childPosts', [])
+    if not slides:
+        # As vezes o carrossel vem sem childPosts se for imagem única ou erro
+        alt = data.get('alt') or "Imagem única sem descrição."
+        txt_final += f"Slide Único: {alt}"
+    else:
+        for i, slide in enumerate(slides):
+            texto_slide = slide.get('alt') or slide.get('description') or slide.get('accessibilityCaption')
+            if not texto_slide:
+                texto_slide = "[Imagem sem texto detectado pela API]"
+            txt_final += f"SLIDE {i+1}: {texto_slide}\n"
+    return txt_final
+
+
+def _extrair(tipo_conteudo, url, job):
+    """Retorna (texto_extraido, dados_para_salvar) de um link novo."""
+    texto_extraido = ""
+    dados_para_salvar = {}
+
+    # --- YOUTUBE ---
+    if tipo_conteudo == "YouTube":
+        yt_data = pegar_dados_youtube_apify(url, job)
+        if yt_data and yt_data.get('sucesso'):
+            texto_extraido = yt_data.get('transcricao', '')
+            dados_para_salvar = {
+                "id_unico": yt_data.get('id_unico'),
+                "perfil": yt_data.get('canal'),
+                "data_postagem": yt_data.get('data_post'),
+                "url": url,
+                "views": yt_data.get('views'),
+                "likes": yt_data.get('likes'),
+                "comments": 0,
+                "caption": yt_data.get('description', '')
+            }
+        else:
+            job.error("Não foi possível extrair dados.")
+
+    # --- REELS (INSTAGRAM) ---
+    elif tipo_conteudo == "Reels (Instagram)":
+        job.write("🕵️ Acessando Apify (Instagram)...")
+        data = get_instagram_data_apify(url, job)
+        if data:
+            dados_para_salvar = {
+                "id_unico": data.get('id', ''),
+                "perfil": data.get('ownerUsername', ''),
+                "data_postagem": data.get('timestamp', '')[:10],
+                "url": url,
+                "views": data.get('videoViewCount') or data.get('playCount', 0),
+                "likes": data.get('likesCount', 0),
+                "comments": data.get('commentsCount', 0),
+                "caption": data.get('caption', '')
+            }
+            v_url = data.get('videoUrl') or data.get('video_url')
+            if v_url:
+                audio_path = None
+                try:
+                    # Download vai direto para o ffmpeg: só o áudio chega ao disco
+                    audio_path = baixar_audio_video(v_url, os.path.join(job.dir_temp, "audio"), container_log=job)
+                    job.write("👂 Transcrevendo áudio...")
+                    texto_extraido = transcrever_audio_groq(audio_path, job)
+                except Exception as e:
+                    job.error(f"Erro áudio: {e}")
+                finally:
+                    if audio_path and os.path.exists(audio_path): os.remove(audio_path)
+
+    # --- CARROSSEL (INSTAGRAM) ---
+    elif tipo_conteudo == "Carrossel (Instagram)":
+        job.write("🕵️ Lendo Carrossel (Apify)...")
+        data = get_instagram_data_apify(url, job)
+        if data:
+            dados_para_salvar = {
+                "id_unico": data.get('id', ''),
+                "perfil": data.get('ownerUsername', ''),
+                "data_postagem": data.get('timestamp', '')[:10],
+                "url": url,
+                "views": data.get('viewCount') or data.get('playCount', 0), # As vezes vem viewCount em posts
+                "likes": data.get('likesCount', 0),
+                "comments": data.get('commentsCount', 0),
+                "caption": data.get('caption', '')
+            }
+            job.write("📑 Extraindo textos dos slides...")
+            texto_extraido = texto_do_carrossel(data)
+
+    return texto_extraido, dados_para_salvar
+
+
+def executar_extracao(params, job):
+    tipo_conteudo = params["tipo_conteudo"]
+    url = params["url"]
+    foco = params["foco"]
+    aba_alvo = aba_do_tipo(tipo_conteudo)
+
+    # 1. CONEXÃO COM BANCO DE DADOS
+    job.etapa("Conectando ao banco de dados", 0.05)
+    gs_client = conectar_sheets(job)
+    buffer = obter_buffer_escrita()
+
+    # 2. VERIFICA SE JÁ EXISTE NO BANCO
+    texto_extraido = None
+    if gs_client:
+        job.write(f"🔎 Verificando DB: '{aba_alvo}'...")
+        texto_extraido = verificar_existencia_db(gs_client, aba_alvo, url, buffer, job)
+
+    if texto_extraido:
+        job.write("✅ Encontrado no Banco de Dados!")
+    else:
+        job.write("⚠️ Novo link. Iniciando extração...")
+        job.etapa("Extraindo conteúdo", 0.2)
+        texto_extraido, dados_para_salvar = _extrair(tipo_conteudo, url, job)
+        job.verificar_cancelamento()
+
+        # 3. SALVAR NO BANCO
+        if texto_extraido and gs_client:
+            dados_para_salvar["transcricao"] = texto_extraido
+            # Reels tem gancho, Carrossel não necessariamente (salva direto na col Transcricao_Carrossel)
+            if aba_alvo == "instagram":
+                dados_para_salvar["gancho_verbal"] = texto_extraido[:100] + "..."
+            job.write("💾 Salvando na Planilha...")
+            salvar_no_db(gs_client, aba_alvo, dados_para_salvar, buffer, job)
+
+    if not texto_extraido:
+        raise RuntimeError("Falha na extração ou texto vazio")
+
+    # 4. GERAÇÃO DAS IDEIAS (IA)
+    job.etapa("Gerando conceitos", 0.7)
+    job.write(f"🧠 Gerando conceitos (Modo: {foco})...")
+    ideias = agente_tempestade_ideias(texto_extraido, modo=foco, container_log=job)
+    if not ideias:
+        raise RuntimeError("Erro na IA (JSON)")
+
+    return {"conteudo_base": texto_extraido, "ideias": ideias, "url": url, "foco": foco}
+
+
+jobs.registrar_tipo(TIPO_JOB, executar_extracao)
@@ -0,0 +1,163 @@
+# modules/clients.py
+"""
+Registro único de clientes de API (Groq, Apify, Google Sheets, Gemini), da
+sessão HTTP dos downloads de mídia e do yt-dlp.
+
+Os clientes são criados sob demanda na primeira chamada e reaproveitados por
+todas as sessões do Streamlit (o módulo vive enquanto o processo viver), então
+conexões HTTP keep-alive e tokens OAuth não são refeitos a cada clique.
+"""
+import threading
+import time
+
+import streamlit as st
+
+SCOPE_SHEETS = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+NOME_PLANILHA = "DB_E21_Conteudos"
+
+_lock = threading.RLock()
+_clientes = {}   # nome -> (cliente, criado_em)
+_fabricas = {}   # nome -> (fabrica, ttl em segundos ou None)
+
+
+def registrar_fabrica(nome, fabrica, ttl=None):
+    """Define (ou substitui) como o cliente `nome` é criado. Limpa a instância atual."""
+    with _lock:
+        _fabricas[nome] = (fabrica, ttl)
+        _clientes.pop(nome, None)
+
+
+def obter_cliente(nome):
+    """Retorna o cliente `nome`, criando na primeira vez ou quando o TTL expirar."""
+    with _lock:
+        fabrica, ttl = _fabricas[nome]
+        atual = _clientes.get(nome)
+        if atual is not None:
+            cliente, criado_em = atual
+            if ttl is None or time.monotonic() - criado_em < ttl:
+                return cliente
+            _fechar(cliente)
+        cliente = fabrica()
+        _clientes[nome] = (cliente, time.monotonic())
+        return cliente
+
+
+def invalidar_cliente(nome):
+    """Descarta o cliente (ex.: credencial revogada/expirada). O próximo uso recria."""
+    with _lock:
+        if nome == "gspread":
+            _planilha.update(gc=None, sh=None)
+        atual = _clientes.pop(nome, None)
+        if atual is not None:
+            _fechar(atual[0])
+
+
+def _fechar(cliente):
+    try:
+        fechar = getattr(cliente, "close", None)
+        if callable(fechar):
+            fechar()
+    except Exception:
+        pass
+
+
+# --- FÁBRICAS ---
+
+def _criar_groq():
+    import httpx
+    from groq import Groq
+    # Pool keep-alive compartilhado: evita handshake TLS a cada chamada
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=120),
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+    return Groq(api_key=st.secrets["groq"]["api_key"], http_client=http_client)
+
+
+def _criar_apify():
+    from apify_client import ApifyClient
+    return ApifyClient(st.secrets["apify_token"])
+
+
+def _criar_gspread():
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+    creds_dict = dict(st.secrets["gcp_service_account"])
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE_SHEETS)
+    return gspread.authorize(creds)
+
+
+def _criar_gemini():
+    import google.generativeai as genai
+    api_key = st.secrets["gemini"].get("api_marcio") or st.secrets["gemini"].get("api_key")
+    if not api_key:
+        raise KeyError("Chave Gemini não encontrada no secrets.")
+    genai.configure(api_key=api_key)
+    return genai
+
+
+def _criar_sessao_http():
+    import requests
+    from requests.adapters import HTTPAdapter
+    # Pool por host maior que o limite de downloads simultâneos (modules/downloader.py)
+    sessao = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+    sessao.mount("https://", adaptador)
+    sessao.mount("http://", adaptador)
+    return sessao
+
+
+def _criar_ytdlp():
+    import yt_dlp
+    return yt_dlp
+
+
+registrar_fabrica("groq", _criar_groq)
+registrar_fabrica("apify", _criar_apify)
+# Token OAuth da service account dura 1h: recria antes de expirar
+registrar_fabrica("gspread", _criar_gspread, ttl=45 * 60)
+registrar_fabrica("gemini", _criar_gemini)
+registrar_fabrica("http", _criar_sessao_http)
+registrar_fabrica("ytdlp", _criar_ytdlp)
+
+
+# --- ATALHOS ---
+
+def groq_client():
+    return obter_cliente("groq")
+
+
+def apify_client():
+    return obter_cliente("apify")
+
+
+def sessao_http():
+    return obter_cliente("http")
+
+
+def ytdlp():
+    """Módulo yt_dlp (ImportError se não estiver instalado)."""
+    return obter_cliente("ytdlp")
+
+
+def gspread_client():
+    return obter_cliente("gspread")
+
+
+_planilha = {"gc": None, "sh": None}
+
+
+def planilha_db():
+    """Spreadsheet DB_E21_Conteudos já aberta (evita a busca no Drive a cada clique)."""
+    gc = gspread_client()
+    with _lock:
+        # Reabre só se o cliente gspread foi recriado (credencial renovada)
+        if _planilha["gc"] is not gc:
+            _planilha["sh"] = gc.open(NOME_PLANILHA)
+            _planilha["gc"] = gc
+        return _planilha["sh"]
+
+
+def gemini():
+    """Módulo google.generativeai já configurado com a chave do secrets."""
+    return obter_cliente("gemini")
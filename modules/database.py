@@ -1,55 +1,230 @@
 import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import atexit
+import random
+import threading
+import time
+import weakref
 from datetime import datetime
+from modules import clients, local_store, tracing
 
-def conectar_sheets():
-    """Conecta e retorna a ABA PADRÃO para compatibilidade, mas permite acesso global."""
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+@tracing.rastrear("sheets:conectar")
+def conectar_sheets(container_log=st):
+    """
+    Conecta e retorna a ABA PADRÃO para compatibilidade, mas permite acesso global.
+    `container_log` recebe os erros (st na página, o ContextoJob num job).
+    """
+    import gspread  # pesado (google-auth/requests): só quando a página realmente usa o banco
     try:
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, scope)
-        client = gspread.authorize(creds)
-        
-        # Tenta abrir a aba instagram padrão só para retornar um objeto válido
-        # Mas o importante é o objeto 'client' ou 'spreadsheet'
+        # Cliente gspread autorizado uma vez por processo (renovado antes do token expirar)
+        clients.gspread_client()
+    except Exception as e:
+        container_log.error(f"Erro credenciais: {e}")
+        return None
+
+    # Tenta abrir a aba instagram padrão só para retornar um objeto válido
+    # Mas o importante é o objeto 'client' ou 'spreadsheet'
+    try:
+        sh = clients.planilha_db()
         try:
-            sh = client.open("DB_E21_Conteudos")
-            try:
-                sheet = sh.worksheet("instagram")
-            except:
-                sheet = sh.add_worksheet(title="instagram", rows="1000", cols="20")
-            return sheet
-        except Exception as e:
-            st.error(f"Erro ao abrir planilha: {e}")
-            return None
+            sheet = sh.worksheet("instagram")
+        except gspread.exceptions.WorksheetNotFound:
+            sheet = sh.add_worksheet(title="instagram", rows="1000", cols="20")
+        return sheet
     except Exception as e:
-        st.error(f"Erro credenciais: {e}")
+        # Credencial pode ter sido revogada/expirada: força reautenticação na próxima vez
+        clients.invalidar_cliente("gspread")
+        container_log.error(f"Erro ao abrir planilha: {e}")
         return None
 
-def carregar_ids_existentes(sheet):
-    """Lê IDs da aba fornecida."""
+# --- BUFFER DE ESCRITA (WRITE-BEHIND) ---
+
+_BUFFERS_VIVOS = weakref.WeakSet()
+
+def erro_de_cota(e):
+    """True se a exceção do gspread for de limite de requisições (HTTP 429). Decide pelo status, nunca pelo texto."""
+    import gspread
+    resposta = getattr(e, "response", None)
+    if getattr(resposta, "status_code", None) == 429:
+        return True
+    return isinstance(e, gspread.exceptions.APIError) and getattr(e, "code", None) == 429
+
+class BufferEscrita:
+    """
+    Acumula linhas por aba e envia tudo de uma vez com append_rows.
+    Descarrega ao atingir `max_linhas`, após `max_segundos` ou no fim da execução.
+    """
+
+    def __init__(self, max_linhas=20, max_segundos=30, tentativas=5):
+        self.max_linhas = max_linhas
+        self.max_segundos = max_segundos
+        self.tentativas = tentativas
+        self._abas = {}      # titulo -> worksheet
+        self._linhas = {}    # titulo -> [linhas pendentes]
+        self._em_envio = {}  # titulo -> [linhas sendo enviadas agora]
+        self._falhas = []    # erros permanentes (linhas descartadas) ainda não devolvidos por descarregar()
+        self._lock = threading.RLock()
+        self._lock_envio = threading.Lock()
+        self._primeira_pendente = None
+        self._timer = None
+        _BUFFERS_VIVOS.add(self)
+
+    def adicionar(self, worksheet, linha):
+        """Enfileira uma linha. Pode disparar o envio se o limite de tamanho for atingido."""
+        with self._lock:
+            titulo = worksheet.title
+            self._abas[titulo] = worksheet
+            self._linhas.setdefault(titulo, []).append(linha)
+            if self._primeira_pendente is None:
+                self._primeira_pendente = time.monotonic()
+            total = sum(len(l) for l in self._linhas.values())
+        self._iniciar_timer()
+        if total >= self.max_linhas:
+            self.descarregar()
+
+    def pendentes(self, titulo):
+        """Linhas ainda não confirmadas pelo Sheets para a aba `titulo`."""
+        with self._lock:
+            return list(self._em_envio.get(titulo, [])) + list(self._linhas.get(titulo, []))
+
+    def ids_pendentes(self, titulo):
+        return {str(linha[0]) for linha in self.pendentes(titulo) if linha}
+
+    def descarregar(self):
+        """
+        Envia todas as linhas pendentes. Retorna a lista de erros (vazia = sucesso),
+        incluindo os de envios anteriores feitos pelo timer.
+        Só cota estourada volta para a fila; erro permanente (400, aba apagada) descarta as linhas.
+        """
+        erros = []
+        with self._lock_envio:
+            with self._lock:
+                self._em_envio, self._linhas = self._linhas, {}
+                self._primeira_pendente = None
+                lote = dict(self._em_envio)
+
+            for titulo, linhas in lote.items():
+                try:
+                    self._append_com_backoff(self._abas[titulo], linhas)
+                except Exception as e:
+                    with self._lock:
+                        if erro_de_cota(e):
+                            erros.append(f"{titulo}: {e}")
+                            # Devolve para a frente da fila, preservando a ordem
+                            self._linhas[titulo] = linhas + self._linhas.get(titulo, [])
+                        else:
+                            # Reenviar não resolve: descarta e guarda o erro para quem chamar descarregar()
+                            self._falhas.append(f"{titulo}: {len(linhas)} linha(s) não salva(s): {e}")
+                finally:
+                    with self._lock:
+                        self._em_envio.pop(titulo, None)
+
+            with self._lock:
+                sobrou = bool(self._linhas)
+                if sobrou and self._primeira_pendente is None:
+                    self._primeira_pendente = time.monotonic()
+                erros, self._falhas = erros + self._falhas, []
+        if sobrou:
+            self._iniciar_timer()
+        return erros
+
+    def _append_com_backoff(self, worksheet, linhas):
+        for tentativa in range(self.tentativas):
+            try:
+                with tracing.span("sheets:append_rows", aba=worksheet.title, linhas=len(linhas)):
+                    worksheet.append_rows(linhas, value_input_option="RAW")
+                _espelhar_local(worksheet.title, linhas)
+                return
+            except Exception as e:
+                if not erro_de_cota(e) or tentativa == self.tentativas - 1:
+                    raise
+                # Backoff exponencial com jitter (cota de escrita do Sheets é por minuto)
+                time.sleep(min(60, 2 ** tentativa) + random.uniform(0, 1))
+
+    def _iniciar_timer(self):
+        """Thread leve que descarrega o buffer quando o limite de tempo estoura."""
+        with self._lock:
+            if self._timer and self._timer.is_alive(): return
+            self._timer = threading.Thread(target=self._loop_timer, daemon=True)
+            self._timer.start()
+
+    def _loop_timer(self):
+        while True:
+            time.sleep(1)
+            with self._lock:
+                if self._primeira_pendente is None:
+                    self._timer = None
+                    return
+                vencido = time.monotonic() - self._primeira_pendente >= self.max_segundos
+            if vencido:
+                self.descarregar()
+
+def _espelhar_local(aba, linhas):
+    """Registra no SQLite as linhas recém-enviadas (falha aqui não invalida o envio)."""
     try:
-        ids = sheet.col_values(1)
+        local_store.registrar_linhas(aba, linhas)
+    except Exception:
+        pass
+
+@atexit.register
+def _descarregar_todos():
+    """Garante que nada fique no buffer quando o processo encerrar."""
+    for buffer in list(_BUFFERS_VIVOS):
+        try:
+            buffer.descarregar()
+        except Exception:
+            pass
+
+_buffer_global = None
+_buffer_global_lock = threading.Lock()
+
+def obter_buffer_escrita():
+    """Buffer compartilhado pelo processo inteiro (todas as sessões/páginas)."""
+    global _buffer_global
+    with _buffer_global_lock:
+        if _buffer_global is None:
+            _buffer_global = BufferEscrita()
+        return _buffer_global
+
+def carregar_ids_existentes(sheet, buffer=None):
+    """Lê IDs da aba fornecida (inclui os que ainda estão no buffer)."""
+    pendentes = buffer.ids_pendentes(sheet.title) if buffer else set()
+    try:
+        # Réplica local: só baixa as linhas novas desde a última sincronização
+        local_store.sincronizar_aba(sheet)
+        return local_store.ids_da_aba(sheet.title) | pendentes
+    except Exception:
+        pass
+    try:
+        with tracing.span("sheets:col_values"):
+            ids = sheet.col_values(1)
         if ids and ids[0] == "ID_Unico":
-            return set(ids[1:])
-        return set(ids)
+            return set(ids[1:]) | pendentes
+        return set(ids) | pendentes
     except Exception as e:
-        return set()
+        return pendentes
 
-def salvar_linha_instagram(sheet, dados):
-    """Salva linha direta (usado na página 01)."""
+def salvar_linha_instagram(sheet, dados, buffer=None, container_log=st):
+    """Salva linha direta (usado na página 01). Com `buffer`, só enfileira."""
     try:
-        sheet.append_row(dados)
+        if buffer is not None:
+            buffer.adicionar(sheet, dados)
+        else:
+            sheet.append_row(dados)
+            _espelhar_local(sheet.title, [dados])
         return True
     except Exception as e:
-        st.error(f"Erro ao salvar: {e}")
+        container_log.error(f"Erro ao salvar: {e}")
         return False
 
 # --- FUNÇÕES CORRIGIDAS PARA O GERADOR DE CARROSSEL (PÁGINA 04) ---
 
-def verificar_existencia_db(sheet_obj, aba_nome, url_input):
-    """Verifica se URL existe na aba específica."""
+def verificar_existencia_db(sheet_obj, aba_nome, url_input, buffer=None, container_log=st):
+    """Verifica se URL existe na aba específica (inclusive no buffer ainda não enviado)."""
+    import gspread
+    if buffer is not None:
+        for row_values in buffer.pendentes(aba_nome):
+            if len(row_values) >= 9 and row_values[4] == url_input:
+                return row_values[8]
     try:
         spreadsheet = sheet_obj.spreadsheet
         
@@ -72,9 +247,20 @@ def verificar_existencia_db(sheet_obj, aba_nome, url_input):
             
             worksheet.append_row(header)
         
-        # 2. Busca URL
+        # 2. Busca URL na réplica local (índice por URL, sem varrer a aba pela rede)
+        try:
+            local_store.sincronizar_aba(worksheet)
+            row_values = local_store.buscar_por_url(aba_nome, url_input)
+            if row_values and len(row_values) >= 9:
+                return row_values[8]
+            return None
+        except Exception:
+            pass
+
+        # Fallback: busca direto na planilha
         try:
-            cell = worksheet.find(url_input)
+            with tracing.span("sheets:find"):
+                cell = worksheet.find(url_input)
             if cell:
                 row_values = worksheet.row_values(cell.row)
                 # Retorna a transcrição (Coluna I = índice 8)
@@ -85,11 +271,27 @@ def verificar_existencia_db(sheet_obj, aba_nome, url_input):
             
         return None
     except Exception as e:
-        if "attribute" in str(e): st.error(f"Erro DB: {e}")
+        if "attribute" in str(e): container_log.error(f"Erro DB: {e}")
         return None
 
-def salvar_no_db(sheet_obj, aba_nome, dados):
-    """Salva nova linha na aba específica."""
+def atualizar_transcricao(sheet_obj, aba_nome, id_unico, texto):
+    """Troca a transcrição (Coluna I) da linha com esse ID. Retorna False se a linha não existe."""
+    import gspread
+    worksheet = sheet_obj.spreadsheet.worksheet(aba_nome)
+    try:
+        with tracing.span("sheets:find"):
+            cell = worksheet.find(str(id_unico), in_column=1)
+    except gspread.exceptions.CellNotFound:
+        return False
+    if not cell:
+        return False
+    with tracing.span("sheets:update_cell"):
+        worksheet.update_cell(cell.row, local_store.COL_TRANSCRICAO + 1, texto)
+    local_store.atualizar_celula(aba_nome, id_unico, local_store.COL_TRANSCRICAO, texto)
+    return True
+
+def salvar_no_db(sheet_obj, aba_nome, dados, buffer=None, container_log=st):
+    """Salva nova linha na aba específica. Com `buffer`, só enfileira."""
     try:
         spreadsheet = sheet_obj.spreadsheet
         worksheet = spreadsheet.worksheet(aba_nome)
@@ -120,8 +322,12 @@ def salvar_no_db(sheet_obj, aba_nome, dados):
                 safe_int("comments"), safe_str("transcricao"), legenda_limpa
             ]
             
-        worksheet.append_row(row)
+        if buffer is not None:
+            buffer.adicionar(worksheet, row)
+        else:
+            worksheet.append_row(row)
+            _espelhar_local(aba_nome, [row])
         return True
     except Exception as e:
-        st.error(f"Erro ao salvar no BD: {e}")
+        container_log.error(f"Erro ao salvar no BD: {e}")
         return False
\ No newline at end of file
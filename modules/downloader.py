@@ -0,0 +1,166 @@
+# modules/downloader.py
+"""
+Downloads de mídia (vídeos do Instagram, áudio do Cobalt) por um caminho só:
+
+- sessão HTTP compartilhada (clients.sessao_http), com keep-alive entre downloads
+- arquivo parcial (.part) retomado com HTTP Range em vez de recomeçar do zero
+- chunks que crescem/encolhem conforme a vazão (64 KB a 4 MB)
+- backoff exponencial com jitter entre tentativas
+- limite de downloads simultâneos por host (a CDN do Instagram corta rajadas)
+- vazão (bytes/s) de cada download no span "download:*" e no retorno
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from modules import clients, tracing
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+TIMEOUT = (10, 60)          # (conexão, leitura) em segundos
+TENTATIVAS = 4
+ESPERA_BASE = 1.0           # backoff: ~1s, 2s, 4s... (com jitter)
+ESPERA_MAX = 30
+MAX_POR_HOST = 4
+CHUNK_MIN = 64 * 1024
+CHUNK_MAX = 4 * 1024 * 1024
+ALVO_S_CHUNK = 0.25         # cada leitura deve levar ~250 ms
+STATUS_REPETIVEIS = {408, 425, 429, 500, 502, 503, 504}
+
+_lock = threading.Lock()
+_vagas = {}  # host -> BoundedSemaphore
+
+
+class ErroDownload(Exception):
+    def __init__(self, mensagem, status=None):
+        super().__init__(mensagem)
+        self.status = status
+
+
+@contextmanager
+def _vaga_no_host(url):
+    host = urlparse(url).netloc
+    with _lock:
+        vaga = _vagas.setdefault(host, threading.BoundedSemaphore(MAX_POR_HOST))
+    with tracing.span("download:fila_host", host=host):
+        vaga.acquire()
+    try:
+        yield
+    finally:
+        vaga.release()
+
+
+def _cabecalhos(headers):
+    # identity: o Range conta bytes do arquivo, não do corpo comprimido
+    return {"User-Agent": USER_AGENT, "Accept-Encoding": "identity", **(headers or {})}
+
+
+def _espera(tentativa):
+    return min(ESPERA_MAX, ESPERA_BASE * 2 ** tentativa) * random.uniform(0.5, 1.5)
+
+
+def pedacos(resposta, tamanho=CHUNK_MIN):
+    """Lê o corpo em chunks adaptativos: dobra se a leitura foi rápida, divide se foi lenta."""
+    while True:
+        inicio = time.perf_counter()
+        bloco = resposta.raw.read(tamanho, decode_content=True)
+        if not bloco:
+            return
+        yield bloco
+        duracao = time.perf_counter() - inicio
+        if duracao < ALVO_S_CHUNK / 2 and tamanho < CHUNK_MAX:
+            tamanho *= 2
+        elif duracao > ALVO_S_CHUNK * 2 and tamanho > CHUNK_MIN:
+            tamanho //= 2
+
+
+@contextmanager
+def stream(url, headers=None, timeout=TIMEOUT):
+    """Resposta aberta em streaming (ex.: direto para o ffmpeg), respeitando o limite por host."""
+    with _vaga_no_host(url):
+        resposta = clients.sessao_http().get(url, headers=_cabecalhos(headers), stream=True, timeout=timeout)
+        try:
+            if resposta.status_code >= 400:
+                raise ErroDownload(f"HTTP {resposta.status_code}", resposta.status_code)
+            yield resposta
+        finally:
+            resposta.close()
+
+
+def _total_do_content_range(valor):
+    """'bytes 100-199/5000' -> 5000 (None se desconhecido)."""
+    total = (valor or "").rsplit("/", 1)[-1]
+    return int(total) if total.isdigit() else None
+
+
+def _uma_tentativa(url, parcial, headers, timeout):
+    """Baixa (ou continua) `parcial`. Retorna (bytes recebidos agora, retomou?)."""
+    ja_tenho = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+    cabecalhos = _cabecalhos(headers)
+    if ja_tenho:
+        cabecalhos["Range"] = f"bytes={ja_tenho}-"
+
+    with _vaga_no_host(url):
+        with clients.sessao_http().get(url, headers=cabecalhos, stream=True, timeout=timeout) as r:
+            if r.status_code == 416 and ja_tenho:
+                # Pedimos além do fim: o parcial já é o arquivo inteiro?
+                if _total_do_content_range(r.headers.get("Content-Range")) == ja_tenho:
+                    return 0, True
+                os.remove(parcial)
+                raise ErroDownload("Range inválido, recomeçando", 416)
+            if r.status_code >= 400:
+                raise ErroDownload(f"HTTP {r.status_code}", r.status_code)
+
+            retomou = r.status_code == 206
+            esperado = r.headers.get("Content-Length")
+            # 200 com Range = servidor ignorou o pedido: recomeça o arquivo
+            with open(parcial, "ab" if retomou else "wb") as f:
+                recebidos = 0
+                for bloco in pedacos(r):
+                    f.write(bloco)
+                    recebidos += len(bloco)
+            if esperado and esperado.isdigit() and recebidos < int(esperado):
+                raise ErroDownload(f"Conexão caiu com {recebidos} de {esperado} bytes")
+            return recebidos, retomou
+
+
+def baixar(url, destino, headers=None, tentativas=TENTATIVAS, timeout=TIMEOUT):
+    """
+    Baixa `url` em `destino`. Retorna {"bytes", "segundos", "bytes_s", "tentativas", "retomado"}.
+    Levanta ErroDownload se todas as tentativas falharem.
+    """
+    parcial = destino + ".part"
+    inicio = time.perf_counter()
+    recebidos, retomado = 0, False
+    with tracing.span("download:http", host=urlparse(url).netloc) as registro:
+        for tentativa in range(tentativas):
+            try:
+                novos, retomou = _uma_tentativa(url, parcial, headers, timeout)
+                recebidos += novos
+                retomado = retomado or retomou
+                break
+            except Exception as e:
+                status = getattr(e, "status", None)
+                # 403/404 (link expirado, removido) não melhoram tentando de novo
+                if tentativa == tentativas - 1 or (status and status not in STATUS_REPETIVEIS and status != 416):
+                    if os.path.exists(parcial) and status and status != 416:
+                        os.remove(parcial)
+                    if isinstance(e, ErroDownload):
+                        raise
+                    raise ErroDownload(str(e)) from e
+                time.sleep(_espera(tentativa))
+        os.replace(parcial, destino)
+
+        segundos = time.perf_counter() - inicio
+        resultado = {
+            "bytes": os.path.getsize(destino),
+            "segundos": segundos,
+            "bytes_s": recebidos / segundos if segundos else 0.0,
+            "tentativas": tentativa + 1,
+            "retomado": retomado,
+        }
+        if registro is not None:
+            registro["atributos"].update(bytes=resultado["bytes"], bytes_s=round(resultado["bytes_s"]))
+    return resultado
@@ -1,127 +1,325 @@
 # modules/instagram.py
 import streamlit as st
+import math
 import time
-import requests
-from apify_client import ApifyClient
+import threading
+from modules import clients, downloader, local_store, tracing
 from datetime import datetime, timedelta, timezone
-from moviepy.editor import VideoFileClip
+from modules.audio import extrair_audio, extrair_audio_de_stream
 import os
 
-def pegar_dados_apify(perfil, dias, container_log):
-    if "apify_token" not in st.secrets:
-        st.error("Token da Apify não configurado.")
-        return []
+LIMITE_POSTS_POR_PERFIL = 30
+LIMITE_MINIMO_INCREMENTAL = 3
+DIAS_CACHE_POSTS = 180  # mínimo: se pedirem mais dias na página, o cache guarda a janela pedida
+INTERVALO_LEITURA_DATASET = 2.0  # segundos entre leituras do dataset enquanto o run do lote roda
+STATUS_FINAIS_APIFY = {"SUCCEEDED", "FAILED", "ABORTED", "TIMED-OUT"}
 
-    client = ApifyClient(st.secrets["apify_token"])
-    items_coletados = []
-    
+def data_do_post(item):
+    """Converte o 'timestamp' do item da Apify em datetime UTC (ou None)."""
+    ts_str = item.get('timestamp')
+    if not ts_str: return None
+    try:
+        if ts_str.endswith('Z'):
+            return datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
+        return datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    except:
+        return None
+
+def _ts_iso(item):
+    data_post = data_do_post(item)
+    return data_post.strftime("%Y-%m-%dT%H:%M:%S") if data_post else ""
+
+def _run_input_perfis(perfis, limite=LIMITE_POSTS_POR_PERFIL, mais_novos_que=None):
     run_input = {
-        "directUrls": [f"https://www.instagram.com/{perfil}/"],
+        "directUrls": [f"https://www.instagram.com/{perfil}/" for perfil in perfis],
         "resultsType": "posts",
-        "resultsLimit": 30, 
+        "resultsLimit": limite, 
         "searchType": "user",
         "proxy": {"useApifyProxy": True, "apifyProxyGroups": ["RESIDENTIAL"]}
     }
+    if mais_novos_que:
+        run_input["onlyPostsNewerThan"] = mais_novos_que
+    return run_input
 
-    container_log.info(f"📡 Apify: Lendo @{perfil}...")
+# --- COLETA INCREMENTAL (marca d'água por perfil) ---
+# Posts dentro da janela de `dias` são sempre buscados de novo: views/likes mudam
+# depois da primeira coleta e o Top N da Pag 01 é ordenado por views. O cache
+# economiza o que fica fora da janela (e a coleta de perfis parados).
 
-    try:
-        run = client.actor("apify/instagram-scraper").call(run_input=run_input)
-        if not run: return []
+def _inicio_janela(dias):
+    return (datetime.now(timezone.utc) - timedelta(days=dias)).strftime("%Y-%m-%dT%H:%M:%S")
+
+def _limite_adaptativo(marca, dias):
+    """Quantos posts pedir: ritmo de postagem do perfil x período coberto (janela ou desde a última coleta), com folga."""
+    dias_desde = max(0.0, time.time() - marca["atualizado_em"]) / 86400
+    esperado = marca["posts_por_dia"] * max(dias, dias_desde) * 1.5 + 2
+    return int(min(LIMITE_POSTS_POR_PERFIL, max(LIMITE_MINIMO_INCREMENTAL, math.ceil(esperado))))
+
+def planejar_coleta(perfis, dias):
+    """
+    Retorna (limite, mais_novos_que) para uma execução com esses perfis.
+    Se algum perfil nunca foi coletado, faz coleta completa.
+    """
+    marcas = [local_store.marca_perfil(p) for p in perfis]
+    if not marcas or any(m is None for m in marcas):
+        return LIMITE_POSTS_POR_PERFIL, None
+    # Uma execução só aceita um filtro: usa o mais antigo entre as marcas e a janela, e o maior limite
+    mais_novos_que = min([m["ultimo_ts"] for m in marcas] + [_inicio_janela(dias)])
+    return max(_limite_adaptativo(m, dias) for m in marcas), mais_novos_que
+
+@tracing.rastrear("local:cache_posts")
+def mesclar_com_cache(perfil, novos, limite, dias=0):
+    """
+    Junta os itens recém-coletados com os já conhecidos do perfil (novos sobrescrevem,
+    pois trazem métricas atualizadas) e avança a marca d'água. Retorna a lista completa.
+    """
+    marca = local_store.marca_perfil(perfil)
+    cache = {str(i.get('id')): i for i in local_store.posts_do_perfil(perfil)}
+    for item in novos:
+        cache[str(item.get('id'))] = item
+
+    itens = [i for i in cache.values() if _ts_iso(i)]
+    if not itens:
+        return []
+    itens.sort(key=_ts_iso, reverse=True)
+
+    # Veio o limite cheio e nada alcançou a marca antiga: pode ter ficado um buraco
+    # entre a marca e o post mais antigo desta coleta -> próxima coleta é completa.
+    lacuna = (
+        marca is not None and len(novos) >= limite
+        and min(_ts_iso(i) for i in novos if _ts_iso(i)) > marca["ultimo_ts"]
+    )
 
-        dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
-        container_log.info(f"📦 {len(dataset_items)} itens encontrados. Filtrando...")
+    recentes = [i for i in itens if data_do_post(i) >= datetime.now(timezone.utc) - timedelta(days=30)]
+    posts_por_dia = len(recentes) / 30
+
+    manter_desde = _inicio_janela(max(DIAS_CACHE_POSTS, dias))
+    local_store.salvar_posts_perfil(perfil, novos, _ts_iso, manter_desde)
+    if lacuna:
+        local_store.apagar_marca_perfil(perfil)
+    else:
+        mais_novo = itens[0]
+        local_store.salvar_marca_perfil(perfil, _ts_iso(mais_novo), str(mais_novo.get('id')), posts_por_dia)
+    return itens
+
+def filtrar_itens_apify(dataset_items, dias):
+    """Filtra vídeos recentes do dataset da Apify e normaliza no formato usado pela Pag 01."""
+    items_coletados = []
+    data_limite = datetime.now(timezone.utc) - timedelta(days=dias)
+    
+    for item in dataset_items:
+        tipo = item.get('type', '')
+        if tipo not in ['Video', 'Reel', 'Sidecar', 'GraphVideo'] and not item.get('is_video', False):
+            continue
         
-        data_limite = datetime.now(timezone.utc) - timedelta(days=dias)
+        data_post = data_do_post(item)
+        if data_post is None: continue
+
+        if data_post < data_limite: continue
+
+        video_url = item.get('videoUrl')
+        if not video_url:
+             children = item.get('childPosts') or item.get('children') or []
+             for child in children:
+                 if (child.get('type') == 'Video' or child.get('is_video')) and child.get('videoUrl'):
+                     video_url = child.get('videoUrl')
+                     break
+        if not video_url: continue
+
+        legenda_raw = item.get('caption') or item.get('description') or ""
+        views = item.get('videoViewCount') or item.get('playCount') or item.get('viewCount') or 0
         
-        for item in dataset_items:
-            tipo = item.get('type', '')
-            if tipo not in ['Video', 'Reel', 'Sidecar', 'GraphVideo'] and not item.get('is_video', False):
-                continue
-            
-            ts_str = item.get('timestamp')
-            if not ts_str: continue
-            
-            try:
-                if ts_str.endswith('Z'):
-                    data_post = datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=timezone.utc)
-                else:
-                    data_post = datetime.strptime(ts_str, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
-            except: continue 
-
-            if data_post < data_limite: continue
-
-            video_url = item.get('videoUrl')
-            if not video_url:
-                 children = item.get('childPosts') or item.get('children') or []
-                 for child in children:
-                     if (child.get('type') == 'Video' or child.get('is_video')) and child.get('videoUrl'):
-                         video_url = child.get('videoUrl')
-                         break
-            if not video_url: continue
-
-            legenda_raw = item.get('caption') or item.get('description') or ""
-            views = item.get('videoViewCount') or item.get('playCount') or item.get('viewCount') or 0
-            
-            items_coletados.append({
-                "pk": str(item.get('id')),
-                "data_str": data_post.strftime("%d/%m/%Y"),
-                "views": int(views),
-                "likes": int(item.get('likesCount') or 0),
-                "comments": int(item.get('commentsCount') or 0),
-                "link": f"https://www.instagram.com/p/{item.get('shortCode')}/",
-                "caption": str(legenda_raw),
-                "download_url": video_url
-            })
+        items_coletados.append({
+            "pk": str(item.get('id')),
+            "data_str": data_post.strftime("%d/%m/%Y"),
+            "views": int(views),
+            "likes": int(item.get('likesCount') or 0),
+            "comments": int(item.get('commentsCount') or 0),
+            "link": f"https://www.instagram.com/p/{item.get('shortCode')}/",
+            "caption": str(legenda_raw),
+            "download_url": video_url
+        })
+    return items_coletados
+
+def pegar_dados_apify(perfil, dias, container_log):
+    if "apify_token" not in st.secrets:
+        container_log.error("Token da Apify não configurado.")
+        return []
+
+    client = clients.apify_client()
+    perfil = _normalizar_perfil(perfil)
+    limite, mais_novos_que = planejar_coleta([perfil], dias)
+    if mais_novos_que:
+        container_log.info(f"📡 Apify: Lendo @{perfil} (posts após {mais_novos_que}, até {limite})...")
+    else:
+        container_log.info(f"📡 Apify: Lendo @{perfil}...")
+
+    try:
+        with tracing.span("apify:run", perfis=1, limite=limite):
+            run = client.actor("apify/instagram-scraper").call(
+                run_input=_run_input_perfis([perfil], limite, mais_novos_que)
+            )
+        if not run: return []
+
+        with tracing.span("apify:dataset"):
+            dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
+        container_log.info(f"📦 {len(dataset_items)} itens novos encontrados. Filtrando...")
+        return filtrar_itens_apify(_mesclar_seguro(perfil, dataset_items, limite, dias), dias)
             
     except Exception as e:
-        st.error(f"Erro na Apify: {e}")
+        container_log.error(f"Erro na Apify: {e}")
         return []
 
-    return items_coletados
+def _mesclar_seguro(perfil, novos, limite, dias):
+    """Se o cache local falhar, segue só com os itens desta coleta."""
+    try:
+        return mesclar_com_cache(perfil, novos, limite, dias)
+    except Exception:
+        return novos
 
-def baixar_video_with_retry(url, filename, retries=3):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Referer": "https://www.instagram.com/"
-    }
-    for i in range(retries):
+# --- MODO LOTE: UMA ÚNICA EXECUÇÃO DA APIFY PARA TODOS OS PERFIS ---
+
+def _normalizar_perfil(perfil):
+    return perfil.strip().lstrip("@").strip("/").lower()
+
+def _dono_do_item(item, perfis):
+    """Descobre a qual perfil pedido o item pertence (ownerUsername, senão inputUrl)."""
+    dono = _normalizar_perfil(item.get('ownerUsername') or "")
+    if dono in perfis:
+        return dono
+    input_url = (item.get('inputUrl') or "").lower()
+    for perfil in perfis:
+        if f"instagram.com/{perfil}/" in input_url:
+            return perfil
+    return None
+
+def pegar_dados_apify_lote(perfis, dias, container_log):
+    """
+    Roda o actor UMA vez com todos os perfis em `directUrls` e gera (perfil, items_coletados)
+    na ordem de `perfis`, no mesmo formato de pegar_dados_apify.
+
+    O run é iniciado sem esperar o fim (.start()); uma thread lê o dataset enquanto o
+    scraper ainda roda e agrupa os itens por dono. Um perfil é entregue assim que seu
+    grupo fecha (atingiu o resultsLimit ou o run terminou), então o perfil 1 já é
+    processado enquanto o scraper ainda coleta os demais.
+    """
+    if "apify_token" not in st.secrets:
+        container_log.error("Token da Apify não configurado.")
+        return
+
+    perfis = [p for p in (_normalizar_perfil(p) for p in perfis) if p]
+    if not perfis: return
+
+    client = clients.apify_client()
+    limite, mais_novos_que = planejar_coleta(perfis, dias)
+    if mais_novos_que:
+        container_log.info(f"📡 Apify: Lendo {len(perfis)} perfis numa única execução (posts após {mais_novos_que}, até {limite} por perfil)...")
+    else:
+        container_log.info(f"📡 Apify: Lendo {len(perfis)} perfis numa única execução...")
+
+    try:
+        with tracing.span("apify:start", perfis=len(perfis), limite=limite):
+            run = client.actor("apify/instagram-scraper").start(
+                run_input=_run_input_perfis(perfis, limite, mais_novos_que)
+            )
+    except Exception as e:
+        container_log.error(f"Erro na Apify: {e}")
+        return
+    if not run: return
+
+    grupos = {perfil: [] for perfil in perfis}
+    estado = {"fim": False, "erro": None}
+    cond = threading.Condition()
+
+    @tracing.propagar
+    @tracing.rastrear("apify:dataset")
+    def agrupar():
         try:
-            with requests.get(url, headers=headers, stream=True, timeout=60) as r:
-                r.raise_for_status()
-                with open(filename, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192): f.write(chunk)
-            return True
+            dataset, execucao = client.dataset(run["defaultDatasetId"]), client.run(run["id"])
+            lidos, status = 0, run.get("status")
+            while True:
+                # Status lido ANTES da página: o que entrou até o fim do run vem nesta leitura ou na próxima
+                terminou = status in STATUS_FINAIS_APIFY
+                pagina = dataset.list_items(offset=lidos).items
+                lidos += len(pagina)
+                for item in pagina:
+                    dono = _dono_do_item(item, grupos)
+                    if dono is None: continue
+                    with cond:
+                        grupos[dono].append(item)
+                        if len(grupos[dono]) >= limite:
+                            cond.notify_all()
+                if terminou and not pagina:
+                    break
+                if not pagina:
+                    time.sleep(INTERVALO_LEITURA_DATASET)
+                status = (execucao.get() or {}).get("status")
+            if status != "SUCCEEDED":
+                estado["erro"] = RuntimeError(f"execução da Apify terminou com status {status}")
         except Exception as e:
-            time.sleep(2 + i)
-            if i == retries - 1:
-                try:
-                    import urllib.request
-                    opener = urllib.request.build_opener()
-                    opener.addheaders = [('User-Agent', headers['User-Agent'])]
-                    urllib.request.install_opener(opener)
-                    urllib.request.urlretrieve(url, filename)
-                    return True
-                except: return False
-    return False
-
-def download_file(url, filename):
-    """Baixa arquivo genérico via requests"""
+            estado["erro"] = e
+        finally:
+            with cond:
+                estado["fim"] = True
+                cond.notify_all()
+
+    threading.Thread(target=agrupar, daemon=True).start()
+
+    for perfil in perfis:
+        with cond:
+            cond.wait_for(lambda: estado["fim"] or len(grupos[perfil]) >= limite)
+            itens_perfil = list(grupos[perfil])
+        if estado["erro"] is not None and not itens_perfil:
+            # Leitura do dataset falhou: não mexe no cache/marca deste perfil
+            container_log.error(f"Erro na Apify: {estado['erro']}")
+            yield perfil, []
+            continue
+        yield perfil, filtrar_itens_apify(_mesclar_seguro(perfil, itens_perfil, limite, dias), dias)
+
+@tracing.rastrear("download:video")
+def baixar_video_with_retry(url, filename, retries=3):
+    # Retomada por Range, backoff e limite por host ficam no downloader
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, stream=True)
-        r.raise_for_status()
-        with open(filename, 'wb') as f:
-            for chunk in r.iter_content(chunk_size=8192): f.write(chunk)
+        downloader.baixar(url, filename, headers={"Referer": "https://www.instagram.com/"}, tentativas=retries)
         return True
-    except Exception as e:
-        st.error(f"Erro download arquivo: {e}")
+    except downloader.ErroDownload:
+        return False
+
+@tracing.rastrear("download:arquivo")
+def download_file(url, filename, container_log=st):
+    """Baixa arquivo genérico (ver modules/downloader.py)"""
+    try:
+        downloader.baixar(url, filename)
+        return True
+    except downloader.ErroDownload as e:
+        container_log.error(f"Erro download arquivo: {e}")
         return False
 
-def get_instagram_data_apify(url):
+@tracing.rastrear("download:audio")
+def baixar_audio_video(url, destino_base, duracao_max=None, container_log=st):
+    """
+    Baixa o vídeo direto para o ffmpeg (sem gravar o mp4) e retorna o caminho do áudio.
+    Se o mp4 não permitir leitura em stream, baixa em arquivo e extrai de lá.
+    Com `duracao_max`, só os primeiros segundos viram áudio (e o download para cedo).
+    """
+    try:
+        with downloader.stream(url) as r:
+            return extrair_audio_de_stream(downloader.pedacos(r), destino_base, duracao_max)
+    except Exception:
+        video_path = destino_base + ".mp4"
+        if not download_file(url, video_path, container_log):
+            raise RuntimeError("Falha no download do vídeo")
+        try:
+            return extrair_audio(video_path, duracao_max=duracao_max)
+        finally:
+            if os.path.exists(video_path): os.remove(video_path)
+
+def get_instagram_data_apify(url, container_log=st):
     """Pega dados de um post específico do Instagram"""
-    if "apify_token" not in st.secrets: return None
-    client = ApifyClient(st.secrets["apify_token"])
+    if "apify_token" not in st.secrets:
+        container_log.error("Token da Apify não configurado.")
+        return None
+    client = clients.apify_client()
     
     run_input = {
         "directUrls": [url],
@@ -129,11 +327,13 @@ def get_instagram_data_apify(url):
         "proxy": {"useApifyProxy": True, "apifyProxyGroups": ["RESIDENTIAL"]}
     }
     try:
-        run = client.actor("apify/instagram-scraper").call(run_input=run_input)
+        with tracing.span("apify:run", url=url):
+            run = client.actor("apify/instagram-scraper").call(run_input=run_input)
         if not run: return None
-        dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
+        with tracing.span("apify:dataset"):
+            dataset_items = client.dataset(run["defaultDatasetId"]).list_items().items
         if dataset_items: return dataset_items[0]
         return None
     except Exception as e:
-        st.error(f"Erro na Apify Insta: {e}")
+        container_log.error(f"Erro na Apify Insta: {e}")
         return None
\ No newline at end of file
@@ -0,0 +1,257 @@
+# modules/jobs.py
+"""
+Fila de jobs local e persistente (SQLite) com pool de workers no processo.
+
+As páginas só enfileiram o trabalho e consultam o status; o processamento roda
+fora da thread do Streamlit, então sobrevive a rerun, refresh e timeout da aba,
+e vários usuários podem enfileirar sem bloquear uns aos outros.
+"""
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+from modules import tracing
+
+CAMINHO_DB = os.path.join(".cache", "jobs.db")
+MAX_WORKERS = 2
+MAX_EVENTOS = 300
+
+# Status possíveis
+NA_FILA = "fila"
+RODANDO = "rodando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+CANCELADO = "cancelado"
+FINALIZADOS = (CONCLUIDO, ERRO, CANCELADO)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    etapa TEXT NOT NULL DEFAULT '',
+    progresso REAL NOT NULL DEFAULT 0,
+    eventos TEXT NOT NULL DEFAULT '[]',
+    resultado TEXT,
+    erro TEXT,
+    cancelar INTEGER NOT NULL DEFAULT 0,
+    criado_em REAL NOT NULL,
+    iniciado_em REAL,
+    concluido_em REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, criado_em);
+"""
+
+_local = threading.local()
+_lock = threading.Lock()
+_tipos = {}          # tipo -> função(params, ctx)
+_pool = None
+
+# Tipos de job e o módulo que registra cada um. O módulo só é importado quando o
+# job roda: a página que enfileira não paga o import de gspread/requests/ffmpeg,
+# e um job retomado após restart funciona mesmo sem a página ter sido aberta.
+TIPO_VIRAL_ANALYZER = "viral_analyzer"
+TIPO_CARROSSEL_EXTRACAO = "carrossel_extracao"
+TIPO_REESCRITA_LOTE = "reescrita_lote"
+TIPO_TRANSCRICAO_COMPLETA = "transcricao_completa"
+MODULOS_DOS_TIPOS = {
+    TIPO_VIRAL_ANALYZER: "modules.viral_analyzer",
+    TIPO_CARROSSEL_EXTRACAO: "modules.carrossel",
+    TIPO_REESCRITA_LOTE: "modules.bulk_rewrite",
+    TIPO_TRANSCRICAO_COMPLETA: "modules.viral_analyzer",
+}
+
+
+def _conexao():
+    con = getattr(_local, "con", None)
+    if con is None:
+        os.makedirs(os.path.dirname(CAMINHO_DB), exist_ok=True)
+        con = sqlite3.connect(CAMINHO_DB, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(_SCHEMA)
+        _local.con = con
+    return con
+
+
+def _atualizar(job_id, **campos):
+    sets = ", ".join(f"{k} = ?" for k in campos)
+    con = _conexao()
+    with con:
+        con.execute(f"UPDATE jobs SET {sets} WHERE id = ?", (*campos.values(), job_id))
+
+
+def registrar_tipo(tipo, funcao):
+    """Associa um tipo de job à função que o executa: funcao(params, ctx) -> resultado (JSON)."""
+    _tipos[tipo] = funcao
+
+
+# --- CONTEXTO PASSADO PARA A FUNÇÃO DO JOB ---
+
+class CanceladoPeloUsuario(Exception):
+    pass
+
+
+class ContextoJob:
+    """O que a função do job usa para reportar progresso, logs e resultado parcial."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self._eventos = []
+        self.dir_temp = tempfile.mkdtemp(prefix=f"job_{job_id[:8]}_")
+
+    def etapa(self, nome, progresso=None):
+        campos = {"etapa": nome}
+        if progresso is not None:
+            campos["progresso"] = max(0.0, min(1.0, float(progresso)))
+        _atualizar(self.id, **campos)
+
+    def log(self, mensagem, tipo="info"):
+        self._eventos.append({"tipo": tipo, "msg": mensagem, "t": time.time()})
+        self._eventos = self._eventos[-MAX_EVENTOS:]
+        _atualizar(self.id, eventos=json.dumps(self._eventos, ensure_ascii=False))
+
+    # Mesma interface de st / st.status, para passar o ctx onde as funções esperam um container de log
+    def info(self, mensagem): self.log(mensagem, "info")
+    def write(self, mensagem): self.log(mensagem, "write")
+    def warning(self, mensagem): self.log(mensagem, "warning")
+    def error(self, mensagem): self.log(mensagem, "error")
+
+    def parcial(self, resultado):
+        """Publica um resultado parcial (a página pode ir mostrando antes do fim)."""
+        _atualizar(self.id, resultado=json.dumps(resultado, ensure_ascii=False, default=str))
+
+    def verificar_cancelamento(self):
+        row = _conexao().execute("SELECT cancelar FROM jobs WHERE id = ?", (self.id,)).fetchone()
+        if row and row[0]:
+            raise CanceladoPeloUsuario()
+
+    def limpar(self):
+        shutil.rmtree(self.dir_temp, ignore_errors=True)
+
+
+# --- EXECUÇÃO ---
+
+def _executar(job_id):
+    con = _conexao()
+    with con:
+        # "Reserva" atômica: só um worker consegue passar o job de fila -> rodando
+        reservado = con.execute(
+            "UPDATE jobs SET status = ?, iniciado_em = ? WHERE id = ? AND status = ?",
+            (RODANDO, time.time(), job_id, NA_FILA),
+        ).rowcount
+    if not reservado:
+        return
+    tipo, params, cancelar = con.execute(
+        "SELECT tipo, params, cancelar FROM jobs WHERE id = ?", (job_id,)
+    ).fetchone()
+    if cancelar:
+        _atualizar(job_id, status=CANCELADO, concluido_em=time.time())
+        return
+
+    ctx = ContextoJob(job_id)
+    try:
+        if tipo not in _tipos and tipo in MODULOS_DOS_TIPOS:
+            importlib.import_module(MODULOS_DOS_TIPOS[tipo])
+        funcao = _tipos.get(tipo)
+        if funcao is None:
+            raise RuntimeError(f"Tipo de job desconhecido: {tipo}")
+        # Spans do job ficam na execução de mesmo ID (painel de desempenho da página)
+        with tracing.execucao(tipo, id=job_id):
+            resultado = funcao(json.loads(params), ctx)
+        campos = {"status": CONCLUIDO, "progresso": 1.0, "concluido_em": time.time()}
+        if resultado is not None:
+            campos["resultado"] = json.dumps(resultado, ensure_ascii=False, default=str)
+        _atualizar(job_id, **campos)
+    except CanceladoPeloUsuario:
+        _atualizar(job_id, status=CANCELADO, concluido_em=time.time())
+    except Exception as e:
+        traceback.print_exc()
+        _atualizar(job_id, status=ERRO, erro=str(e), concluido_em=time.time())
+    finally:
+        # Arquivos temporários do job são apagados mesmo se ninguém estiver olhando a página
+        ctx.limpar()
+
+
+def _iniciar_pool():
+    """Cria o pool uma vez por processo e retoma jobs que ficaram pendentes (ex.: restart)."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            return _pool
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="job")
+        con = _conexao()
+        with con:
+            # Jobs que estavam rodando quando o processo caiu voltam para a fila
+            con.execute("UPDATE jobs SET status = ? WHERE status = ?", (NA_FILA, RODANDO))
+        pendentes = con.execute(
+            "SELECT id FROM jobs WHERE status = ? ORDER BY criado_em", (NA_FILA,)
+        ).fetchall()
+        for (job_id,) in pendentes:
+            _pool.submit(_executar, job_id)
+        return _pool
+
+
+def enviar_job(tipo, params):
+    """Enfileira um job e retorna o ID."""
+    job_id = uuid.uuid4().hex
+    con = _conexao()
+    with con:
+        con.execute(
+            "INSERT INTO jobs (id, tipo, params, status, criado_em) VALUES (?, ?, ?, ?, ?)",
+            (job_id, tipo, json.dumps(params, ensure_ascii=False), NA_FILA, time.time()),
+        )
+    pool = _iniciar_pool()
+    pool.submit(_executar, job_id)
+    return job_id
+
+
+def cancelar_job(job_id):
+    """Pede o cancelamento (o job para no próximo ponto de verificação)."""
+    _atualizar(job_id, cancelar=1)
+
+
+def consultar_job(job_id):
+    """Estado atual do job como dict (ou None se não existir)."""
+    _iniciar_pool()
+    con = _conexao()
+    row = con.execute(
+        "SELECT id, tipo, params, status, etapa, progresso, eventos, resultado, erro, "
+        "criado_em, iniciado_em, concluido_em FROM jobs WHERE id = ?",
+        (job_id,),
+    ).fetchone()
+    if not row:
+        return None
+    job = dict(zip(
+        ["id", "tipo", "params", "status", "etapa", "progresso", "eventos", "resultado", "erro",
+         "criado_em", "iniciado_em", "concluido_em"],
+        row,
+    ))
+    job["params"] = json.loads(job["params"])
+    job["eventos"] = json.loads(job["eventos"] or "[]")
+    job["resultado"] = json.loads(job["resultado"]) if job["resultado"] else None
+    if job["status"] == NA_FILA:
+        job["posicao_fila"] = con.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND criado_em <= ?", (NA_FILA, job["criado_em"])
+        ).fetchone()[0]
+    return job
+
+
+def listar_jobs(tipo=None, limite=20):
+    """Jobs mais recentes (para mostrar o histórico/fila na página)."""
+    sql = "SELECT id, tipo, status, etapa, progresso, criado_em FROM jobs"
+    args = ()
+    if tipo:
+        sql += " WHERE tipo = ?"
+        args = (tipo,)
+    sql += " ORDER BY criado_em DESC LIMIT ?"
+    rows = _conexao().execute(sql, (*args, limite)).fetchall()
+    return [dict(zip(["id", "tipo", "status", "etapa", "progresso", "criado_em"], r)) for r in rows]
@@ -0,0 +1,567 @@
+# modules/local_store.py
+"""
+Réplica local (SQLite) das abas da planilha DB_E21_Conteudos.
+
+O Sheets continua sendo a fonte da verdade para escrita, mas as consultas
+(ID já existe? URL já foi transcrita?) são respondidas aqui, com índices,
+em vez de varrer a aba pela rede a cada busca.
+
+Também guarda os posts já coletados de cada perfil, usados na coleta
+incremental da Apify (Pag 01), os roteiros da reescrita em lote que
+ainda não chegaram à planilha (Pag 02) e o placar de saúde dos servidores
+de download (Cobalt).
+
+As transcrições, ganchos e legendas das três abas ficam num índice de busca
+textual (FTS5), mantido por triggers a cada linha inserida/alterada/removida
+(Pag 06). As assinaturas de legenda (MinHash/LSH) e de áudio dos conteúdos já
+processados ficam aqui também (ver modules/similaridade.py).
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from modules import tracing
+
+CAMINHO_DB = os.path.join(".cache", "e21_conteudos.db")
+
+ABAS = ("instagram", "carrossel", "Youtube")
+
+# Índices das colunas (iguais em todas as abas)
+COL_ID = 0
+COL_PERFIL = 2
+COL_DATA_POST = 3
+COL_URL = 4
+COL_VIEWS = 5
+COL_TRANSCRICAO = 8
+COL_GANCHO = 9                      # só na aba instagram; nas outras a coluna 9 é a legenda
+
+INTERVALO_SYNC = 30                 # segundos entre sincronizações incrementais
+INTERVALO_RESYNC_COMPLETO = 6 * 3600  # de tempos em tempos baixa a aba inteira (pega edições/remoções)
+
+_local = threading.local()
+_lock_escrita = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conteudos (
+    aba TEXT NOT NULL,
+    linha INTEGER,               -- número da linha na planilha (NULL = enviada por nós, ainda não sincronizada)
+    id_unico TEXT,
+    url TEXT,
+    dados TEXT NOT NULL          -- linha completa em JSON
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_conteudos_linha ON conteudos(aba, linha) WHERE linha IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_conteudos_id ON conteudos(aba, id_unico);
+CREATE INDEX IF NOT EXISTS idx_conteudos_url ON conteudos(aba, url);
+
+CREATE TABLE IF NOT EXISTS perfis_crawl (
+    perfil TEXT PRIMARY KEY,
+    ultimo_ts TEXT NOT NULL,     -- timestamp (ISO, UTC) do post mais novo já visto
+    ultimo_id TEXT NOT NULL,
+    posts_por_dia REAL NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS posts_perfil (
+    perfil TEXT NOT NULL,
+    id TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    item TEXT NOT NULL,          -- item bruto da Apify em JSON
+    PRIMARY KEY (perfil, id)
+);
+
+CREATE TABLE IF NOT EXISTS reescritas_pendentes (
+    planilha TEXT NOT NULL,
+    linha INTEGER NOT NULL,      -- número da linha na planilha
+    texto TEXT NOT NULL,
+    assinatura TEXT NOT NULL DEFAULT '',  -- hash da entrada (transcrição, gancho, tema, CTA) do roteiro
+    PRIMARY KEY (planilha, linha)
+);
+
+CREATE TABLE IF NOT EXISTS saude_espelhos (
+    servico TEXT NOT NULL,
+    url TEXT NOT NULL,
+    taxa_sucesso REAL NOT NULL,  -- média móvel (0 a 1)
+    latencia_s REAL NOT NULL,    -- média móvel das respostas
+    pedidos INTEGER NOT NULL,
+    atualizado_em REAL NOT NULL,
+    PRIMARY KEY (servico, url)
+);
+
+CREATE TABLE IF NOT EXISTS assinaturas (
+    aba TEXT NOT NULL,
+    id_unico TEXT NOT NULL,
+    minhash BLOB,                -- assinatura da legenda (NULL = legenda curta demais)
+    digital BLOB,                -- impressão digital do início do áudio (NULL = sem áudio medido)
+    PRIMARY KEY (aba, id_unico)
+);
+
+CREATE TABLE IF NOT EXISTS lsh_legendas (
+    aba TEXT NOT NULL,
+    banda INTEGER NOT NULL,
+    chave INTEGER NOT NULL,      -- hash da faixa da assinatura
+    id_unico TEXT NOT NULL,
+    PRIMARY KEY (aba, banda, chave, id_unico)
+);
+
+CREATE TABLE IF NOT EXISTS sincronizacao (
+    aba TEXT PRIMARY KEY,
+    linhas INTEGER NOT NULL,     -- quantas linhas da planilha (com cabeçalho) já estão aqui
+    ultimo_sync REAL NOT NULL,
+    ultimo_sync_completo REAL NOT NULL
+);
+"""
+
+# Colunas pesquisáveis de cada linha (data em AAAA-MM-DD: a aba instagram grava DD/MM/AAAA)
+_SCHEMA_BUSCA = """
+CREATE VIEW IF NOT EXISTS conteudos_busca AS
+SELECT
+    rowid AS id_linha, aba, id_unico, url,
+    coalesce(json_extract(dados, '$[2]'), '') AS perfil,
+    CASE WHEN json_extract(dados, '$[3]') LIKE '__/__/____%'
+         THEN substr(json_extract(dados, '$[3]'), 7, 4) || '-' || substr(json_extract(dados, '$[3]'), 4, 2)
+              || '-' || substr(json_extract(dados, '$[3]'), 1, 2)
+         ELSE substr(coalesce(json_extract(dados, '$[3]'), ''), 1, 10) END AS data,
+    CAST(replace(replace(coalesce(json_extract(dados, '$[5]'), 0), '.', ''), ',', '') AS INTEGER) AS views,
+    coalesce(json_extract(dados, '$[8]'), '') AS transcricao,
+    CASE WHEN aba = 'instagram' THEN coalesce(json_extract(dados, '$[9]'), '') ELSE '' END AS gancho,
+    coalesce(json_extract(dados, CASE WHEN aba = 'instagram' THEN '$[10]' ELSE '$[9]' END), '') AS legenda
+FROM conteudos;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS busca USING fts5(
+    transcricao, gancho, legenda,
+    aba UNINDEXED, id_unico UNINDEXED, url UNINDEXED, perfil UNINDEXED, data UNINDEXED, views UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS busca_ao_inserir AFTER INSERT ON conteudos BEGIN
+    INSERT INTO busca (rowid, transcricao, gancho, legenda, aba, id_unico, url, perfil, data, views)
+    SELECT id_linha, transcricao, gancho, legenda, aba, id_unico, url, perfil, data, views
+    FROM conteudos_busca WHERE id_linha = new.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS busca_ao_apagar AFTER DELETE ON conteudos BEGIN
+    DELETE FROM busca WHERE rowid = old.rowid;
+END;
+
+CREATE TRIGGER IF NOT EXISTS busca_ao_alterar AFTER UPDATE OF dados ON conteudos BEGIN
+    DELETE FROM busca WHERE rowid = old.rowid;
+    INSERT INTO busca (rowid, transcricao, gancho, legenda, aba, id_unico, url, perfil, data, views)
+    SELECT id_linha, transcricao, gancho, legenda, aba, id_unico, url, perfil, data, views
+    FROM conteudos_busca WHERE id_linha = new.rowid;
+END;
+"""
+
+
+def conexao():
+    """Uma conexão por thread (sqlite3 não compartilha conexões entre threads)."""
+    con = getattr(_local, "con", None)
+    if con is None:
+        os.makedirs(os.path.dirname(CAMINHO_DB), exist_ok=True)
+        con = sqlite3.connect(CAMINHO_DB, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=NORMAL")
+        # INSERT OR REPLACE só dispara o trigger de DELETE (tira a linha antiga da busca) com isso ligado
+        con.execute("PRAGMA recursive_triggers=ON")
+        con.executescript(_SCHEMA)
+        _migrar(con)
+        _criar_busca(con)
+        _local.con = con
+    return con
+
+
+def _migrar(con):
+    """Colunas novas em bancos criados por versões anteriores."""
+    colunas = {row[1] for row in con.execute("PRAGMA table_info(reescritas_pendentes)")}
+    if "assinatura" not in colunas:
+        with _lock_escrita, con:
+            # Checkpoints antigos ficam sem assinatura: nunca batem e são descartados na retomada
+            con.execute("ALTER TABLE reescritas_pendentes ADD COLUMN assinatura TEXT NOT NULL DEFAULT ''")
+
+
+def _criar_busca(con):
+    """Cria o índice de busca; na primeira vez, indexa o que a réplica já tinha."""
+    with _lock_escrita:
+        existia = con.execute("SELECT 1 FROM sqlite_master WHERE name = 'busca'").fetchone()
+        con.executescript(_SCHEMA_BUSCA)
+        if not existia:
+            with con:
+                con.execute(
+                    "INSERT INTO busca (rowid, transcricao, gancho, legenda, aba, id_unico, url, perfil, data, views) "
+                    "SELECT id_linha, transcricao, gancho, legenda, aba, id_unico, url, perfil, data, views "
+                    "FROM conteudos_busca"
+                )
+
+
+def _estado_sync(aba):
+    row = conexao().execute(
+        "SELECT linhas, ultimo_sync, ultimo_sync_completo FROM sincronizacao WHERE aba = ?", (aba,)
+    ).fetchone()
+    return row or (0, 0.0, 0.0)
+
+
+def _inserir_linhas(con, aba, primeira_linha, linhas):
+    for offset, valores in enumerate(linhas):
+        numero = primeira_linha + offset
+        if numero == 1 and valores and valores[0] == "ID_Unico":
+            continue  # cabeçalho
+        id_unico = str(valores[COL_ID]) if len(valores) > COL_ID else ""
+        url = str(valores[COL_URL]) if len(valores) > COL_URL else ""
+        # A linha chegou da planilha: substitui a cópia provisória que nós mesmos registramos
+        con.execute(
+            "DELETE FROM conteudos WHERE aba = ? AND linha IS NULL AND id_unico = ? AND url = ?",
+            (aba, id_unico, url),
+        )
+        con.execute(
+            "INSERT OR REPLACE INTO conteudos (aba, linha, id_unico, url, dados) VALUES (?, ?, ?, ?, ?)",
+            (aba, numero, id_unico, url, json.dumps(valores, ensure_ascii=False)),
+        )
+
+
+def sincronizar_aba(worksheet, forcar=False):
+    """
+    Traz para o SQLite só as linhas novas da aba (a partir da última sincronizada).
+    Retorna quantas linhas foram recebidas.
+    """
+    aba = worksheet.title
+    linhas_locais, ultimo_sync, ultimo_completo = _estado_sync(aba)
+    agora = time.time()
+
+    completo = forcar or linhas_locais == 0 or agora - ultimo_completo > INTERVALO_RESYNC_COMPLETO
+    if not completo and agora - ultimo_sync < INTERVALO_SYNC:
+        return 0
+
+    with tracing.span("sheets:sync", aba=aba, completo=completo):
+        if completo:
+            novas = worksheet.get_all_values()
+            primeira = 1
+        else:
+            novas = worksheet.get(f"A{linhas_locais + 1}:Z")
+            primeira = linhas_locais + 1
+
+    con = conexao()
+    with _lock_escrita, con:
+        if completo:
+            con.execute("DELETE FROM conteudos WHERE aba = ? AND linha IS NOT NULL", (aba,))
+        _inserir_linhas(con, aba, primeira, novas)
+        total = primeira - 1 + len(novas)
+        con.execute(
+            "INSERT OR REPLACE INTO sincronizacao (aba, linhas, ultimo_sync, ultimo_sync_completo) VALUES (?, ?, ?, ?)",
+            (aba, total, agora, agora if completo else ultimo_completo),
+        )
+    return len(novas)
+
+
+def registrar_linhas(aba, linhas):
+    """Espelha localmente linhas que acabamos de enviar ao Sheets (antes do próximo sync)."""
+    con = conexao()
+    with _lock_escrita, con:
+        for valores in linhas:
+            con.execute(
+                "INSERT INTO conteudos (aba, linha, id_unico, url, dados) VALUES (?, NULL, ?, ?, ?)",
+                (
+                    aba,
+                    str(valores[COL_ID]) if len(valores) > COL_ID else "",
+                    str(valores[COL_URL]) if len(valores) > COL_URL else "",
+                    json.dumps(valores, ensure_ascii=False, default=str),
+                ),
+            )
+
+
+def ids_da_aba(aba):
+    rows = conexao().execute(
+        "SELECT DISTINCT id_unico FROM conteudos WHERE aba = ? AND id_unico != ''", (aba,)
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+def buscar_por_id(aba, id_unico):
+    """Linha completa (lista) do conteúdo com esse ID, ou None."""
+    row = conexao().execute(
+        "SELECT dados FROM conteudos WHERE aba = ? AND id_unico = ? ORDER BY linha IS NULL, linha DESC LIMIT 1",
+        (aba, str(id_unico)),
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def atualizar_celula(aba, id_unico, indice, valor):
+    """Altera uma coluna das linhas com esse ID (espelho de um update_cell feito no Sheets)."""
+    con = conexao()
+    with _lock_escrita, con:
+        rows = con.execute(
+            "SELECT rowid, dados FROM conteudos WHERE aba = ? AND id_unico = ?", (aba, str(id_unico))
+        ).fetchall()
+        for rowid, dados in rows:
+            valores = json.loads(dados)
+            valores += [""] * (indice + 1 - len(valores))
+            valores[indice] = valor
+            con.execute(
+                "UPDATE conteudos SET dados = ? WHERE rowid = ?",
+                (json.dumps(valores, ensure_ascii=False, default=str), rowid),
+            )
+
+
+def linhas_da_aba(aba):
+    """Todas as linhas (listas) da aba na réplica."""
+    rows = conexao().execute("SELECT dados FROM conteudos WHERE aba = ?", (aba,)).fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
+def buscar_por_url(aba, url):
+    """Linha completa (lista) do conteúdo com essa URL, ou None."""
+    row = conexao().execute(
+        "SELECT dados FROM conteudos WHERE aba = ? AND url = ? ORDER BY linha IS NULL, linha DESC LIMIT 1",
+        (aba, url),
+    ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+# --- COLETA INCREMENTAL DE PERFIS (marca d'água por perfil) ---
+
+def marca_perfil(perfil):
+    """Última coleta do perfil: dict com ultimo_ts, ultimo_id, posts_por_dia, atualizado_em (ou None)."""
+    row = conexao().execute(
+        "SELECT ultimo_ts, ultimo_id, posts_por_dia, atualizado_em FROM perfis_crawl WHERE perfil = ?",
+        (perfil,),
+    ).fetchone()
+    if not row:
+        return None
+    return {"ultimo_ts": row[0], "ultimo_id": row[1], "posts_por_dia": row[2], "atualizado_em": row[3]}
+
+
+def salvar_marca_perfil(perfil, ultimo_ts, ultimo_id, posts_por_dia):
+    con = conexao()
+    with _lock_escrita, con:
+        con.execute(
+            "INSERT OR REPLACE INTO perfis_crawl (perfil, ultimo_ts, ultimo_id, posts_por_dia, atualizado_em) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (perfil, ultimo_ts, ultimo_id, posts_por_dia, time.time()),
+        )
+
+
+def apagar_marca_perfil(perfil):
+    """Força uma coleta completa do perfil na próxima execução."""
+    con = conexao()
+    with _lock_escrita, con:
+        con.execute("DELETE FROM perfis_crawl WHERE perfil = ?", (perfil,))
+
+
+def posts_do_perfil(perfil):
+    rows = conexao().execute(
+        "SELECT item FROM posts_perfil WHERE perfil = ? ORDER BY ts DESC", (perfil,)
+    ).fetchall()
+    return [json.loads(r[0]) for r in rows]
+
+
+def salvar_posts_perfil(perfil, itens, ts_de, manter_desde):
+    """Grava/atualiza os itens (por ID) e remove do cache os posts anteriores a `manter_desde`."""
+    con = conexao()
+    with _lock_escrita, con:
+        for item in itens:
+            con.execute(
+                "INSERT OR REPLACE INTO posts_perfil (perfil, id, ts, item) VALUES (?, ?, ?, ?)",
+                (perfil, str(item.get("id")), ts_de(item), json.dumps(item, ensure_ascii=False)),
+            )
+        con.execute("DELETE FROM posts_perfil WHERE perfil = ? AND ts < ?", (perfil, manter_desde))
+
+
+def salvar_reescrita(planilha, linha, texto, assinatura):
+    """
+    Checkpoint: o roteiro já pago fica aqui até ser gravado na planilha.
+    `assinatura` identifica a entrada que gerou o roteiro (a linha pode mudar até a retomada).
+    """
+    con = conexao()
+    with _lock_escrita, con:
+        con.execute(
+            "INSERT OR REPLACE INTO reescritas_pendentes (planilha, linha, texto, assinatura) VALUES (?, ?, ?, ?)",
+            (planilha, linha, texto, assinatura),
+        )
+
+
+def reescritas_pendentes(planilha):
+    """{linha: (texto, assinatura)} dos roteiros ainda não gravados na planilha."""
+    rows = conexao().execute(
+        "SELECT linha, texto, assinatura FROM reescritas_pendentes WHERE planilha = ? ORDER BY linha", (planilha,)
+    ).fetchall()
+    return {linha: (texto, assinatura) for linha, texto, assinatura in rows}
+
+
+def apagar_reescritas(planilha, linhas):
+    con = conexao()
+    with _lock_escrita, con:
+        con.executemany(
+            "DELETE FROM reescritas_pendentes WHERE planilha = ? AND linha = ?",
+            [(planilha, linha) for linha in linhas],
+        )
+
+
+# --- PLACAR DE SAÚDE DOS ESPELHOS (Cobalt) ---
+
+PESO_SAUDE = 0.3  # peso da observação nova na média móvel
+
+
+def placar_espelhos(servico):
+    """{url: {"taxa_sucesso", "latencia_s", "pedidos", "atualizado_em"}}"""
+    rows = conexao().execute(
+        "SELECT url, taxa_sucesso, latencia_s, pedidos, atualizado_em FROM saude_espelhos WHERE servico = ?",
+        (servico,),
+    ).fetchall()
+    return {
+        url: {"taxa_sucesso": taxa, "latencia_s": lat, "pedidos": n, "atualizado_em": ts}
+        for url, taxa, lat, n, ts in rows
+    }
+
+
+def registrar_espelho(servico, url, sucesso, latencia_s):
+    con = conexao()
+    with _lock_escrita, con:
+        row = con.execute(
+            "SELECT taxa_sucesso, latencia_s, pedidos FROM saude_espelhos WHERE servico = ? AND url = ?",
+            (servico, url),
+        ).fetchone()
+        if row:
+            taxa, lat, n = row
+            taxa += PESO_SAUDE * (float(sucesso) - taxa)
+            # Latência só conta quando a resposta foi válida (timeout não diz quão rápido ele é)
+            if sucesso:
+                lat += PESO_SAUDE * (latencia_s - lat)
+        else:
+            taxa, lat, n = float(sucesso), latencia_s, 0
+        con.execute(
+            "INSERT OR REPLACE INTO saude_espelhos (servico, url, taxa_sucesso, latencia_s, pedidos, atualizado_em) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (servico, url, taxa, lat, n + 1, time.time()),
+        )
+
+
+# --- ASSINATURAS (QUASE-DUPLICADOS) ---
+
+def ids_assinados(aba):
+    rows = conexao().execute("SELECT id_unico FROM assinaturas WHERE aba = ?", (aba,)).fetchall()
+    return {r[0] for r in rows}
+
+
+def salvar_assinatura(aba, id_unico, minhash=None, bandas=(), digital=None):
+    """Grava as assinaturas de um conteúdo processado. `bandas` = [(banda, chave)] do LSH da legenda."""
+    con = conexao()
+    with _lock_escrita, con:
+        con.execute(
+            "INSERT OR REPLACE INTO assinaturas (aba, id_unico, minhash, digital) VALUES (?, ?, ?, ?)",
+            (aba, str(id_unico), minhash, digital),
+        )
+        con.executemany(
+            "INSERT OR IGNORE INTO lsh_legendas (aba, banda, chave, id_unico) VALUES (?, ?, ?, ?)",
+            [(aba, banda, chave, str(id_unico)) for banda, chave in bandas],
+        )
+
+
+def candidatos_legenda(aba, bandas):
+    """{id_unico: minhash} dos conteúdos que coincidem em pelo menos uma banda do LSH."""
+    if not bandas:
+        return {}
+    filtro = " OR ".join(["(l.banda = ? AND l.chave = ?)"] * len(bandas))
+    rows = conexao().execute(
+        f"SELECT DISTINCT a.id_unico, a.minhash FROM lsh_legendas l "
+        f"JOIN assinaturas a ON a.aba = l.aba AND a.id_unico = l.id_unico "
+        f"WHERE l.aba = ? AND ({filtro})",
+        [aba] + [v for par in bandas for v in par],
+    ).fetchall()
+    return dict(rows)
+
+
+def digitais_audio(aba):
+    """[(id_unico, digital)] de todos os conteúdos com áudio medido."""
+    return conexao().execute(
+        "SELECT id_unico, digital FROM assinaturas WHERE aba = ? AND digital IS NOT NULL", (aba,)
+    ).fetchall()
+
+
+# --- BUSCA TEXTUAL (FTS5) ---
+
+# Pesos do bm25 por coluna: um gancho parecido vale mais que uma palavra solta na transcrição
+PESOS_BUSCA = (1.0, 3.0, 1.5)  # transcricao, gancho, legenda
+ORDENS_BUSCA = {
+    "relevancia": "rank",
+    "views": "views DESC",
+    "recentes": "data DESC",
+}
+_TERMO = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def consulta_fts(texto):
+    """
+    Texto digitado -> consulta FTS5 segura: palavras viram prefixos ("heranç" acha
+    "herança"/"heranças"), "entre aspas" vira frase exata e OU/OR é alternativa.
+    """
+    partes = []
+    for frase, palavra in _TERMO.findall(texto or ""):
+        if frase.strip():
+            partes.append('"' + frase.strip() + '"')
+        elif palavra.upper() in ("OU", "OR"):
+            if partes and partes[-1] != "OR":
+                partes.append("OR")
+        else:
+            palavra = re.sub(r"[^\w]", "", palavra)
+            if palavra:
+                partes.append(f'"{palavra}"*')
+    if partes and partes[-1] == "OR":
+        partes.pop()
+    return " ".join(partes)
+
+
+def buscar_texto(texto, abas=None, perfil=None, data_de=None, data_ate=None, min_views=0,
+                 ordem="relevancia", limite=50):
+    """
+    Busca ranqueada nas transcrições, ganchos e legendas.
+    Datas em AAAA-MM-DD; `perfil` aceita parte do nome (com ou sem @).
+    Retorna [{"aba", "id_unico", "url", "perfil", "data", "views", "gancho", "trecho"}];
+    o trecho vem com os termos encontrados em **negrito**.
+    """
+    consulta = consulta_fts(texto)
+    condicoes, params = [], []
+    if consulta:
+        condicoes.append("busca MATCH ?")
+        params.append(consulta)
+    if abas:
+        condicoes.append(f"aba IN ({', '.join('?' * len(abas))})")
+        params.extend(abas)
+    if perfil:
+        condicoes.append("lower(perfil) LIKE ?")
+        params.append(f"%{perfil.strip().lstrip('@').lower()}%")
+    if data_de:
+        condicoes.append("data >= ?")
+        params.append(str(data_de))
+    if data_ate:
+        condicoes.append("data <= ?")
+        params.append(str(data_ate))
+    if min_views:
+        condicoes.append("views >= ?")
+        params.append(int(min_views))
+
+    if consulta:
+        colunas_rank = "bm25(busca, %s) AS rank, snippet(busca, -1, '**', '**', ' … ', 24)" % ", ".join(map(str, PESOS_BUSCA))
+    else:
+        colunas_rank = "0 AS rank, substr(coalesce(nullif(gancho, ''), transcricao), 1, 200)"
+        ordem = "views" if ordem == "relevancia" else ordem
+    sql = (
+        f"SELECT aba, id_unico, url, perfil, data, views, gancho, {colunas_rank} FROM busca"
+        + (f" WHERE {' AND '.join(condicoes)}" if condicoes else "")
+        + f" ORDER BY {ORDENS_BUSCA.get(ordem, 'rank')} LIMIT ?"
+    )
+    with tracing.span("busca:fts", ordem=ordem) as registro:
+        rows = conexao().execute(sql, params + [int(limite)]).fetchall()
+        if registro is not None:
+            registro["atributos"]["resultados"] = len(rows)
+    return [
+        {"aba": aba, "id_unico": id_unico, "url": url, "perfil": perfil_, "data": data, "views": views,
+         "gancho": gancho, "trecho": trecho}
+        for aba, id_unico, url, perfil_, data, views, gancho, _, trecho in rows
+    ]
+
+
+def total_indexado():
+    """{aba: linhas no índice de busca}"""
+    return dict(conexao().execute("SELECT aba, count(*) FROM busca GROUP BY aba").fetchall())
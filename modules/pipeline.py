@@ -0,0 +1,128 @@
+# modules/pipeline.py
+import queue
+import threading
+
+from modules import tracing
+
+_FIM = object()
+
+
+class LogEtapa:
+    """Guarda as mensagens de status geradas nas threads para reexibir em ordem no Streamlit."""
+
+    def __init__(self):
+        self.mensagens = []
+
+    def write(self, msg):
+        self.mensagens.append(("write", msg))
+
+    def error(self, msg):
+        self.mensagens.append(("error", msg))
+
+    def replay(self, destino):
+        """Reproduz as mensagens num widget real (st.status, st.expander...)."""
+        for tipo, msg in self.mensagens:
+            getattr(destino, tipo)(msg)
+
+
+def _colocar(fila, item, cancelado):
+    """put() bloqueante que desiste se o pipeline foi cancelado."""
+    while not cancelado.is_set():
+        try:
+            fila.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _worker(nome, funcao, fila_in, fila_out, cancelado, estado):
+    while not cancelado.is_set():
+        try:
+            entrada = fila_in.get(timeout=0.2)
+        except queue.Empty:
+            continue
+
+        if entrada is _FIM:
+            # O último worker do estágio a terminar avisa o próximo estágio
+            with estado["lock"]:
+                estado["ativos"] -= 1
+                ultimo = estado["ativos"] == 0
+            if ultimo:
+                for _ in range(estado["workers_proximo"]):
+                    _colocar(fila_out, _FIM, cancelado)
+            return
+
+        indice, ctx = entrada
+        if not ctx.get("erro"):
+            try:
+                with tracing.span(f"etapa:{nome}", item=indice):
+                    ctx = funcao(ctx) or ctx
+            except Exception as e:
+                ctx["erro"] = str(e)
+                ctx["etapa_erro"] = nome
+        _colocar(fila_out, (indice, ctx), cancelado)
+
+
+def executar_pipeline(itens, estagios, tamanho_fila=2):
+    """
+    Executa cada item por uma sequência de estágios com filas limitadas entre eles.
+
+    `estagios` é uma lista de (nome, funcao, n_workers); cada função recebe e devolve
+    o dicionário de contexto do item. Se um estágio falhar, o erro fica em ctx["erro"]
+    e os estágios seguintes são pulados.
+
+    Gera (indice, ctx) SEMPRE na ordem original dos itens, para que a UI
+    seja atualizada de forma determinística.
+    """
+    itens = list(itens)
+    if not itens:
+        return
+
+    cancelado = threading.Event()
+    filas = [queue.Queue(maxsize=max(1, tamanho_fila)) for _ in estagios]
+    fila_saida = queue.Queue()
+    threads = []
+
+    for pos, (nome, funcao, n_workers) in enumerate(estagios):
+        n_workers = max(1, int(n_workers))
+        ultimo_estagio = pos == len(estagios) - 1
+        estado = {
+            "lock": threading.Lock(),
+            "ativos": n_workers,
+            "workers_proximo": 1 if ultimo_estagio else max(1, int(estagios[pos + 1][2])),
+        }
+        fila_out = fila_saida if ultimo_estagio else filas[pos + 1]
+        for _ in range(n_workers):
+            t = threading.Thread(
+                target=tracing.propagar(_worker),
+                args=(nome, funcao, filas[pos], fila_out, cancelado, estado),
+                daemon=True,
+            )
+            t.start()
+            threads.append(t)
+
+    def alimentar():
+        for indice, ctx in enumerate(itens):
+            if not _colocar(filas[0], (indice, ctx), cancelado):
+                return
+        for _ in range(max(1, int(estagios[0][2]))):
+            _colocar(filas[0], _FIM, cancelado)
+
+    threading.Thread(target=tracing.propagar(alimentar), daemon=True).start()
+
+    # Reordena a saída: só entrega o item N depois que 0..N-1 já foram entregues
+    pendentes = {}
+    proximo = 0
+    try:
+        while proximo < len(itens):
+            entrada = fila_saida.get()
+            if entrada is _FIM:
+                break
+            indice, ctx = entrada
+            pendentes[indice] = ctx
+            while proximo in pendentes:
+                yield proximo, pendentes.pop(proximo)
+                proximo += 1
+    finally:
+        cancelado.set()
@@ -0,0 +1,168 @@
+# modules/prompt_budget.py
+"""
+Orçamento de tokens dos prompts (Groq/Gemini).
+
+Em vez de cortar o conteúdo num número fixo de caracteres (que parte frases no
+meio e ignora o tamanho do system prompt), cada chamada diz quanto tempo pode
+levar e quanto vai gerar; daí sai quantos tokens de entrada cabem, descontado
+o que é fixo (system prompt, instruções). Se o conteúdo não couber, ele é
+resumido de forma extrativa: ficam as frases mais representativas (e o começo,
+onde está o gancho), na ordem original, marcando os trechos omitidos.
+
+A contagem de tokens é uma estimativa por modelo (caracteres por token),
+recalibrada com o `usage.prompt_tokens` que a API devolve (ver rate_limit.chat_groq).
+"""
+import re
+import threading
+from collections import Counter
+
+from modules import tracing
+
+# Desempenho aproximado por modelo (latência ~= base + entrada/entrada_tok_s + saída/saida_tok_s).
+# entrada_tok_s é conservador: inclui rede e fila da API, não só o prefill.
+PERFIS = {
+    "llama-3.3-70b-versatile": {"chars_por_token": 3.4, "base_s": 0.4, "entrada_tok_s": 1500, "saida_tok_s": 275},
+    "gemini-2.5-pro": {"chars_por_token": 3.8, "base_s": 2.0, "entrada_tok_s": 3000, "saida_tok_s": 80},
+}
+PERFIL_PADRAO = {"chars_por_token": 3.5, "base_s": 0.5, "entrada_tok_s": 1500, "saida_tok_s": 200}
+
+MIN_TOKENS_CONTEUDO = 300   # mesmo com system prompt enorme, o conteúdo nunca fica abaixo disso
+PESO_CALIBRACAO = 0.2       # média móvel do chars/token observado
+MARCA_OMISSAO = " […] "
+
+_lock = threading.Lock()
+_chars_por_token = {}  # modelo -> valor calibrado
+
+
+def _perfil(modelo):
+    return PERFIS.get(modelo, PERFIL_PADRAO)
+
+
+def chars_por_token(modelo):
+    with _lock:
+        return _chars_por_token.get(modelo, _perfil(modelo)["chars_por_token"])
+
+
+def contar_tokens(texto, modelo):
+    """Estimativa de tokens de `texto` no tokenizador do modelo."""
+    return int(len(texto or "") / chars_por_token(modelo)) + 1
+
+
+def calibrar(modelo, caracteres, tokens):
+    """Ajusta a estimativa com o que a API realmente contou."""
+    if caracteres < 200 or not tokens:
+        return
+    observado = caracteres / tokens
+    with _lock:
+        atual = _chars_por_token.get(modelo, _perfil(modelo)["chars_por_token"])
+        _chars_por_token[modelo] = atual + PESO_CALIBRACAO * (observado - atual)
+
+
+def orcamento_entrada(modelo, alvo_s, saida):
+    """Tokens de entrada que cabem em `alvo_s` segundos, reservando o tempo de `saida` tokens de resposta."""
+    p = _perfil(modelo)
+    sobra = alvo_s - p["base_s"] - saida / p["saida_tok_s"]
+    return max(0, int(sobra * p["entrada_tok_s"]))
+
+
+# --- COMPRESSÃO EXTRATIVA ---
+
+_FIM_DE_FRASE = re.compile(r"(?<=[.!?…])\s+|\n+")
+_PALAVRA = re.compile(r"\w{4,}")
+MAX_PALAVRAS_FRASE = 40  # Whisper às vezes devolve parágrafos sem pontuação
+
+
+def frases(texto):
+    """Divide em frases; trechos longos sem pontuação viram blocos de até MAX_PALAVRAS_FRASE palavras."""
+    saida = []
+    for trecho in _FIM_DE_FRASE.split(texto or ""):
+        palavras = trecho.split()
+        for i in range(0, len(palavras), MAX_PALAVRAS_FRASE):
+            saida.append(" ".join(palavras[i:i + MAX_PALAVRAS_FRASE]))
+    return [f for f in saida if f]
+
+
+def _inicio(lista, modelo, max_tokens):
+    """Frases do começo até o orçamento (a última cortada em palavra, nunca no meio)."""
+    escolhidas, usados = [], 0
+    for f in lista:
+        t = contar_tokens(f, modelo)
+        if usados + t > max_tokens:
+            if not escolhidas:
+                limite = int(max_tokens * chars_por_token(modelo))
+                escolhidas.append(f[:limite].rsplit(" ", 1)[0])
+            break
+        escolhidas.append(f)
+        usados += t
+    return escolhidas
+
+
+def _pontuar(lista):
+    """Frases com palavras que se repetem no texto (o assunto) pontuam mais; o começo e o fim ganham bônus."""
+    palavras = [set(_PALAVRA.findall(f.lower())) for f in lista]
+    frequencia = Counter(p for conjunto in palavras for p in conjunto)
+    notas = []
+    for i, conjunto in enumerate(palavras):
+        nota = sum(frequencia[p] - 1 for p in conjunto) / (len(conjunto) + 1) ** 0.5
+        if i < 3:
+            nota *= 2.0     # gancho
+        elif i >= len(lista) - 2:
+            nota *= 1.3     # conclusão / CTA
+        notas.append(nota)
+    return notas, palavras
+
+
+def comprimir(texto, modelo, max_tokens, foco="geral"):
+    """
+    Reduz `texto` a no máximo `max_tokens` (estimados) sem cortar frases.
+    foco="inicio": só o começo (análise de gancho). foco="geral": resumo extrativo.
+    """
+    lista = frases(texto)
+    if foco == "inicio":
+        return " ".join(_inicio(lista, modelo, max_tokens))
+
+    notas, palavras = _pontuar(lista)
+    tokens = [contar_tokens(f, modelo) for f in lista]
+    custo_marca = contar_tokens(MARCA_OMISSAO, modelo)
+    escolhidas, usados = set(), 0
+    for i in sorted(range(len(lista)), key=lambda i: notas[i], reverse=True):
+        if usados + tokens[i] + custo_marca > max_tokens:
+            continue
+        # Pula frases quase iguais a uma já escolhida (repetições comuns na fala)
+        if any(len(palavras[i] & palavras[j]) > 0.8 * max(len(palavras[i]), 1) for j in escolhidas):
+            continue
+        escolhidas.add(i)
+        usados += tokens[i] + custo_marca
+    if not escolhidas:
+        return " ".join(_inicio(lista, modelo, max_tokens))
+
+    partes, anterior = [], -1
+    for i in sorted(escolhidas):
+        if i != anterior + 1:
+            partes.append(MARCA_OMISSAO.strip())
+        partes.append(lista[i])
+        anterior = i
+    if anterior != len(lista) - 1:
+        partes.append(MARCA_OMISSAO.strip())
+    return " ".join(partes)
+
+
+def caber(conteudo, modelo, alvo_s, saida, fixos=(), foco="geral", teto=None):
+    """
+    Conteúdo pronto para o prompt: inteiro se couber no orçamento, comprimido se não.
+    `fixos` = textos que vão junto no prompt (system prompt, instruções) e descontam do orçamento.
+    `teto` = limite extra de tokens só para o conteúdo (ex.: o gancho não precisa de mais que isso).
+    """
+    conteudo = conteudo or ""
+    fixo = sum(contar_tokens(t, modelo) for t in fixos)
+    limite = max(MIN_TOKENS_CONTEUDO, orcamento_entrada(modelo, alvo_s, saida) - fixo)
+    if teto:
+        limite = min(limite, teto)
+    antes = contar_tokens(conteudo, modelo)
+    if antes <= limite:
+        return conteudo
+    with tracing.span("prompt:comprimir", modelo=modelo, tokens_antes=antes, limite=limite) as registro:
+        resultado = comprimir(conteudo, modelo, limite, foco)
+        if registro is not None:
+            registro["atributos"]["tokens_depois"] = contar_tokens(resultado, modelo)
+    return resultado
@@ -82,6 +82,27 @@ PROMPT_ROTEIRO_HYPE = """
     IMPORTANTE: O texto deve ser conversacional, direto e sem enrolação.
     """
 
+PROMPT_REESCRITA_VIRAL = """
+    Você é um Estrategista de Conteúdo Viral e Copywriter de Elite.
+    
+    CONTEXTO:
+    Estamos analisando um vídeo que viralizou no Instagram.
+    Seu objetivo NÃO é copiar o conteúdo, mas roubar a "Estrutura Lógica" e a "Psicologia" dele para criar um novo roteiro sobre o tema: "{tema}".
+
+    DADOS DO VÍDEO VIRAL (ORIGEM):
+    - Gancho que funcionou: "{gancho}"
+    - Conteúdo falado: "{transcricao}" (Resumo)
+
+    SUA MISSÃO:
+    1. Identifique o GATILHO MENTAL do viral (Foi medo? Curiosidade? "Você está fazendo errado"? Promessa de ganho fácil?).
+    2. Crie um NOVO ROTEIRO sobre "{tema}" usando exatamente esse mesmo gatilho, mas com palavras e exemplos diferentes.
+    
+    ESTRATÉGIA: (Explique em 1 frase).
+    NOVO GANCHO (0-3s): (Curto e polêmico).
+    DESENVOLVIMENTO: (Ensine sobre {tema}).
+    FINALIZAÇÃO: (Use exatamente: "{cta}").
+    """
+
 SYSTEM_PROMPT_TEMPESTADE = """
 VOCÊ É: Um Estrategista de Conteúdo Viral e Analista de Atenção.
 SUA MISSÃO: Analisar o CONTEÚDO BASE e Gerar estruturas de conteúdo validadas psicologicamente.
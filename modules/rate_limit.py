@@ -0,0 +1,226 @@
+# modules/rate_limit.py
+"""
+Agendador compartilhado (por processo) das chamadas à Groq e ao Gemini.
+
+Todo mundo usa a mesma chave, então os limites da conta (requisições/min,
+tokens/min e segundos de áudio/hora) são controlados aqui com token buckets
+por modelo. Quem estoura o limite espera na fila (ordem de chegada) em vez de
+tomar 429; se o 429 vier mesmo assim, o modelo inteiro pausa pelo retry-after.
+"""
+import collections
+import threading
+import time
+
+from modules import prompt_budget, tracing
+
+# Limites por modelo (ajuste conforme o plano da conta). None = sem limite nessa dimensão.
+LIMITES = {
+    "whisper-large-v3": {"rpm": 20, "tpm": None, "audio_s_hora": 7200},
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000, "audio_s_hora": None},
+    "gemini-2.5-pro": {"rpm": 5, "tpm": 250000, "audio_s_hora": None},
+}
+LIMITE_PADRAO = {"rpm": 30, "tpm": None, "audio_s_hora": None}
+
+TENTATIVAS_429 = 5
+ESPERA_PADRAO_429 = 5.0      # quando o erro não traz retry-after
+AUDIO_MINIMO_S = 10          # a Groq cobra no mínimo 10 s por requisição de áudio
+BYTES_POR_SEGUNDO_AUDIO = 8000  # estimativa (~64 kbps) quando não sabemos a duração
+
+
+class Balde:
+    """Token bucket: `capacidade` fichas, repostas a `por_segundo`."""
+
+    def __init__(self, capacidade, por_segundo):
+        self.capacidade = float(capacidade)
+        self.por_segundo = float(por_segundo)
+        self.fichas = float(capacidade)
+        self.ultimo = time.monotonic()
+
+    def _repor(self, agora):
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.ultimo) * self.por_segundo)
+        self.ultimo = agora
+
+    def espera(self, quantidade, agora):
+        """Segundos até haver `quantidade` fichas (custos maiores que o balde esperam ele encher)."""
+        self._repor(agora)
+        falta = min(quantidade, self.capacidade) - self.fichas
+        return max(0.0, falta / self.por_segundo)
+
+    def consumir(self, quantidade, agora):
+        self._repor(agora)
+        self.fichas -= quantidade  # pode ficar negativo: a dívida atrasa as próximas chamadas
+
+
+class Limitador:
+    """Fila FIFO + baldes de um modelo."""
+
+    def __init__(self, modelo, rpm=None, tpm=None, audio_s_hora=None):
+        self.modelo = modelo
+        self.baldes = {}
+        if rpm:
+            self.baldes["requisicoes"] = Balde(rpm, rpm / 60)
+        if tpm:
+            self.baldes["tokens"] = Balde(tpm, tpm / 60)
+        if audio_s_hora:
+            self.baldes["audio_s"] = Balde(audio_s_hora, audio_s_hora / 3600)
+        self._cond = threading.Condition()
+        self._fila = collections.deque()
+        self._pausado_ate = 0.0
+
+    def adquirir(self, custos):
+        """Bloqueia até a chamada caber nos limites. Só o primeiro da fila pode passar."""
+        ticket = object()
+        with self._cond:
+            self._fila.append(ticket)
+            try:
+                while True:
+                    espera = None
+                    if self._fila[0] is ticket:
+                        agora = time.monotonic()
+                        espera = max(
+                            [self._pausado_ate - agora]
+                            + [b.espera(custos.get(nome, 0), agora) for nome, b in self.baldes.items()]
+                        )
+                        if espera <= 0:
+                            for nome, balde in self.baldes.items():
+                                balde.consumir(custos.get(nome, 0), agora)
+                            return
+                    self._cond.wait(espera)
+            finally:
+                self._fila.remove(ticket)
+                self._cond.notify_all()
+
+    def ajustar(self, nome, diferenca):
+        """Corrige um custo estimado depois da resposta (positivo cobra, negativo devolve)."""
+        balde = self.baldes.get(nome)
+        if balde is None or not diferenca:
+            return
+        with self._cond:
+            balde.consumir(diferenca, time.monotonic())
+            self._cond.notify_all()
+
+    def pausar(self, segundos):
+        """429 recebido: ninguém chama este modelo pelos próximos `segundos`."""
+        with self._cond:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self._cond.notify_all()
+
+    def profundidade(self):
+        return len(self._fila)
+
+
+_limitadores = {}
+_lock = threading.Lock()
+
+
+def limitador(modelo):
+    with _lock:
+        lim = _limitadores.get(modelo)
+        if lim is None:
+            lim = Limitador(modelo, **LIMITES.get(modelo, LIMITE_PADRAO))
+            _limitadores[modelo] = lim
+        return lim
+
+
+def profundidade_filas():
+    """{modelo: chamadas esperando} — para mostrar na interface."""
+    with _lock:
+        return {modelo: lim.profundidade() for modelo, lim in _limitadores.items()}
+
+
+# --- ESTIMATIVAS DE CUSTO ---
+
+def estimar_tokens(texto):
+    """Estimativa grosseira (~4 caracteres por token)."""
+    return len(texto or "") // 4 + 1
+
+
+def estimar_tokens_mensagens(mensagens, max_tokens=1024, modelo=None):
+    """Prompt + resposta máxima (o TPM da Groq conta os dois)."""
+    if modelo:
+        entrada = sum(prompt_budget.contar_tokens(m.get("content"), modelo) for m in mensagens)
+    else:
+        entrada = sum(estimar_tokens(m.get("content")) for m in mensagens)
+    return entrada + max_tokens
+
+
+def estimar_segundos_audio(conteudo, duracao_s=None):
+    segundos = duracao_s if duracao_s else len(conteudo) / BYTES_POR_SEGUNDO_AUDIO
+    return max(AUDIO_MINIMO_S, segundos)
+
+
+# --- EXECUÇÃO ---
+
+def uso_tokens(resposta):
+    """(tokens de entrada, tokens de saída) informados pela API, ou None (ex.: streaming)."""
+    uso = getattr(resposta, "usage", None)  # Groq / OpenAI
+    if uso is not None and getattr(uso, "prompt_tokens", None) is not None:
+        return uso.prompt_tokens, getattr(uso, "completion_tokens", None)
+    meta = getattr(resposta, "usage_metadata", None)  # Gemini
+    if meta is not None and getattr(meta, "prompt_token_count", None) is not None:
+        return meta.prompt_token_count, getattr(meta, "candidates_token_count", None)
+    return None
+
+
+def _retry_after(erro):
+    """
+    Segundos a esperar se `erro` for de limite (429), senão None. Decide pelo tipo
+    ou pelo status HTTP da exceção do SDK, nunca pelo texto (IDs e URLs podem ter "429").
+    """
+    resposta = getattr(erro, "response", None)
+    status = (
+        getattr(erro, "status_code", None) or getattr(resposta, "status_code", None)
+        or getattr(erro, "code", None)
+    )
+    if status != 429 and type(erro).__name__ not in ("RateLimitError", "ResourceExhausted"):
+        return None
+    cabecalho = getattr(resposta, "headers", None) or {}
+    try:
+        return float(cabecalho.get("retry-after"))
+    except (TypeError, ValueError):
+        return ESPERA_PADRAO_429
+
+
+def chamar(modelo, funcao, tokens=0, audio_s=0):
+    """
+    Executa `funcao()` respeitando os limites do modelo. Em 429, pausa o modelo
+    pelo retry-after e tenta de novo (até TENTATIVAS_429 vezes).
+    """
+    lim = limitador(modelo)
+    custos = {"requisicoes": 1, "tokens": tokens, "audio_s": audio_s}
+    categoria = "gemini" if modelo.startswith("gemini") else "groq"
+    for tentativa in range(TENTATIVAS_429):
+        with tracing.span(f"fila:{modelo}", fila=lim.profundidade()):
+            lim.adquirir(custos)
+        try:
+            with tracing.span(f"{categoria}:{modelo}", tentativa=tentativa + 1, tokens_estimados=tokens) as registro:
+                resposta = funcao()
+                uso = uso_tokens(resposta)
+                if registro is not None and uso is not None:
+                    registro["atributos"].update(tokens_entrada=uso[0], tokens_saida=uso[1])
+                return resposta
+        except Exception as e:
+            espera = _retry_after(e)
+            if espera is None or tentativa == TENTATIVAS_429 - 1:
+                raise
+            lim.pausar(espera * (1 + tentativa * 0.5))
+
+
+def chat_groq(client, **kwargs):
+    """client.chat.completions.create(...) passando pelo agendador (TPM corrigido pelo `usage`)."""
+    modelo = kwargs["model"]
+    mensagens = kwargs.get("messages", [])
+    estimado = estimar_tokens_mensagens(mensagens, kwargs.get("max_tokens") or 1024, modelo)
+    resposta = chamar(modelo, lambda: client.chat.completions.create(**kwargs), tokens=estimado)
+    uso = getattr(resposta, "usage", None)
+    if uso is not None and getattr(uso, "total_tokens", None):
+        limitador(modelo).ajustar("tokens", uso.total_tokens - estimado)
+    contagem = uso_tokens(resposta)
+    if contagem is not None:
+        # Próximas estimativas (e orçamentos de prompt) usam a contagem real do tokenizador.
+        # A resposta já foi paga: um `usage` fora do esperado não pode derrubar a chamada.
+        try:
+            prompt_budget.calibrar(modelo, sum(len(m.get("content") or "") for m in mensagens), contagem[0])
+        except Exception:
+            pass
+    return resposta
@@ -0,0 +1,228 @@
+# modules/similaridade.py
+"""
+Quase-duplicados (repost do mesmo Reels, outro corte do mesmo vídeo com ID novo),
+detectados antes de gastar download, Whisper e Llama na Pag 01.
+
+- Legenda: MinHash (64 permutações) sobre trios de palavras normalizadas, sem
+  hashtags/menções (que se repetem em todos os posts do perfil). O LSH (16 bandas
+  de 4) no SQLite local traz os candidatos e a similaridade de Jaccard estimada
+  aponta o mais parecido. Legenda parecida é só suspeita: o mesmo parágrafo de CTA
+  em todo post já passa do limiar, então quem confirma é o áudio. Legendas curtas
+  demais não entram (templates tipo "link na bio").
+- Áudio: impressão digital dos primeiros segundos. Energia do espectro (FFT) em
+  33 bandas por quadro; cada bit diz se a diferença entre bandas vizinhas subiu ou
+  desceu em relação ao quadro anterior. Dois áudios são o mesmo quando a fração de
+  bits diferentes fica abaixo do limiar, tolerando um pequeno deslocamento no início.
+
+As assinaturas dos conteúdos processados ficam em local_store (tabelas assinaturas
+e lsh_legendas); IndiceDuplicatas as consulta durante um job.
+"""
+import re
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+from modules import local_store, tracing
+from modules.audio import pcm_mono
+
+# Transcrição de um quase-duplicado gravado com o resultado do original
+MARCA_DUPLICADO = "[Duplicado de {id}] "
+
+# --- LEGENDAS (MinHash / LSH) ---
+
+N_PERMUTACOES = 64
+BANDAS, LINHAS_BANDA = 16, 4        # limiar efetivo do LSH ~ (1/16)^(1/4) = 0,5
+TAMANHO_SHINGLE = 3
+MIN_SHINGLES = 8                    # ~10 palavras
+LIMIAR_LEGENDA = 0.7                # uma palavra a mais já derruba 3 trios; legendas distintas ficam perto de 0
+_PRIMO = np.uint64(4294967291)      # maior primo < 2^32: com a, b, h < _PRIMO, a * h + b < 2^64 (sem overflow)
+
+_rng = np.random.default_rng(21)    # semente fixa: assinaturas comparáveis entre execuções
+_A = _rng.integers(1, int(_PRIMO), N_PERMUTACOES, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIMO), N_PERMUTACOES, dtype=np.uint64)
+
+_RUIDO_LEGENDA = re.compile(r"https?://\S+|[#@][\w.]+")
+_PALAVRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    texto = _RUIDO_LEGENDA.sub(" ", (texto or "").lower())
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return _PALAVRA.findall(texto)
+
+
+def minhash(legenda):
+    """Assinatura (uint32[N_PERMUTACOES]) da legenda, ou None se for curta demais."""
+    palavras = normalizar(legenda)
+    shingles = {
+        zlib.crc32(" ".join(palavras[i:i + TAMANHO_SHINGLE]).encode())
+        for i in range(len(palavras) - TAMANHO_SHINGLE + 1)
+    }
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    h = np.fromiter(shingles, dtype=np.uint64, count=len(shingles)) % _PRIMO
+    return ((_A[:, None] * h[None, :] + _B[:, None]) % _PRIMO).min(axis=1).astype(np.uint32)
+
+
+def bandas_lsh(assinatura):
+    """[(banda, chave)]: conteúdos com alguma chave igual viram candidatos."""
+    return [
+        (b, zlib.crc32(assinatura[b * LINHAS_BANDA:(b + 1) * LINHAS_BANDA].tobytes()))
+        for b in range(BANDAS)
+    ]
+
+
+def jaccard(a, b):
+    return float(np.mean(a == b))
+
+
+# --- ÁUDIO (impressão digital) ---
+
+SEGUNDOS_AUDIO = 8
+TAXA_AUDIO = 8000
+QUADRO, PASSO = 2048, 512
+N_BANDAS_AUDIO = 33                 # 32 diferenças -> 1 uint32 por quadro
+FAIXA_HZ = (300, 3000)              # onde está a voz (e o grosso da música)
+N_QUADROS = (SEGUNDOS_AUDIO * TAXA_AUDIO - QUADRO) // PASSO  # quadros - 1 (cada bit compara com o anterior)
+DESLOCAMENTO_MAX = 8                # quadros (~0,5 s): cortes que começam um pouco antes/depois
+LIMIAR_AUDIO = 0.25                 # fração de bits diferentes (áudios sem relação ficam ~0,5)
+RMS_MIN = 100                       # abaixo disso é silêncio: não dá para comparar
+
+# Matriz (bins da FFT x bandas) que soma a energia de cada banda; bins fora da faixa ficam zerados
+_banda_do_bin = np.digitize(np.fft.rfftfreq(QUADRO, 1 / TAXA_AUDIO), np.geomspace(*FAIXA_HZ, N_BANDAS_AUDIO + 1)) - 1
+_soma_bandas = (_banda_do_bin[:, None] == np.arange(N_BANDAS_AUDIO)[None, :]).astype(np.float32)
+_janela = np.hanning(QUADRO).astype(np.float32)
+_pesos_bits = (np.uint64(1) << np.arange(32, dtype=np.uint64))
+
+
+def digital_de_pcm(pcm):
+    """PCM 16-bit mono (TAXA_AUDIO) -> uint32[N_QUADROS], ou None (curto demais / silêncio)."""
+    x = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    if len(x) < SEGUNDOS_AUDIO * TAXA_AUDIO or np.sqrt(np.mean(x ** 2)) < RMS_MIN:
+        return None
+    quadros = np.lib.stride_tricks.sliding_window_view(x[:SEGUNDOS_AUDIO * TAXA_AUDIO], QUADRO)[::PASSO]
+    energia = (np.abs(np.fft.rfft(quadros * _janela, axis=1)) ** 2) @ _soma_bandas
+    diferenca = energia[:, :-1] - energia[:, 1:]
+    bits = (diferenca[1:] - diferenca[:-1]) > 0
+    return (bits.astype(np.uint64) * _pesos_bits).sum(axis=1).astype(np.uint32)[:N_QUADROS]
+
+
+def digital_audio(caminho):
+    return digital_de_pcm(pcm_mono(caminho, SEGUNDOS_AUDIO, TAXA_AUDIO))
+
+
+def distancias_audio(digital, matriz):
+    """Menor fração de bits diferentes entre `digital` e cada linha de `matriz`, em qualquer deslocamento."""
+    melhor = np.ones(len(matriz))
+    for d in range(-DESLOCAMENTO_MAX, DESLOCAMENTO_MAX + 1):
+        a = digital[max(d, 0):N_QUADROS + min(d, 0)]
+        b = matriz[:, max(-d, 0):N_QUADROS + min(-d, 0)]
+        erros = np.bitwise_count(a[None, :] ^ b).sum(axis=1) / (32 * len(a))
+        melhor = np.minimum(melhor, erros)
+    return melhor
+
+
+# --- ÍNDICE USADO PELO JOB ---
+
+class IndiceDuplicatas:
+    """
+    Conteúdos já processados de uma aba + os reservados pelo job em andamento.
+    Uma reserva tem a `ordem` do item no job: só itens posteriores podem se
+    vincular a ela (os resultados são gravados nessa ordem).
+    """
+
+    def __init__(self, aba="instagram"):
+        self.aba = aba
+        self._lock = threading.Lock()
+        self._legendas_job = []     # (ordem, id, assinatura)
+        self._audios_job = []       # (ordem, id, digital)
+        self._ids_audio, self._matriz = [], np.zeros((0, N_QUADROS), dtype=np.uint32)
+
+    @tracing.rastrear("similaridade:carregar")
+    def carregar(self):
+        """Indexa as legendas da réplica ainda sem assinatura e carrega as digitais de áudio."""
+        assinados = local_store.ids_assinados(self.aba)
+        novos = 0
+        for linha in local_store.linhas_da_aba(self.aba):
+            id_unico = str(linha[local_store.COL_ID]) if linha else ""
+            if not id_unico or id_unico in assinados or not _processado(linha):
+                continue
+            # Legenda curta também é gravada (sem assinatura) para não ser recalculada a cada job
+            self.registrar(id_unico, minhash(_legenda(linha, self.aba)), vazio=True)
+            assinados.add(id_unico)
+            novos += 1
+        registros = local_store.digitais_audio(self.aba)
+        self._ids_audio = [r[0] for r in registros]
+        if registros:
+            self._matriz = np.stack([np.frombuffer(r[1], dtype=np.uint32) for r in registros])
+        return novos
+
+    def legenda_parecida(self, legenda, ordem):
+        """((id_candidato, similaridade) ou None, assinatura calculada). Candidato, não duplicata."""
+        assinatura = minhash(legenda)
+        if assinatura is None:
+            return None, None
+        candidatos = {
+            id_unico: np.frombuffer(blob, dtype=np.uint32)
+            for id_unico, blob in local_store.candidatos_legenda(self.aba, bandas_lsh(assinatura)).items()
+        }
+        with self._lock:
+            candidatos.update({id_unico: sig for o, id_unico, sig in self._legendas_job if o < ordem})
+        melhor = max(((jaccard(assinatura, sig), id_unico) for id_unico, sig in candidatos.items()), default=None)
+        if melhor and melhor[0] >= LIMIAR_LEGENDA:
+            return (melhor[1], melhor[0]), assinatura
+        return None, assinatura
+
+    @tracing.rastrear("similaridade:audio")
+    def audio_duplicado(self, caminho, ordem):
+        """((id_original, fração de bits diferentes) ou None, digital calculada)."""
+        digital = digital_audio(caminho)
+        if digital is None:
+            return None, None
+        with self._lock:
+            ids = self._ids_audio + [i for o, i, _ in self._audios_job if o < ordem]
+            extras = [d for o, _, d in self._audios_job if o < ordem]
+        matriz = np.vstack([self._matriz] + [d[None, :] for d in extras]) if extras else self._matriz
+        if not len(matriz):
+            return None, digital
+        distancias = distancias_audio(digital, matriz)
+        i = int(np.argmin(distancias))
+        if distancias[i] <= LIMIAR_AUDIO:
+            return (ids[i], float(distancias[i])), digital
+        return None, digital
+
+    def reservar(self, ordem, id_unico, assinatura=None, digital=None):
+        """Torna o item visível para os próximos do mesmo job (antes de estar gravado)."""
+        with self._lock:
+            if assinatura is not None:
+                self._legendas_job.append((ordem, id_unico, assinatura))
+            if digital is not None:
+                self._audios_job.append((ordem, id_unico, digital))
+
+    def registrar(self, id_unico, assinatura=None, digital=None, vazio=False):
+        """Grava as assinaturas de um conteúdo processado com sucesso."""
+        if assinatura is None and digital is None and not vazio:
+            return
+        local_store.salvar_assinatura(
+            self.aba, id_unico,
+            assinatura.tobytes() if assinatura is not None else None,
+            bandas_lsh(assinatura) if assinatura is not None else (),
+            digital.tobytes() if digital is not None else None,
+        )
+
+
+def _legenda(linha, aba):
+    indice = 10 if aba == "instagram" else 9
+    return linha[indice] if len(linha) > indice else ""
+
+
+def transcricao_valida(transcricao):
+    """Só vale vincular a conteúdos com transcrição de verdade (não erro, não 'salvo sem IA', não cópia)."""
+    transcricao = str(transcricao or "")
+    return bool(transcricao.strip()) and not transcricao.startswith(("Erro", MARCA_DUPLICADO.split("{")[0]))
+
+
+def _processado(linha):
+    return transcricao_valida(linha[local_store.COL_TRANSCRICAO] if len(linha) > local_store.COL_TRANSCRICAO else "")
@@ -0,0 +1,214 @@
+# modules/tracing.py
+"""
+Medição leve de tempo por etapa (spans aninhados) dentro de uma execução.
+
+    with tracing.execucao("viral_analyzer", id=job_id):
+        with tracing.span("apify:run", perfis=3):
+            ...
+
+Fora de uma execução os spans não custam nada (não gravam). O span atual fica
+num contextvar, então o aninhamento funciona por thread; para threads criadas
+dentro da execução, embrulhe a função com `propagar()`.
+
+As execuções recentes ficam em memória (por processo) para o painel da sidebar
+e podem ser exportadas em JSON lines.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MAX_EXECUCOES = 30
+MAX_SPANS = 5000
+
+_execucao = contextvars.ContextVar("tracing_execucao", default=None)
+_span_pai = contextvars.ContextVar("tracing_span_pai", default=None)
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_execucoes = OrderedDict()  # id -> Execucao (as mais antigas saem primeiro)
+
+
+class Execucao:
+    def __init__(self, nome, id=None):
+        self.id = id or uuid.uuid4().hex
+        self.nome = nome
+        self.criada_em = time.time()
+        self.t0 = time.perf_counter()
+        self.duracao = None
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def adicionar(self, span):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(span)
+
+    def spans_ordenados(self):
+        with self._lock:
+            return sorted(self.spans, key=lambda s: s["inicio"])
+
+
+def _registrar(execucao):
+    with _lock:
+        _execucoes[execucao.id] = execucao
+        _execucoes.move_to_end(execucao.id)
+        while len(_execucoes) > MAX_EXECUCOES:
+            _execucoes.popitem(last=False)
+
+
+def obter_execucao(id):
+    with _lock:
+        return _execucoes.get(id)
+
+
+def execucoes_recentes():
+    with _lock:
+        return list(reversed(_execucoes.values()))
+
+
+@contextmanager
+def execucao(nome, id=None):
+    """Abre uma execução: todos os spans deste contexto (e das threads propagadas) vão para ela."""
+    ex = Execucao(nome, id)
+    _registrar(ex)
+    token_ex = _execucao.set(ex)
+    token_pai = _span_pai.set(None)
+    try:
+        yield ex
+    finally:
+        ex.duracao = time.perf_counter() - ex.t0
+        _span_pai.reset(token_pai)
+        _execucao.reset(token_ex)
+
+
+@contextmanager
+def span(nome, **atributos):
+    """Mede o bloco. `nome` usa "categoria:detalhe" (ex.: "groq:whisper", "ffmpeg:extrair")."""
+    ex = _execucao.get()
+    if ex is None:
+        yield None
+        return
+    registro = {
+        "id": next(_ids),
+        "pai": _span_pai.get(),
+        "nome": nome,
+        "inicio": time.perf_counter() - ex.t0,
+        "duracao": None,
+        "thread": threading.current_thread().name,
+        "atributos": atributos,
+    }
+    token = _span_pai.set(registro["id"])
+    try:
+        yield registro
+    except BaseException as e:
+        registro["erro"] = f"{type(e).__name__}: {e}"[:300]
+        raise
+    finally:
+        registro["duracao"] = time.perf_counter() - ex.t0 - registro["inicio"]
+        _span_pai.reset(token)
+        ex.adicionar(registro)
+
+
+def rastrear(nome):
+    """Decorador: cada chamada da função vira um span."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with span(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def propagar(funcao):
+    """Faz `funcao` rodar (em outra thread) dentro da execução/span atuais."""
+    contexto = contextvars.copy_context()
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        # Cópia por chamada: o mesmo Context não pode estar ativo em duas threads
+        return contexto.copy().run(funcao, *args, **kwargs)
+    return envolvida
+
+
+# --- EXPORTAÇÃO E PAINEL ---
+
+def exportar_jsonl(execucao):
+    """Uma linha JSON por span (tempos em segundos desde o início da execução)."""
+    linhas = []
+    for s in execucao.spans_ordenados():
+        linhas.append(json.dumps(
+            {"execucao": execucao.id, "nome_execucao": execucao.nome, "criada_em": execucao.criada_em, **s},
+            ensure_ascii=False, default=str,
+        ))
+    return "\n".join(linhas) + "\n"
+
+
+def _profundidades(spans):
+    por_id = {s["id"]: s for s in spans}
+    cache = {}
+
+    def prof(s):
+        if s["id"] not in cache:
+            pai = por_id.get(s["pai"])
+            cache[s["id"]] = 0 if pai is None else prof(pai) + 1
+        return cache[s["id"]]
+    return {s["id"]: prof(s) for s in spans}
+
+
+def painel(execucao, max_barras=200):
+    """Cascata (waterfall) + tabela resumo + exportação, no container Streamlit atual."""
+    import altair as alt
+    import pandas as pd
+    import streamlit as st
+
+    spans = [s for s in execucao.spans_ordenados() if s["duracao"] is not None]
+    if not spans:
+        st.caption("Nenhuma etapa medida ainda.")
+        return
+    prof = _profundidades(spans)
+    df = pd.DataFrame([{
+        "ordem": i,
+        "etapa": f"{'· ' * prof[s['id']]}{s['nome']}",
+        "nome": s["nome"],
+        "categoria": s["nome"].split(":", 1)[0],
+        "inicio": s["inicio"],
+        "fim": s["inicio"] + s["duracao"],
+        "duracao": s["duracao"],
+        "thread": s["thread"],
+        "erro": s.get("erro", ""),
+    } for i, s in enumerate(spans)])
+
+    total = execucao.duracao if execucao.duracao is not None else df["fim"].max()
+    st.caption(f"{execucao.nome} · {len(spans)} etapas · {total:.1f}s")
+
+    cascata = df.head(max_barras)
+    grafico = alt.Chart(cascata).mark_bar().encode(
+        x=alt.X("inicio:Q", title="segundos"),
+        x2="fim:Q",
+        y=alt.Y("ordem:O", axis=None),
+        color=alt.Color("categoria:N", legend=alt.Legend(orient="bottom", title=None)),
+        tooltip=["etapa", "thread", alt.Tooltip("duracao:Q", format=".2f"), "erro"],
+    ).properties(height=min(600, 12 * len(cascata) + 40))
+    st.altair_chart(grafico, use_container_width=True)
+
+    resumo = df.groupby("nome").agg(
+        chamadas=("duracao", "size"),
+        total_s=("duracao", "sum"),
+        media_s=("duracao", "mean"),
+        max_s=("duracao", "max"),
+    ).sort_values("total_s", ascending=False)
+    st.dataframe(resumo.round(2), use_container_width=True)
+
+    st.download_button(
+        "⬇️ Exportar (JSONL)",
+        exportar_jsonl(execucao),
+        file_name=f"trace_{execucao.nome}_{execucao.id[:8]}.jsonl",
+        mime="application/jsonl",
+        key=f"exportar_trace_{execucao.id}",
+    )
@@ -0,0 +1,105 @@
+# modules/transcricao_cache.py
+"""
+Cache em disco de transcrições, endereçado pelo conteúdo do áudio.
+
+A chave é o hash (SHA-256) dos bytes do áudio + modelo + idioma, então o mesmo
+áudio reenviado (reel reanalisado, arquivo reupado, URL do YouTube repetida)
+volta na hora, sem gastar cota da API. O tamanho total é limitado e os
+arquivos menos usados recentemente são apagados primeiro (LRU pelo mtime).
+"""
+import hashlib
+import os
+import threading
+
+from modules import tracing
+
+DIR_CACHE = os.path.join(".cache", "transcricoes")
+LIMITE_BYTES = 200 * 1024 * 1024
+
+_lock = threading.Lock()
+_total_estimado = None  # bytes em disco (calculado na 1ª escrita, depois só somado)
+
+
+def chave_transcricao(conteudo, modelo, idioma=None):
+    h = hashlib.sha256()
+    h.update(conteudo)
+    h.update(f"|{modelo}|{idioma or ''}".encode())
+    return h.hexdigest()
+
+
+def _caminho(chave):
+    return os.path.join(DIR_CACHE, chave[:2], chave + ".txt")
+
+
+def obter(chave):
+    """Texto em cache para a chave (ou None). Marca o arquivo como usado agora."""
+    caminho = _caminho(chave)
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            texto = f.read()
+        os.utime(caminho, None)
+        return texto
+    except OSError:
+        return None
+
+
+def guardar(chave, texto):
+    caminho = _caminho(chave)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temp = f"{caminho}.{threading.get_ident()}.tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(temp, caminho)  # escrita atômica
+
+    global _total_estimado
+    with _lock:
+        if _total_estimado is not None:
+            _total_estimado += os.path.getsize(caminho)
+        precisa_podar = _total_estimado is None or _total_estimado > LIMITE_BYTES
+    if precisa_podar:
+        _podar()
+
+
+def _podar():
+    """Apaga os arquivos menos usados até o cache caber em LIMITE_BYTES."""
+    global _total_estimado
+    with _lock:
+        arquivos = []
+        total = 0
+        for raiz, _, nomes in os.walk(DIR_CACHE):
+            for nome in nomes:
+                if not nome.endswith(".txt"): continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except OSError:
+                    continue
+                arquivos.append((st.st_mtime, st.st_size, caminho))
+                total += st.st_size
+        if total > LIMITE_BYTES:
+            for _, tamanho, caminho in sorted(arquivos):
+                try:
+                    os.remove(caminho)
+                    total -= tamanho
+                except OSError:
+                    pass
+                if total <= LIMITE_BYTES:
+                    break
+        _total_estimado = total
+
+
+def transcrever_com_cache(conteudo, modelo, idioma, transcrever):
+    """
+    Retorna a transcrição do áudio `conteudo` (bytes). Só chama `transcrever()`
+    se não houver no cache; erros não são cacheados.
+    """
+    with tracing.span("cache:transcricao", bytes=len(conteudo)) as registro:
+        chave = chave_transcricao(conteudo, modelo, idioma)
+        texto = obter(chave)
+        if registro is not None:
+            registro["atributos"]["acerto"] = texto is not None
+        if texto is not None:
+            return texto
+        texto = transcrever()
+        guardar(chave, texto)
+        return texto
@@ -1,10 +1,15 @@
 import streamlit as st
-import google.generativeai as genai
-from groq import Groq
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from modules import clients, rate_limit, tracing
 from modules.prompts import PROMPT_GERADOR_LISTA_HYPE, PROMPT_ROTEIRO_HYPE
 
+MODELO_GEMINI = 'gemini-2.5-pro'
+MODELO_LLAMA = "llama-3.3-70b-versatile"
+# Roteiros em paralelo no "Escrever todos" (o rate_limit segura o ritmo real)
+WORKERS_ROTEIROS = 4
+
 def limpar_json(texto):
     """Remove markdown ```json e ``` para evitar erros de parse"""
     texto = texto.replace("```json", "").replace("```", "")
@@ -13,12 +18,8 @@ def limpar_json(texto):
 def configurar_gemini():
     """Configura a API do Gemini de forma segura"""
     try:
-        # Tenta pegar a chave específica, se não der, tenta a genérica
-        api_key = st.secrets["gemini"].get("api_marcio") or st.secrets["gemini"].get("api_key")
-        if not api_key:
-            st.error("Chave Gemini não encontrada no secrets.")
-            return False
-        genai.configure(api_key=api_key)
+        # Configura uma vez por processo (chave específica, se não der, a genérica)
+        clients.gemini()
         return True
     except Exception as e:
         st.error(f"Erro config Gemini: {e}")
@@ -29,7 +30,7 @@ def gerar_hypes_gemini(nicho, janela, tom, obs):
     if not configurar_gemini(): return []
     
     # Modelo mais rápido e barato para listas
-    model = genai.GenerativeModel('gemini-2.5-pro') 
+    model = clients.gemini().GenerativeModel(MODELO_GEMINI) 
     data_hoje = datetime.now().strftime("%d/%m/%Y")
     
     # --- AQUI ESTAVA O ERRO ---
@@ -43,7 +44,11 @@ def gerar_hypes_gemini(nicho, janela, tom, obs):
     )
     
     try:
-        response = model.generate_content(prompt_final)
+        response = rate_limit.chamar(
+            MODELO_GEMINI,
+            lambda: model.generate_content(prompt_final),
+            tokens=rate_limit.estimar_tokens(prompt_final) + 4096,
+        )
         texto_limpo = limpar_json(response.text)
         return json.loads(texto_limpo)
     except Exception as e:
@@ -53,7 +58,7 @@ def gerar_hypes_gemini(nicho, janela, tom, obs):
 def escrever_roteiro_groq(pauta, nicho, tom, obs):
     """Usa Llama 3 (Groq) para escrever o roteiro final"""
     if "groq" in st.secrets:
-        client = Groq(api_key=st.secrets["groq"]["api_key"])
+        client = clients.groq_client()
     else:
         st.error("Chave Groq não configurada.")
         return "Erro de configuração."
@@ -68,12 +73,68 @@ def escrever_roteiro_groq(pauta, nicho, tom, obs):
     )
     
     try:
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        completion = rate_limit.chat_groq(
+            client,
+            model=MODELO_LLAMA,
             messages=[{"role": "user", "content": prompt_final}],
             temperature=0.7 
         )
         return completion.choices[0].message.content
     except Exception as e:
         return f"Erro na Groq: {e}"
-    
\ No newline at end of file
+
+class ErroRoteiro(Exception):
+    """A geração em streaming falhou (o texto parcial já exibido não é um roteiro)."""
+
+def escrever_roteiro_groq_stream(pauta, nicho, tom, obs):
+    """
+    Mesma geração de escrever_roteiro_groq, mas entrega o texto em pedaços (para st.write_stream).
+    Em erro levanta ErroRoteiro em vez de emitir o texto do erro, para não ser guardado como roteiro.
+    """
+    if "groq" not in st.secrets:
+        raise ErroRoteiro("Erro de configuração: chave Groq não configurada.")
+    client = clients.groq_client()
+
+    prompt_final = PROMPT_ROTEIRO_HYPE.format(
+        nicho=nicho,
+        obs=obs,
+        tom=tom,
+        titulo=pauta['titulo'],
+        hype=pauta['hype'],
+        gancho=pauta['gancho']
+    )
+
+    try:
+        stream = rate_limit.chat_groq(
+            client,
+            model=MODELO_LLAMA,
+            messages=[{"role": "user", "content": prompt_final}],
+            temperature=0.7,
+            stream=True
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except Exception as e:
+        raise ErroRoteiro(f"Erro na Groq: {e}") from e
+
+
+def chave_roteiro(pauta, nicho, tom, obs):
+    """O roteiro depende da pauta e das opções da sidebar: muda qualquer uma, é outro roteiro."""
+    return (pauta.get('titulo'), pauta.get('hype'), pauta.get('gancho'), nicho, tom, obs)
+
+def roteiro_valido(texto):
+    return bool(texto) and not texto.startswith(("Erro na Groq", "Erro de configuração"))
+
+def escrever_roteiros_groq(pautas, nicho, tom, obs, max_workers=WORKERS_ROTEIROS):
+    """Escreve o roteiro de várias pautas ao mesmo tempo. Gera (pauta, texto) conforme cada um termina."""
+    if not pautas:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pautas)), thread_name_prefix="roteiro") as pool:
+        futuros = {
+            pool.submit(tracing.propagar(escrever_roteiro_groq), pauta, nicho, tom, obs): pauta
+            for pauta in pautas
+        }
+        for futuro in as_completed(futuros):
+            yield futuros[futuro], futuro.result()
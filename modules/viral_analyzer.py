@@ -0,0 +1,358 @@
+# modules/viral_analyzer.py
+"""
+Execução do Viral Analyzer (Pag 01) como job em segundo plano (ver modules/jobs.py).
+
+A página só envia os parâmetros e acompanha o progresso; coleta, pipeline de IA
+e gravação no banco rodam aqui, fora da sessão do Streamlit.
+"""
+import itertools
+import os
+from datetime import datetime
+
+from modules import jobs, local_store, similaridade, tracing
+from modules.database import (
+    conectar_sheets, carregar_ids_existentes, salvar_linha_instagram, obter_buffer_escrita, atualizar_transcricao,
+)
+from modules.instagram import pegar_dados_apify, pegar_dados_apify_lote, baixar_video_with_retry, baixar_audio_video
+from modules.ai_processor import extrair_audio_video, transcrever_whisper_groq, analisar_gancho_groq
+from modules.pipeline import executar_pipeline, LogEtapa
+
+TIPO_JOB = jobs.TIPO_VIRAL_ANALYZER
+TIPO_JOB_COMPLETA = jobs.TIPO_TRANSCRICAO_COMPLETA
+
+# Modo gancho: a transcrição salva é só do começo do vídeo (até a completa chegar)
+MARCA_GANCHO = "[Primeiros {segundos}s] "
+
+# Quase-duplicados (modules/similaridade.py): grava com o resultado do original ou nem grava
+DUPLICATAS_VINCULAR, DUPLICATAS_PULAR = "vincular", "pular"
+
+# --- ESTÁGIOS DO PIPELINE ---
+# Cada estágio recebe o contexto do vídeo, faz UMA coisa e devolve o contexto.
+# Rodam em threads, então NÃO chamam st.* direto: escrevem no LogEtapa do item.
+
+def etapa_download(ctx):
+    if not ctx["analisar"]: return ctx
+    if ctx["duracao_max"]:
+        # Modo gancho: o vídeo vai direto para o ffmpeg, que para no segundo N (o download junto)
+        ctx["log"].write(f"⬇️ Baixando só os primeiros {ctx['duracao_max']}s...")
+        try:
+            ctx["caminho_audio"] = baixar_audio_video(
+                ctx["video"]['download_url'], os.path.splitext(ctx["caminho_video"])[0], ctx["duracao_max"],
+                container_log=ctx["log"],
+            )
+        except Exception:
+            ctx["erro"] = "Erro Download"
+        return ctx
+    ctx["log"].write("⬇️ Baixando...")
+    if not baixar_video_with_retry(ctx["video"]['download_url'], ctx["caminho_video"]):
+        ctx["erro"] = "Erro Download"
+    return ctx
+
+def etapa_audio(ctx):
+    if not ctx["analisar"] or ctx["caminho_audio"]: return ctx
+    ctx["log"].write("🔊 Extraindo áudio...")
+    try:
+        ctx["caminho_audio"] = extrair_audio_video(ctx["caminho_video"])
+    except Exception as e:
+        ctx["erro"] = f"Erro áudio: {e}"
+    finally:
+        if os.path.exists(ctx["caminho_video"]): os.remove(ctx["caminho_video"])
+    return ctx
+
+def _audio_duplicado(ctx):
+    """Compara o início do áudio com o que já foi processado. True = é o mesmo áudio de outro vídeo."""
+    indice = ctx["indice"]
+    if indice is None or ctx.get("erro") or not ctx["caminho_audio"]:
+        return False
+    try:
+        duplicado, ctx["digital"] = indice.audio_duplicado(ctx["caminho_audio"], ctx["ordem"])
+    except Exception:
+        return False  # sem impressão digital o vídeo segue o fluxo normal
+    if duplicado:
+        original, distancia = duplicado
+        ctx["duplicado_de"] = original
+        ctx["log"].write(f"♻️ Mesmo áudio de {original} ({1 - distancia:.0%} igual). Pulando transcrição e análise.")
+        return True
+    if ctx.get("candidato_legenda"):
+        ctx["log"].write(f"🔊 Áudio diferente do de {ctx['candidato_legenda']}: não é duplicata.")
+    indice.reservar(ctx["ordem"], ctx["video"]["pk"], digital=ctx["digital"])
+    return False
+
+def etapa_transcricao(ctx):
+    if not ctx["analisar"]: return ctx
+    try:
+        if _audio_duplicado(ctx):
+            return ctx
+        ctx["log"].write("📝 Transcrevendo (Whisper)...")
+        ctx["ia_data"]["transcricao"] = transcrever_whisper_groq(ctx["caminho_audio"])
+    except Exception as e:
+        ctx["log"].error(f"Erro Groq: {e}")
+        ctx["erro"] = "Erro API"
+    finally:
+        if ctx["caminho_audio"] and os.path.exists(ctx["caminho_audio"]): os.remove(ctx["caminho_audio"])
+    return ctx
+
+def etapa_analise(ctx):
+    if not ctx["analisar"] or ctx["duplicado_de"]: return ctx
+    ctx["log"].write("🧠 Analisando com Llama 3...")
+    try:
+        resultado_ia = analisar_gancho_groq(ctx["ia_data"]["transcricao"])
+        ctx["ia_data"]["ganchos_verbais"] = resultado_ia.get("ganchos_verbais", "-")
+        ctx["ia_data"]["ganchos_visuais"] = resultado_ia.get("ganchos_visuais", "-")
+    except Exception as e:
+        ctx["log"].error(f"Erro Groq: {e}")
+        ctx["ia_data"]["ganchos_verbais"] = "-"
+        ctx["erro"] = "Erro API"
+    return ctx
+
+def montar_estagios(params):
+    return [
+        ("download", etapa_download, params.get("workers_download", 3)),
+        ("audio", etapa_audio, params.get("workers_audio", 2)),
+        ("transcricao", etapa_transcricao, params.get("workers_whisper", 2)),
+        ("analise", etapa_analise, params.get("workers_llama", 2)),
+    ]
+
+
+# --- JOB ---
+
+def _resumo_video(ctx):
+    """O que a página precisa para desenhar o st.status de um vídeo já processado."""
+    v = ctx["video"]
+    if ctx["existente"]:
+        label, estado = f"⏩ [Top {ctx['rank']}] Já existe no banco (ID: {v['pk']})", "complete"
+        log = [("write", "Pulando...")]
+    elif ctx["duplicado_de"]:
+        label, estado = f"♻️ [Top {ctx['rank']}] Quase-duplicado de {ctx['duplicado_de']}", "complete"
+        log = list(ctx["log"].mensagens)
+    elif not ctx["analisar"]:
+        label, estado, log = f"💾 [Top {ctx['rank']}] Salvo sem IA ({v['views']} views)", "complete", []
+    else:
+        log = list(ctx["log"].mensagens)
+        if ctx.get("erro"):
+            label, estado = f"❌ [Top {ctx['rank']}] {ctx['erro']}", "error"
+        else:
+            label, estado = f"✅ [Top {ctx['rank']}] IA Concluída! ({v['views']} views)", "complete"
+    return {"rank": ctx["rank"], "id": v['pk'], "views": v['views'], "label": label, "estado": estado, "log": log}
+
+
+def _dados_do_original(id_original, processados):
+    """(transcrição, ganchos verbais) do original: gravado neste job ou já na réplica local."""
+    if id_original in processados:
+        return processados[id_original]
+    linha = local_store.buscar_por_id("instagram", id_original) or []
+    def celula(i): return str(linha[i]) if len(linha) > i else ""
+    return celula(local_store.COL_TRANSCRICAO), celula(local_store.COL_GANCHO)
+
+
+def _processar_sem_vinculo(ctx, estagios):
+    """O original falhou depois do vínculo: roda os estágios neste vídeo aqui mesmo (ele já saiu do pipeline)."""
+    ctx["log"].write(f"↩️ O original {ctx['duplicado_de']} não foi processado. Processando este vídeo normalmente...")
+    ctx.update(duplicado_de=None, analisar=True, indice=None, caminho_audio="")
+    for nome, funcao, _ in estagios:
+        if ctx.get("erro"):
+            break
+        try:
+            with tracing.span(f"etapa:{nome}", item=ctx["rank"] - 1):
+                ctx = funcao(ctx) or ctx
+        except Exception as e:
+            ctx["erro"] = str(e)
+            ctx["etapa_erro"] = nome
+    return ctx
+
+
+def executar_analise(params, job):
+    perfis = params["perfis"]
+    dias = params["dias"]
+    top_videos = params["top_videos"]
+    top_analise_ia = params["top_analise_ia"]
+    gancho_s = params.get("gancho_s") or None
+    completa_depois = bool(gancho_s and params.get("transcricao_completa_depois"))
+    modo_duplicatas = params.get("duplicatas", DUPLICATAS_VINCULAR)
+
+    job.etapa("Conectando ao banco de dados", 0.0)
+    sheet = conectar_sheets(job)
+    if not sheet:
+        raise RuntimeError("Não foi possível conectar à planilha.")
+
+    # Linhas vão para o buffer e são enviadas em lote (append_rows)
+    buffer = obter_buffer_escrita()
+    ids_existentes = carregar_ids_existentes(sheet, buffer)
+    resultado = {"total_existentes": len(ids_existentes), "perfis": [], "erros_envio": [], "duplicados": 0}
+    job.parcial(resultado)
+
+    # Assinaturas (legenda/áudio) do que já foi processado, para não pagar de novo por reposts
+    indice = None
+    if modo_duplicatas:
+        job.etapa("Indexando conteúdos já processados", 0.0)
+        try:
+            indice = similaridade.IndiceDuplicatas("instagram")
+            indice.carregar()
+        except Exception as e:
+            indice = None
+            job.warning(f"Detecção de quase-duplicados desligada: {e}")
+    ordem = itertools.count()
+    processados = {}  # id -> (transcrição, ganchos) gravados neste job
+
+    timestamp_coleta = datetime.now().strftime("%d/%m/%Y")
+    estagios = montar_estagios(params)
+    para_transcrever_completo = []
+
+    def coletar_perfis():
+        """Gera (perfil, vídeos) — em lote (1 execução da Apify) ou um perfil por vez."""
+        if params.get("modo_lote", True):
+            yield from pegar_dados_apify_lote(perfis, dias, job)
+        else:
+            for perfil in perfis:
+                yield perfil, None
+
+    job.etapa("Coletando posts (Apify)", 0.0)
+    for n_perfil, (perfil, videos) in enumerate(coletar_perfis()):
+        job.verificar_cancelamento()
+        if videos is None:
+            videos = pegar_dados_apify(perfil, dias, job)
+        else:
+            job.info(f"📦 {len(videos)} vídeos recentes de @{perfil}.")
+
+        top_final = sorted(videos or [], key=lambda x: x['views'], reverse=True)[:top_videos]
+        bloco = {"perfil": perfil, "total": len(top_final), "videos": []}
+        resultado["perfis"].append(bloco)
+        job.parcial(resultado)
+        if not top_final:
+            continue
+
+        # Monta o contexto de cada vídeo (os que já existem no banco não entram no pipeline)
+        contextos = []
+        for i, v in enumerate(top_final):
+            rank = i + 1
+            ctx = {
+                "rank": rank,
+                "ordem": next(ordem),
+                "video": v,
+                "existente": v['pk'] in ids_existentes,
+                "analisar": v['pk'] not in ids_existentes and rank <= top_analise_ia,
+                "caminho_video": os.path.join(job.dir_temp, f"{v['pk']}.mp4"),
+                "caminho_audio": "",
+                "duracao_max": gancho_s,
+                "ia_data": {"transcricao": "", "ganchos_verbais": ""},
+                "log": LogEtapa(),
+                "indice": indice,
+                "duplicado_de": None,
+                "assinatura": None,
+                "digital": None,
+                "candidato_legenda": None,
+            }
+            # Legenda parecida (CTA/template repetido também dá) só vira suspeita: quem vincula é o áudio
+            if indice is not None and ctx["analisar"]:
+                candidato, ctx["assinatura"] = indice.legenda_parecida(v['caption'], ctx["ordem"])
+                if candidato:
+                    ctx["candidato_legenda"] = candidato[0]
+                    ctx["log"].write(f"🔎 Legenda {candidato[1]:.0%} igual à de {candidato[0]}. Conferindo pelo áudio.")
+                indice.reservar(ctx["ordem"], v['pk'], assinatura=ctx["assinatura"])
+            contextos.append(ctx)
+
+        # Download do vídeo N+1 acontece enquanto o vídeo N é transcrito/analisado.
+        # Os resultados chegam aqui na ordem do ranking.
+        for i, ctx in executar_pipeline(contextos, estagios, tamanho_fila=params.get("tamanho_fila", 2)):
+            job.verificar_cancelamento()
+            v = ctx["video"]
+            original = None
+            if ctx["duplicado_de"]:
+                # Só vincula a um original que deu certo (o do mesmo job pode ter falhado depois da reserva)
+                original = _dados_do_original(ctx["duplicado_de"], processados)
+                if not similaridade.transcricao_valida(original[0]):
+                    ctx, original = _processar_sem_vinculo(ctx, estagios), None
+            bloco["videos"].append(_resumo_video(ctx))
+            job.parcial(resultado)
+            job.etapa(f"@{perfil}: Top {ctx['rank']} de {len(top_final)}",
+                      (n_perfil + (i + 1) / len(top_final)) / max(len(perfis), 1))
+
+            if ctx["existente"]:
+                continue
+
+            ia_data = ctx["ia_data"]
+            if ctx["duplicado_de"]:
+                resultado["duplicados"] += 1
+                if modo_duplicatas == DUPLICATAS_PULAR:
+                    continue
+                transcricao, ganchos = original
+                ia_data["transcricao"] = similaridade.MARCA_DUPLICADO.format(id=ctx["duplicado_de"]) + transcricao
+                ia_data["ganchos_verbais"] = ganchos
+            elif ctx.get("erro") == "Erro Download":
+                ia_data["transcricao"] = "Erro Download"
+            elif ctx.get("erro"):
+                ia_data["transcricao"] = ctx["erro"]
+                ia_data["ganchos_verbais"] = "-"
+            elif ctx["analisar"] and gancho_s:
+                ia_data["transcricao"] = MARCA_GANCHO.format(segundos=gancho_s) + ia_data.get("transcricao", "")
+                if completa_depois:
+                    para_transcrever_completo.append({"id": v['pk'], "download_url": v['download_url']})
+
+            nova_linha = [
+                v['pk'],
+                timestamp_coleta,
+                f"@{perfil}",
+                v['data_str'],
+                v['link'],
+                v['views'],
+                v['likes'],
+                v['comments'],
+                ia_data.get('transcricao', ''),
+                ia_data.get('ganchos_verbais', ''),
+                v['caption']
+            ]
+            if salvar_linha_instagram(sheet, nova_linha, buffer, job):
+                ids_existentes.add(v['pk'])
+                processados[v['pk']] = (ia_data.get('transcricao', ''), ia_data.get('ganchos_verbais', ''))
+                if indice is not None and ctx["analisar"] and not ctx.get("erro") and not ctx["duplicado_de"]:
+                    try:
+                        indice.registrar(v['pk'], ctx["assinatura"], ctx["digital"])
+                    except Exception:
+                        pass  # só perde a detecção deste vídeo no futuro
+
+    # Envia o que sobrou no buffer
+    job.etapa("Salvando no banco de dados", 1.0)
+    resultado["erros_envio"] = [str(e) for e in buffer.descarregar()]
+
+    # Transcrição completa fica para depois, num job próprio (as linhas já estão na planilha)
+    if para_transcrever_completo:
+        resultado["job_transcricao_completa"] = jobs.enviar_job(TIPO_JOB_COMPLETA, {
+            "aba": "instagram", "videos": para_transcrever_completo,
+        })
+        job.info(f"🕒 Transcrição completa de {len(para_transcrever_completo)} vídeo(s) agendada em segundo plano.")
+    return resultado
+
+
+def executar_transcricao_completa(params, job):
+    """Troca a transcrição do gancho pela do vídeo inteiro (agendado pelo modo gancho)."""
+    videos = params["videos"]
+    sheet = conectar_sheets(job)
+    if not sheet:
+        raise RuntimeError("Não foi possível conectar à planilha.")
+
+    resultado = {"atualizados": 0, "erros": []}
+    for n, item in enumerate(videos):
+        job.verificar_cancelamento()
+        job.etapa(f"Vídeo {n + 1} de {len(videos)}", n / len(videos))
+        caminho_audio = None
+        try:
+            caminho_audio = baixar_audio_video(
+                item["download_url"], os.path.join(job.dir_temp, str(item["id"])), container_log=job
+            )
+            texto = transcrever_whisper_groq(caminho_audio)
+            if atualizar_transcricao(sheet, params["aba"], item["id"], texto):
+                resultado["atualizados"] += 1
+            else:
+                resultado["erros"].append(f"{item['id']}: linha não encontrada")
+        except Exception as e:
+            # Link do vídeo expirado etc.: a transcrição do gancho continua valendo
+            resultado["erros"].append(f"{item['id']}: {e}")
+            job.warning(f"{item['id']}: {e}")
+        finally:
+            if caminho_audio and os.path.exists(caminho_audio): os.remove(caminho_audio)
+        job.parcial(resultado)
+    return resultado
+
+
+jobs.registrar_tipo(TIPO_JOB, executar_analise)
+jobs.registrar_tipo(TIPO_JOB_COMPLETA, executar_transcricao_completa)
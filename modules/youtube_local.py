@@ -0,0 +1,170 @@
+# modules/youtube_local.py
+"""
+Extração de vídeos do YouTube no próprio processo, com yt-dlp.
+
+Uma chamada (extract_info, sem download) traz metadados, legendas (manuais e
+automáticas) e os formatos de áudio. Daí:
+
+- com legenda: baixa só o arquivo da legenda (json3/vtt, poucos KB)
+- sem legenda: baixa o menor formato só-áudio pelo downloader (Range/backoff)
+
+Sem subir ator na Apify (cold start + dataset). O yt-dlp entra pelo registro de
+clientes (clients.ytdlp), então os benchmarks trocam por um fake gravado.
+"""
+import json
+import os
+import re
+
+from modules import clients, downloader, tracing
+
+OPCOES_YTDLP = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "noplaylist": True,
+}
+IDIOMAS = ["pt", "pt-BR", "pt-PT", "en", "en-US", "es"]
+FORMATOS_LEGENDA = ["json3", "vtt"]
+MIN_CARACTERES_LEGENDA = 50
+ABR_MIN = 32  # kbps: abaixo disso o Whisper erra mais
+
+
+class SemConteudo(Exception):
+    """O yt-dlp respondeu, mas o vídeo não tem legenda nem áudio utilizável."""
+
+
+def extrair_info(url):
+    """Metadados + legendas + formatos numa única chamada ao yt-dlp."""
+    with tracing.span("ytdlp:extract_info"):
+        with clients.ytdlp().YoutubeDL(OPCOES_YTDLP) as ydl:
+            return ydl.extract_info(url, download=False)
+
+
+# --- LEGENDAS ---
+
+def _preferencias(info):
+    """Idiomas em ordem: o do vídeo primeiro (a faixa '-orig' é a transcrição, não tradução)."""
+    idioma = info.get("language")
+    ordem = [f"{idioma}-orig", idioma] if idioma else []
+    return [i for i in ordem + IDIOMAS if i]
+
+
+def escolher_legenda(info):
+    """(idioma, formato) da melhor legenda: manual antes de automática. None se não houver."""
+    for fonte in ("subtitles", "automatic_captions"):
+        faixas = info.get(fonte) or {}
+        for idioma in _preferencias(info):
+            por_ext = {f.get("ext"): f for f in faixas.get(idioma) or []}
+            for ext in FORMATOS_LEGENDA:
+                if por_ext.get(ext, {}).get("url"):
+                    return idioma, por_ext[ext]
+    return None
+
+
+def _texto_json3(conteudo):
+    eventos = json.loads(conteudo).get("events") or []
+    partes = ("".join(s.get("utf8", "") for s in e.get("segs") or []) for e in eventos)
+    return " ".join(p.strip() for p in partes if p.strip())
+
+
+_TEMPO_VTT = re.compile(r"^\d{2}:\d{2}[:.\d]* --> ")
+_TAG_VTT = re.compile(r"<[^>]+>")
+
+
+def _texto_vtt(conteudo):
+    linhas = []
+    for linha in conteudo.splitlines():
+        linha = _TAG_VTT.sub("", linha).strip()
+        if not linha or linha.isdigit() or _TEMPO_VTT.match(linha):
+            continue
+        if linha.startswith(("WEBVTT", "Kind:", "Language:", "NOTE")):
+            continue
+        # Legenda automática repete a linha anterior (rolagem)
+        if not linhas or linhas[-1] != linha:
+            linhas.append(linha)
+    return " ".join(linhas)
+
+
+def texto_da_legenda(formato):
+    """Baixa a legenda escolhida e devolve o texto corrido."""
+    with tracing.span("ytdlp:legenda", ext=formato.get("ext")):
+        resposta = clients.sessao_http().get(formato["url"], timeout=downloader.TIMEOUT)
+        resposta.raise_for_status()
+        conteudo = resposta.content.decode("utf-8", errors="replace")
+    if formato.get("ext") == "json3":
+        return _texto_json3(conteudo)
+    return _texto_vtt(conteudo)
+
+
+# --- ÁUDIO ---
+
+def escolher_audio(info):
+    """Menor formato só-áudio (acima de ABR_MIN kbps); para transcrever, qualidade alta é desperdício."""
+    candidatos = [
+        f for f in info.get("formats") or []
+        if f.get("url") and f.get("vcodec") == "none" and f.get("acodec") not in (None, "none")
+        and f.get("protocol", "https").startswith("http")
+    ]
+    if not candidatos:
+        return None
+    bons = [f for f in candidatos if (f.get("abr") or 0) >= ABR_MIN] or candidatos
+    return min(bons, key=lambda f: (f.get("abr") or f.get("tbr") or 0, f.get("ext") != "m4a"))
+
+
+def baixar_audio(formato, destino_base):
+    """Baixa o formato de áudio em `destino_base`.<ext> e retorna o caminho."""
+    destino = f"{destino_base}.{formato.get('ext') or 'm4a'}"
+    downloader.baixar(formato["url"], destino, headers=formato.get("http_headers"))
+    return destino
+
+
+# --- FLUXO ---
+
+def _data(upload_date):
+    """'20240131' -> '2024-01-31' (mesmo formato das outras abas)."""
+    if upload_date and len(upload_date) == 8 and upload_date.isdigit():
+        return f"{upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:]}"
+    return ""
+
+
+def dados_youtube(url, transcrever, dir_temp):
+    """
+    Dados do vídeo no formato de pegar_dados_youtube_apify. Se não houver legenda,
+    baixa o áudio em `dir_temp` e chama `transcrever(caminho)`.
+    Levanta exceção se o yt-dlp falhar (quem chama cai para a Apify).
+    """
+    info = extrair_info(url)
+    dados = {
+        "sucesso": True,
+        "transcricao": "",
+        "titulo": info.get("title") or "YouTube Video",
+        "id_unico": info.get("id") or url,
+        "description": info.get("description") or "",
+        "canal": info.get("channel") or info.get("uploader") or "",
+        "data_post": _data(info.get("upload_date")),
+        "views": info.get("view_count") or 0,
+        "likes": info.get("like_count") or 0,
+        "fonte": "",
+    }
+
+    legenda = escolher_legenda(info)
+    if legenda:
+        idioma, formato = legenda
+        try:
+            texto = texto_da_legenda(formato)
+        except Exception:
+            texto = ""
+        if len(texto) >= MIN_CARACTERES_LEGENDA:
+            dados.update(transcricao=texto, fonte=f"legenda ({idioma})")
+            return dados
+
+    formato = escolher_audio(info)
+    if formato is None:
+        raise SemConteudo("Vídeo sem legenda e sem formato de áudio")
+    caminho = baixar_audio(formato, os.path.join(dir_temp, f"yt_{dados['id_unico']}"))
+    try:
+        dados.update(transcricao=transcrever(caminho), fonte="áudio (whisper)")
+    finally:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+    return dados
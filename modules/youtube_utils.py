@@ -1,91 +1,184 @@
 import streamlit as st
-import requests
 import os
 import json
-from apify_client import ApifyClient
-from groq import Groq
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+from modules import clients, downloader, local_store, tracing, youtube_local
+from modules.ai_processor import whisper_groq_arquivo, transcrever_arquivo_em_partes, LIMITE_UPLOAD_MB
 
 # --- WHISPER (Mantido) ---
 def transcrever_com_whisper_groq(caminho_arquivo):
     if "groq" not in st.secrets: return "Erro: Chave Groq não configurada."
-    client = Groq(api_key=st.secrets["groq"]["api_key"])
     try:
-        with open(caminho_arquivo, "rb") as file:
-            return str(client.audio.transcriptions.create(
-                file=(caminho_arquivo, file.read()),
-                model="whisper-large-v3",
-                response_format="text"
-            ))
+        # Mesmo áudio (URL repetida) volta do cache de transcrições
+        return whisper_groq_arquivo(caminho_arquivo)
     except Exception as e: return f"Erro Transcrição: {e}"
 
 # --- NOVO: COBALT MULTI-SERVER (Grátis) ---
-def baixar_audio_cobalt_gratis(url_youtube):
+# Servidores públicos do Cobalt (a ordem real vem do placar de saúde no SQLite local)
+COBALT_INSTANCIAS = [
+    "https://api.cobalt.tools/api/json",        # Oficial (muito tráfego)
+    "https://cobalt.api.kwiatekmiki.pl/api/json", # Polônia
+    "https://api.fnky.app/api/json",            # Alternativo
+    "https://cobalt.q1.si/api/json"             # Eslovênia
+]
+COBALT_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+}
+TIMEOUT_COBALT = 10
+ATRASO_HEDGE_S = 1.5      # sem resposta nesse tempo, dispara o próximo servidor também
+SAUDE_NOVATO = (0.75, 3.0)  # (taxa, latência) de quem ainda não tem histórico: otimista, para ser testado
+WORKERS_COBALT = 8        # pool do processo: threads reaproveitadas (e suas conexões SQLite) entre corridas
+
+_pool_cobalt = ThreadPoolExecutor(max_workers=WORKERS_COBALT, thread_name_prefix="cobalt")
+
+
+def ordenar_por_saude(instancias, servico="cobalt"):
+    """Mais confiáveis e rápidos primeiro (taxa de sucesso / latência média)."""
+    placar = local_store.placar_espelhos(servico)
+
+    def nota(url):
+        saude = placar.get(url)
+        taxa, latencia = (saude["taxa_sucesso"], saude["latencia_s"]) if saude else SAUDE_NOVATO
+        return taxa / (1.0 + latencia)
+
+    return sorted(instancias, key=nota, reverse=True)
+
+
+def _pedir_link_cobalt(api_url, payload):
+    """Pede o link de download a uma instância; registra o resultado no placar. Levanta exceção se falhar."""
+    inicio = time.perf_counter()
+    sucesso = False
+    try:
+        with tracing.span("cobalt:pedido", instancia=urlparse(api_url).netloc):
+            response = clients.sessao_http().post(api_url, json=payload, headers=COBALT_HEADERS, timeout=TIMEOUT_COBALT)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        link = response.json().get("url")
+        if not link:
+            raise RuntimeError("resposta sem link")
+        sucesso = True
+        return link
+    finally:
+        local_store.registrar_espelho("cobalt", api_url, sucesso, time.perf_counter() - inicio)
+
+
+def correr_instancias(instancias, pedir, atraso=ATRASO_HEDGE_S):
+    """
+    Pedidos escalonados: começa pela primeira instância e, se ela não responder
+    em `atraso` segundos (ou falhar), dispara a próxima sem abandonar a anterior.
+    Retorna (instancia, resultado) da primeira resposta válida, ou None.
+
+    As que ainda não saíram são canceladas; as que já estão no ar terminam
+    sozinhas em segundo plano e só atualizam o placar.
+    """
+    fila = list(instancias)
+    em_voo = {}
+    try:
+        while fila or em_voo:
+            if fila:
+                instancia = fila.pop(0)
+                em_voo[_pool_cobalt.submit(tracing.propagar(pedir), instancia)] = instancia
+            prontos, _ = wait(em_voo, timeout=atraso if fila else None, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                instancia = em_voo.pop(futuro)
+                if futuro.exception() is None:
+                    return instancia, futuro.result()
+        return None
+    finally:
+        for futuro in em_voo:
+            futuro.cancel()
+
+
+@tracing.rastrear("download:cobalt")
+def baixar_audio_cobalt_gratis(url_youtube, dir_temp, container_log=st):
     """
     Tenta baixar usando várias instâncias públicas do Cobalt.
     É gratuito e roda fora do servidor da Apify.
+    Os servidores correm em paralelo (escalonados, o mais saudável primeiro);
+    o primeiro link válido ganha. O áudio vai para `dir_temp` (de quem chama).
     """
-    output_filename = "temp_cobalt_audio.mp3"
-    
-    # Lista de servidores alternativos (se um falhar, tenta o outro)
-    instances = [
-        "https://api.cobalt.tools/api/json",        # Oficial (muito tráfego)
-        "https://cobalt.api.kwiatekmiki.pl/api/json", # Polônia
-        "https://api.fnky.app/api/json",            # Alternativo
-        "https://cobalt.q1.si/api/json"             # Eslovênia
-    ]
+    output_filename = os.path.join(dir_temp, "cobalt_audio.mp3")
     
     payload = {
         "url": url_youtube,
         "isAudioOnly": True,
         "aFormat": "mp3"
     }
-    
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-    }
 
-    st.info("🔄 Tentando servidores gratuitos de download (Cobalt)...")
-    
-    for i, api_url in enumerate(instances):
-        try:
-            # status_msg = st.toast(f"Tentando servidor {i+1}...", icon="📡")
-            response = requests.post(api_url, json=payload, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'url' in data:
-                    download_link = data['url']
-                    
-                    # Baixa o arquivo
-                    with requests.get(download_link, stream=True, timeout=60) as r:
-                        r.raise_for_status()
-                        with open(output_filename, 'wb') as f:
-                            for chunk in r.iter_content(chunk_size=8192):
-                                f.write(chunk)
-                    
-                    if os.path.exists(output_filename):
-                        return output_filename
-        except:
-            continue # Silenciosamente tenta o próximo
+    container_log.info("🔄 Tentando servidores gratuitos de download (Cobalt)...")
 
+    restantes = ordenar_por_saude(COBALT_INSTANCIAS)
+    while restantes:
+        vencedor = correr_instancias(restantes, lambda api_url: _pedir_link_cobalt(api_url, payload))
+        if vencedor is None:
+            break
+        api_url, download_link = vencedor
+        restantes.remove(api_url)
+        try:
+            # Baixa o arquivo (retomada por Range e backoff no downloader)
+            downloader.baixar(download_link, output_filename)
+            if os.path.exists(output_filename):
+                return output_filename
+        except Exception:
+            # Link que não baixa conta como falha do servidor; corre de novo entre os outros
+            local_store.registrar_espelho("cobalt", api_url, False, 0.0)
+    
     return None
 
+def _transcrever_audio_youtube(caminho):
+    """Whisper direto; áudio acima do limite de upload vai em partes (vídeos longos)."""
+    if os.path.getsize(caminho) > LIMITE_UPLOAD_MB * 1024 * 1024:
+        return transcrever_arquivo_em_partes(caminho)
+    return whisper_groq_arquivo(caminho)
+
+
+@tracing.rastrear("youtube:local")
+def pegar_dados_youtube_local(url):
+    """Legenda (ou áudio + Whisper) via yt-dlp no próprio processo. Levanta exceção se falhar."""
+    dir_temp = tempfile.mkdtemp(prefix="yt_")
+    try:
+        return youtube_local.dados_youtube(url, _transcrever_audio_youtube, dir_temp)
+    finally:
+        shutil.rmtree(dir_temp, ignore_errors=True)
+
+
 # --- FUNÇÃO PRINCIPAL ---
-def pegar_dados_youtube_apify(url):
-    client = ApifyClient(st.secrets["apify_token"])
+def pegar_dados_youtube_apify(url, container_log=st):
+    """
+    yt-dlp local primeiro; se falhar (bloqueio, vídeo restrito, yt-dlp ausente), Apify + Cobalt.
+    `container_log` recebe o progresso (st na página, o ContextoJob num job).
+    """
+    container_log.info("⚡ Buscando legenda/áudio direto no YouTube...")
+    try:
+        dados_locais = pegar_dados_youtube_local(url)
+        if dados_locais.get("transcricao"):
+            return dados_locais
+    except Exception as e:
+        container_log.warning(f"⚠️ Extração direta falhou ({str(e)[:200]}). Usando a Apify...")
+    return pegar_dados_youtube_via_apify(url, container_log)
+
+
+def pegar_dados_youtube_via_apify(url, container_log=st):
+    client = clients.apify_client()
     
-    st.info("1️⃣ Buscando Legenda (Texto)...")
+    container_log.info("1️⃣ Buscando Legenda (Texto)...")
     dados_finais = {}
     
     # 1. TENTA PEGAR LEGENDA (Rápido e Barato)
     try:
-        run = client.actor("streamers/youtube-scraper").call(run_input={
-            "startUrls": [{"url": url}], "maxResults": 1, "downloadSubtitles": True, "saveSubsToKVS": False
-        })
+        with tracing.span("apify:run", ator="youtube-scraper"):
+            run = client.actor("streamers/youtube-scraper").call(run_input={
+                "startUrls": [{"url": url}], "maxResults": 1, "downloadSubtitles": True, "saveSubsToKVS": False
+            })
         if run:
-            items = client.dataset(run["defaultDatasetId"]).list_items().items
+            with tracing.span("apify:dataset"):
+                items = client.dataset(run["defaultDatasetId"]).list_items().items
             if items:
                 item = items[0]
                 txt = ""
@@ -107,21 +200,24 @@ def pegar_dados_youtube_apify(url):
 
     # 2. SE NÃO TEM LEGENDA -> COBALT (GRÁTIS) + WHISPER
     if not dados_finais.get("transcricao") or len(dados_finais["transcricao"]) < 50:
-        st.warning("⚠️ Sem legenda. Tentando download gratuito...")
+        container_log.warning("⚠️ Sem legenda. Tentando download gratuito...")
         
-        audio_path = baixar_audio_cobalt_gratis(url)
+        # Pasta própria por chamada: jobs simultâneos não sobrescrevem o áudio um do outro
+        dir_temp = tempfile.mkdtemp(prefix="cobalt_")
+        try:
+            audio_path = baixar_audio_cobalt_gratis(url, dir_temp, container_log)
+            if audio_path:
+                container_log.info("⬇️ Download concluído! Transcrevendo...")
+                dados_finais["transcricao"] = transcrever_com_whisper_groq(audio_path)
+        finally:
+            shutil.rmtree(dir_temp, ignore_errors=True)
         
         if audio_path:
-            st.success("⬇️ Download concluído! Transcrevendo...")
-            texto = transcrever_com_whisper_groq(audio_path)
-            dados_finais["transcricao"] = texto
-            if os.path.exists(audio_path): os.remove(audio_path)
-            
             # Preenche dados faltantes se o passo 1 falhou totalmente
             if not dados_finais.get("titulo"):
                 dados_finais.update({"titulo": "Vídeo Transcrito", "id_unico": url, "description": ""})
         else:
-            st.error("❌ Não foi possível baixar o vídeo automaticamente.")
+            container_log.error("❌ Não foi possível baixar o vídeo automaticamente.")
             return {"sucesso": False, "erro": "download_failed"}
 
     return dados_finais
\ No newline at end of file
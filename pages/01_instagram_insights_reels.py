@@ -1,13 +1,11 @@
 import streamlit as st
-import os
-import time
-from datetime import datetime
 
 # --- IMPORTAÇÃO DOS MÓDULOS ---
 from modules.auth import check_password
-from modules.database import conectar_sheets, carregar_ids_existentes, salvar_linha_instagram
-from modules.instagram import pegar_dados_apify, baixar_video_with_retry
-from modules.ai_processor import analisar_video_groq
+from modules.jobs import enviar_job, consultar_job, cancelar_job, FINALIZADOS, NA_FILA, CONCLUIDO, CANCELADO
+from modules.jobs import TIPO_VIRAL_ANALYZER as TIPO_JOB
+from modules.rate_limit import profundidade_filas
+from modules import tracing
 
 # --- CONFIGURAÇÃO ---
 st.set_page_config(page_title="Viral Analyzer", page_icon="⚡")
@@ -26,94 +24,141 @@ with st.sidebar:
     DIAS_ANALISE = st.number_input("Dias para analisar", min_value=1, value=60)
     TOP_VIDEOS = st.number_input("Top Vídeos para salvar", min_value=1, value=5)
     TOP_ANALISE_IA = st.number_input("Analisar com IA (Top X)", min_value=0, value=5)
+    MODO_LOTE = st.checkbox("Apify em lote (uma execução para todos os perfis)", value=True)
 
-# --- EXECUÇÃO PRINCIPAL ---
-if st.button("🚀 Iniciar Análise", type="primary"):
-    
-    # 1. Banco de Dados
-    sheet = conectar_sheets()
-    if not sheet: st.stop()
-    
-    st.toast("Verificando banco de dados...", icon="💾")
-    ids_existentes = carregar_ids_existentes(sheet)
-    st.write(f"📊 {len(ids_existentes)} vídeos já cadastrados.")
-
-    timestamp_coleta = datetime.now().strftime("%d/%m/%Y") # <--- AQUI ESTÁ A DEFINIÇÃO CORRETA
-    
-    if not os.path.exists('temp_videos_groq'): os.makedirs('temp_videos_groq')
-
-    for perfil in PERFIS_ALVO:
-        st.subheader(f"🔍 @{perfil}")
-        log_box = st.expander("Logs do Processamento", expanded=True)
-        
-        with log_box:
-            videos = pegar_dados_apify(perfil, DIAS_ANALISE, st)
-        
-        if not videos:
+    MODO_GANCHO = st.checkbox(
+        "🎣 Modo gancho (transcreve só o início)", value=False,
+        help="Baixa e transcreve só os primeiros segundos: bem mais rápido e gasta menos cota do Whisper."
+    )
+    GANCHO_S = st.number_input("Segundos iniciais", min_value=3, max_value=120, value=15, disabled=not MODO_GANCHO)
+    COMPLETA_DEPOIS = st.checkbox(
+        "Salvar a transcrição completa depois (em segundo plano)", value=False, disabled=not MODO_GANCHO
+    )
+
+    DUPLICATAS = st.selectbox(
+        "♻️ Quase-duplicados", ["Vincular ao original", "Pular", "Não verificar"],
+        help="Repost ou outro corte de um vídeo já processado (legenda parecida ou mesmo áudio no início): "
+             "em vez de transcrever e analisar de novo, grava com o resultado do original, ou nem grava."
+    )
+
+    with st.expander("🧵 Pipeline (workers por etapa)"):
+        WORKERS_DOWNLOAD = st.number_input("Download", min_value=1, max_value=8, value=3)
+        WORKERS_AUDIO = st.number_input("Extração de áudio", min_value=1, max_value=4, value=2)
+        WORKERS_WHISPER = st.number_input("Transcrição (Whisper)", min_value=1, max_value=4, value=2)
+        WORKERS_LLAMA = st.number_input("Análise (Llama 3)", min_value=1, max_value=4, value=2)
+        TAMANHO_FILA = st.number_input("Tamanho máx. das filas", min_value=1, max_value=10, value=2)
+
+    # Chamadas esperando limite da conta (compartilhada por todos os usuários)
+    for modelo, na_fila in profundidade_filas().items():
+        if na_fila:
+            st.caption(f"⏳ {modelo}: {na_fila} chamada(s) aguardando limite da API")
+
+# --- EXIBIÇÃO DO RESULTADO (parcial ou final) ---
+def mostrar_resultado(job):
+    resultado = job.get("resultado") or {}
+    if "total_existentes" in resultado:
+        st.write(f"📊 {resultado['total_existentes']} vídeos já cadastrados.")
+    if resultado.get("duplicados"):
+        st.write(f"♻️ {resultado['duplicados']} quase-duplicado(s) de conteúdos já processados (sem Whisper/Llama).")
+
+    with st.expander("Logs do Processamento", expanded=job["status"] not in FINALIZADOS):
+        for evento in job["eventos"]:
+            getattr(st, evento["tipo"])(evento["msg"])
+
+    for bloco in resultado.get("perfis", []):
+        st.subheader(f"🔍 @{bloco['perfil']}")
+        if not bloco["total"]:
             st.warning("Nenhum vídeo recente encontrado.")
             continue
-            
-        top_final = sorted(videos, key=lambda x: x['views'], reverse=True)[:TOP_VIDEOS]
-        st.write(f"🏆 Top {len(top_final)} vídeos identificados.")
-        
-        barra = st.progress(0)
-        
-        for i, v in enumerate(top_final):
-            rank = i + 1
-            id_video = v['pk']
-            
-            # 2. Verificação de Cache
-            if id_video in ids_existentes:
-                with st.status(f"⏩ [Top {rank}] Já existe no banco (ID: {id_video})", state="complete", expanded=False):
-                    st.write("Pulando...")
-                barra.progress((i + 1) / len(top_final))
-                continue
-            
-            # 3. Processamento IA
-            ia_data = {"transcricao": "", "ganchos_verbais": ""}
-            
-            if rank <= TOP_ANALISE_IA:
-                with st.status(f"⭐ [Top {rank}] Analisando ({v['views']} views)...", expanded=True) as status:
-                    caminho_temp = os.path.join('temp_videos_groq', f"{id_video}.mp4")
-                    
-                    status.write("⬇️ Baixando...")
-                    if baixar_video_with_retry(v['download_url'], caminho_temp):
-                        ia_data = analisar_video_groq(caminho_temp, status)
-                        if os.path.exists(caminho_temp): os.remove(caminho_temp)
-                        status.update(label="✅ IA Concluída!", state="complete", expanded=False)
-                    else:
-                        status.update(label="❌ Erro Download", state="error")
-                        ia_data["transcricao"] = "Erro Download"
-
-            # 4. Salvar
-            nova_linha = [
-                id_video, 
-                timestamp_coleta, # <--- CORRIGIDO AQUI (antes estava só 'timestamp')
-                f"@{perfil}", 
-                v['data_str'], 
-                v['link'],
-                v['views'], 
-                v['likes'], 
-                v['comments'],
-                ia_data.get('transcricao', ''), 
-                ia_data.get('ganchos_verbais', ''), 
-                v['caption']
-            ]
-            
-            if salvar_linha_instagram(sheet, nova_linha):
-                ids_existentes.add(id_video)
-                st.toast(f"Top {rank} salvo!", icon="💾")
-
-            barra.progress((i + 1) / len(top_final))
-        
-        time.sleep(1)
-
-    # Limpeza
-    try:
-        if os.path.exists('temp_videos_groq'):
-            for f in os.listdir('temp_videos_groq'): os.remove(os.path.join('temp_videos_groq', f))
-            os.rmdir('temp_videos_groq')
-    except: pass
-
-    st.balloons()
-    st.success("🏁 Finalizado!")
\ No newline at end of file
+        st.write(f"🏆 Top {bloco['total']} vídeos identificados.")
+        st.progress(len(bloco["videos"]) / bloco["total"])
+        for v in bloco["videos"]:
+            with st.status(v["label"], state=v["estado"], expanded=False):
+                for tipo, msg in v["log"]:
+                    getattr(st, tipo)(msg)
+
+    for erro in resultado.get("erros_envio", []):
+        st.error(f"Erro ao salvar: {erro}")
+
+    job_completa = resultado.get("job_transcricao_completa")
+    if job_completa:
+        completa = consultar_job(job_completa)
+        if completa and completa["status"] not in FINALIZADOS:
+            st.caption(f"🕒 Transcrição completa em segundo plano: {completa['etapa'] or 'na fila'}")
+        elif completa and completa["status"] == CONCLUIDO:
+            st.caption(f"✅ Transcrição completa salva ({completa['resultado']['atualizados']} vídeo(s)).")
+
+
+# --- ACOMPANHAMENTO DO JOB ---
+# O processamento roda em segundo plano (modules/viral_analyzer.py); a página só consulta.
+# O ID fica na URL (?job=...), então um refresh ou outra aba continua acompanhando.
+@st.fragment(run_every=2)
+def acompanhar_job(job_id):
+    job = consultar_job(job_id)
+    if job is None or job["status"] in FINALIZADOS:
+        st.rerun()  # página inteira: mostra o resultado final fora do fragmento
+
+    col_status, col_cancelar = st.columns([4, 1])
+    with col_status:
+        if job["status"] == NA_FILA:
+            st.info(f"⏳ Na fila (posição {job.get('posicao_fila', '-')}).")
+        else:
+            st.progress(job["progresso"], text=f"⚙️ {job['etapa'] or 'Processando...'}")
+    with col_cancelar:
+        if st.button("⛔ Cancelar", key=f"cancelar_{job_id}"):
+            cancelar_job(job_id)
+            st.toast("Cancelamento solicitado.", icon="⛔")
+
+    mostrar_resultado(job)
+
+
+# --- EXECUÇÃO PRINCIPAL ---
+if st.button("🚀 Iniciar Análise", type="primary"):
+    job_id = enviar_job(TIPO_JOB, {
+        "perfis": PERFIS_ALVO,
+        "dias": int(DIAS_ANALISE),
+        "top_videos": int(TOP_VIDEOS),
+        "top_analise_ia": int(TOP_ANALISE_IA),
+        "modo_lote": MODO_LOTE,
+        "gancho_s": int(GANCHO_S) if MODO_GANCHO else 0,
+        "transcricao_completa_depois": MODO_GANCHO and COMPLETA_DEPOIS,
+        "duplicatas": {"Vincular ao original": "vincular", "Pular": "pular"}.get(DUPLICATAS, ""),
+        "workers_download": int(WORKERS_DOWNLOAD),
+        "workers_audio": int(WORKERS_AUDIO),
+        "workers_whisper": int(WORKERS_WHISPER),
+        "workers_llama": int(WORKERS_LLAMA),
+        "tamanho_fila": int(TAMANHO_FILA),
+    })
+    st.query_params["job"] = job_id
+    st.rerun()
+
+job_id = st.query_params.get("job")
+if job_id:
+    job = consultar_job(job_id)
+    if job is None:
+        st.warning("Análise não encontrada.")
+        del st.query_params["job"]
+    elif job["status"] not in FINALIZADOS:
+        acompanhar_job(job_id)
+    else:
+        mostrar_resultado(job)
+        if job["status"] == CONCLUIDO:
+            if st.session_state.get("job_comemorado") != job_id:
+                st.session_state["job_comemorado"] = job_id
+                st.balloons()
+            st.success("🏁 Finalizado!")
+        elif job["status"] == CANCELADO:
+            st.warning("⛔ Análise cancelada.")
+        else:
+            st.error(f"❌ Erro: {job['erro']}")
+
+        if st.button("Nova análise"):
+            del st.query_params["job"]
+            st.rerun()
+
+# --- DESEMPENHO (spans do job, atualizados a cada rerun completo) ---
+if job_id:
+    execucao = tracing.obter_execucao(job_id)
+    if execucao:
+        with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+            tracing.painel(execucao)
@@ -0,0 +1,120 @@
+import streamlit as st
+
+# --- IMPORTAÇÃO DOS MÓDULOS ---
+from modules.auth import check_password
+from modules.jobs import enviar_job, consultar_job, cancelar_job, FINALIZADOS, NA_FILA, CONCLUIDO, CANCELADO
+from modules.jobs import TIPO_REESCRITA_LOTE as TIPO_JOB
+from modules.rate_limit import profundidade_filas
+from modules import tracing
+
+# Configuração da Página
+st.set_page_config(page_title="Fábrica de Roteiros", page_icon="📝")
+
+st.title("🏭 Fábrica de Roteiros Virais")
+st.markdown("---")
+
+# --- LOGIN ---
+if not check_password():
+    st.stop()
+
+# --- CONFIGURAÇÕES NA BARRA LATERAL ---
+with st.sidebar:
+    st.header("⚙️ Configurações")
+    TEMA_MACRO = st.text_input("Tema do Conteúdo", value="Holding Familiar")
+    CTA_PADRAO = st.text_area("Chamada para Ação (CTA)", value="Comente 'OURO' para receber o guia gratuito.")
+    NOME_PLANILHA = st.text_input("Nome da Planilha", value="Conteudo")
+    WORKERS = st.number_input("Roteiros em paralelo", min_value=1, max_value=8, value=4,
+                              help="O limite da conta Groq continua valendo: acima dele as chamadas esperam na fila.")
+
+    # Chamadas esperando limite da conta (compartilhada por todos os usuários)
+    for modelo, na_fila in profundidade_filas().items():
+        if na_fila:
+            st.caption(f"⏳ {modelo}: {na_fila} chamada(s) aguardando limite da API")
+
+# --- EXIBIÇÃO DO RESULTADO (parcial ou final) ---
+def mostrar_resultado(job):
+    resultado = job.get("resultado") or {}
+    if "total" in resultado:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Linhas", resultado["total"])
+        c2.metric("Já tinham roteiro", resultado["ja_preenchidas"])
+        c3.metric("Gerados", f"{resultado['gerados']}/{resultado['pendentes']}")
+        c4.metric("Gravados", resultado["gravados"])
+        if resultado.get("retomados"):
+            st.caption(f"♻️ {resultado['retomados']} roteiro(s) retomados de uma execução interrompida.")
+
+    with st.expander("Logs do Processamento", expanded=False):
+        for evento in job["eventos"]:
+            getattr(st, evento["tipo"])(evento["msg"])
+
+    for erro in resultado.get("erros", []):
+        st.error(erro)
+
+    for item in resultado.get("ultimos", []):
+        with st.expander(f"✅ Linha {item['linha']}: Roteiro criado!"):
+            st.write(item["texto"])
+
+
+# --- ACOMPANHAMENTO DO JOB ---
+# A geração roda em segundo plano (modules/bulk_rewrite.py); a página só consulta.
+# O ID fica na URL (?job=...): fechar a aba não interrompe o lote.
+@st.fragment(run_every=2)
+def acompanhar_job(job_id):
+    job = consultar_job(job_id)
+    if job is None or job["status"] in FINALIZADOS:
+        st.rerun()  # página inteira: mostra o resultado final fora do fragmento
+
+    col_status, col_cancelar = st.columns([4, 1])
+    with col_status:
+        if job["status"] == NA_FILA:
+            st.info(f"⏳ Na fila (posição {job.get('posicao_fila', '-')}).")
+        else:
+            st.progress(job["progresso"], text=f"⚙️ {job['etapa'] or 'Iniciando processamento...'}")
+    with col_cancelar:
+        if st.button("⛔ Cancelar", key=f"cancelar_{job_id}"):
+            cancelar_job(job_id)
+            st.toast("Cancelamento solicitado.", icon="⛔")
+
+    mostrar_resultado(job)
+
+
+# --- BOTÃO DE AÇÃO ---
+if st.button("🚀 Iniciar Geração de Roteiros", type="primary"):
+    st.query_params["job"] = enviar_job(TIPO_JOB, {
+        "planilha": NOME_PLANILHA,
+        "tema": TEMA_MACRO,
+        "cta": CTA_PADRAO,
+        "workers": int(WORKERS),
+    })
+    st.rerun()
+
+job_id = st.query_params.get("job")
+if job_id:
+    job = consultar_job(job_id)
+    if job is None:
+        st.warning("Processamento não encontrado.")
+        del st.query_params["job"]
+    elif job["status"] not in FINALIZADOS:
+        acompanhar_job(job_id)
+    else:
+        mostrar_resultado(job)
+        if job["status"] == CONCLUIDO:
+            if st.session_state.get("job_comemorado") != job_id:
+                st.session_state["job_comemorado"] = job_id
+                st.balloons()
+            st.success("🏁 Processo finalizado com sucesso!")
+        elif job["status"] == CANCELADO:
+            st.warning("⛔ Geração cancelada. Os roteiros já gerados foram gravados; rode de novo para continuar.")
+        else:
+            st.error(f"❌ Erro: {job['erro']}")
+
+        if st.button("Novo lote"):
+            del st.query_params["job"]
+            st.rerun()
+
+# --- DESEMPENHO (spans do job, atualizados a cada rerun completo) ---
+if job_id:
+    execucao = tracing.obter_execucao(job_id)
+    if execucao:
+        with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+            tracing.painel(execucao)
@@ -1,6 +1,9 @@
 import streamlit as st
 from modules.auth import check_password
-from modules.trends import gerar_hypes_gemini, escrever_roteiro_groq
+from modules.trends import (
+    gerar_hypes_gemini, escrever_roteiro_groq_stream, escrever_roteiros_groq, chave_roteiro, roteiro_valido, ErroRoteiro,
+)
+from modules import tracing
 
 # --- CONFIGURAÇÃO ---
 st.set_page_config(page_title="Gerador de Hypes", page_icon="🔥", layout="wide")
@@ -40,11 +43,14 @@ if btn_gerar:
     else:
         with st.spinner(f"🔍 O Gemini está varrendo a internet por hypes para {nicho}..."):
             # Chama a função do módulo trends.py
-            pautas = gerar_hypes_gemini(nicho, janela_tempo, tom_voz, observacoes)
+            with tracing.execucao("pautas_gemini") as execucao:
+                pautas = gerar_hypes_gemini(nicho, janela_tempo, tom_voz, observacoes)
+            st.session_state['trace_pag03'] = execucao.id
             
             if pautas:
                 st.session_state['pautas_hype'] = pautas
                 st.session_state['roteiro_hype_ativo'] = None
+                st.session_state['roteiros_hype'] = {}
             else:
                 st.error("O Gemini não retornou pautas válidas. Tente novamente.")
 
@@ -53,6 +59,21 @@ if 'pautas_hype' in st.session_state:
     st.markdown("### 📋 Tópicos em Alta Identificados")
     
     pautas = st.session_state['pautas_hype']
+    # Roteiros já escritos, por pauta + opções (trocar de card não chama a IA de novo)
+    roteiros = st.session_state.setdefault('roteiros_hype', {})
+    pendentes = [p for p in pautas if chave_roteiro(p, nicho, tom_voz, observacoes) not in roteiros]
+
+    if pendentes and st.button(f"📝 Escrever todos os roteiros ({len(pendentes)})", use_container_width=True):
+        barra = st.progress(0.0, text="Escrevendo roteiros em paralelo...")
+        with tracing.execucao("roteiros_groq_todos") as execucao:
+            for n, (pauta_feita, texto) in enumerate(escrever_roteiros_groq(pendentes, nicho, tom_voz, observacoes), 1):
+                if roteiro_valido(texto):
+                    roteiros[chave_roteiro(pauta_feita, nicho, tom_voz, observacoes)] = texto
+                else:
+                    st.warning(f"{pauta_feita.get('titulo')}: {texto}")
+                barra.progress(n / len(pendentes), text=f"{n}/{len(pendentes)} roteiros prontos")
+        st.session_state['trace_pag03'] = execucao.id
+        barra.empty()
     
     # Cria uma grid de 2 colunas para ficar mais bonito
     cols = st.columns(2)
@@ -64,8 +85,9 @@ if 'pautas_hype' in st.session_state:
                 st.markdown(f"#### {i+1}. {pauta.get('titulo', 'Sem Título')}")
                 st.caption(f"🔥 **Hype:** {pauta.get('hype')}")
                 st.info(f"🗣️ **Gancho:** {pauta.get('gancho')}")
+                pronto = chave_roteiro(pauta, nicho, tom_voz, observacoes) in roteiros
                 
-                if st.button("✨ Escrever Roteiro", key=f"btn_h_{i}", use_container_width=True):
+                if st.button("📄 Ver Roteiro" if pronto else "✨ Escrever Roteiro", key=f"btn_h_{i}", use_container_width=True):
                     st.session_state['pauta_hype_selecionada'] = pauta
                     st.rerun()
 
@@ -77,16 +99,34 @@ if 'pauta_hype_selecionada' in st.session_state:
     st.subheader(f"🎬 Roteiro: {pauta['titulo']}")
     
     # Verifica se já gerou o texto para não gastar API a cada refresh
-    if st.session_state.get('roteiro_hype_texto') is None or st.session_state.get('last_pauta_title') != pauta['titulo']:
-        with st.spinner("✍️ A Groq está escrevendo o roteiro..."):
-            texto_roteiro = escrever_roteiro_groq(pauta, nicho, tom_voz, observacoes)
-            st.session_state['roteiro_hype_texto'] = texto_roteiro
-            st.session_state['last_pauta_title'] = pauta['titulo']
-    
-    # Exibe o roteiro
-    with st.container(border=True):
-        st.markdown(st.session_state['roteiro_hype_texto'])
+    roteiros = st.session_state.setdefault('roteiros_hype', {})
+    chave = chave_roteiro(pauta, nicho, tom_voz, observacoes)
+    if chave not in roteiros:
+        # Streaming: o texto aparece na tela conforme a Groq escreve
+        erro = None
+        with st.container(border=True), tracing.execucao("roteiro_groq") as execucao:
+            try:
+                with tracing.span("groq:stream_completo"):
+                    texto_roteiro = st.write_stream(escrever_roteiro_groq_stream(pauta, nicho, tom_voz, observacoes))
+            except ErroRoteiro as e:
+                texto_roteiro, erro = "", e
+        st.session_state['trace_pag03'] = execucao.id
+        # Só guarda roteiro de verdade: erro (ou stream cortado) tenta de novo no próximo clique
+        if erro is not None:
+            st.error(f"{erro}. Tente de novo.")
+        elif roteiro_valido(texto_roteiro):
+            roteiros[chave] = texto_roteiro
+    else:
+        # Exibe o roteiro
+        with st.container(border=True):
+            st.markdown(roteiros[chave])
     
     if st.button("Fechar"):
         del st.session_state['pauta_hype_selecionada']
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+
+# --- DESEMPENHO (última execução medida nesta página) ---
+execucao = tracing.obter_execucao(st.session_state.get('trace_pag03'))
+if execucao:
+    with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+        tracing.painel(execucao)
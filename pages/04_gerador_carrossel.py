@@ -1,14 +1,17 @@
+import copy
+import uuid
+
 import streamlit as st
-import os
-import time
-from moviepy.editor import VideoFileClip
 
 # --- IMPORTAÇÃO DOS MÓDULOS ---
 from modules.auth import check_password
-from modules.database import conectar_sheets, verificar_existencia_db, salvar_no_db
-from modules.instagram import get_instagram_data_apify, download_file
-from modules.ai_processor import agente_tempestade_ideias, agente_arquiteto_carrossel, transcrever_audio_groq
-from modules.youtube_utils import pegar_dados_youtube_apify 
+from modules.ai_processor import (
+    agente_arquiteto_carrossel_stream, pre_gerar_carrosseis, estado_pre_geracao,
+    roteiro_pre_gerado, descartar_pre_geracoes,
+)
+from modules.jobs import enviar_job, consultar_job, cancelar_job, FINALIZADOS, NA_FILA, CONCLUIDO, CANCELADO, ERRO
+from modules.jobs import TIPO_CARROSSEL_EXTRACAO as TIPO_JOB
+from modules import tracing
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="Gerador de Carrosséis", page_icon="🎠", layout="wide")
@@ -24,6 +27,11 @@ if not check_password():
 with st.sidebar:
     st.header("⚙️ Configuração")
     st.info("O sistema usa Apify/Cobalt para evitar bloqueios automaticamente.")
+    pre_gerar = st.toggle(
+        "⚡ Pré-gerar carrosséis", key="pre_gerar_pag04",
+        help="Assim que as ideias chegam, o Arquiteto já desenha as 3 em paralelo. "
+             "O clique em 'Gerar Carrossel' fica instantâneo, mas gasta ~3x mais tokens."
+    )
 
 # --- INPUTS ---
 col_tipo, col_foco = st.columns([1, 1])
@@ -41,163 +49,73 @@ with col_foco:
 url_input = st.text_input(f"Cole o link do {tipo_conteudo}:", placeholder="https://...")
 
 # --- BOTÃO PRINCIPAL ---
+# Extração + tempestade de ideias rodam em segundo plano (modules/carrossel.py).
+# O ID do job fica na URL (?job=...): um refresh no meio não perde o trabalho.
 if st.button("⚡ Analisar e Gerar Conceitos", type="primary"):
     if not url_input:
         st.warning("Insira um link.")
     else:
-        # Reset de estados
+        # Reset de estados (e esquece os carrosséis pré-gerados do conteúdo anterior, só desta sessão)
+        descartar_pre_geracoes(st.session_state.pop('chaves_pre_geradas', None) or [])
+        st.session_state['chave_ativa'] = None
         st.session_state['conteudo_base'] = None 
         st.session_state['ideias_geradas'] = None
         st.session_state['roteiro_final'] = None
         st.session_state['url_ref'] = url_input 
         st.session_state['ideia_ativa'] = None 
-        
-        status = st.status("Iniciando processo...", expanded=True)
-        texto_extraido = ""
-        
-        # 1. CONEXÃO COM BANCO DE DADOS
-        gs_client = conectar_sheets() 
-        
-        # Define o nome correto da aba baseado no tipo
-        if tipo_conteudo == "YouTube":
-            aba_alvo = "Youtube"
-        elif tipo_conteudo == "Carrossel (Instagram)":
-            aba_alvo = "carrossel" # <--- ABA NOVA
-        else:
-            aba_alvo = "instagram" # Reels
-            
-        transcricao_db = None
-        
-        # 2. VERIFICA SE JÁ EXISTE NO BANCO
-        if gs_client:
-            status.write(f"🔎 Verificando DB: '{aba_alvo}'...")
-            transcricao_db = verificar_existencia_db(gs_client, aba_alvo, url_input)
-        
-        if transcricao_db:
-            status.write("✅ Encontrado no Banco de Dados!")
-            texto_extraido = transcricao_db
-            time.sleep(1)
-        else:
-            status.write("⚠️ Novo link. Iniciando extração...")
-            dados_para_salvar = {}
-            
-            # --- YOUTUBE ---
-            if tipo_conteudo == "YouTube":
-                yt_data = pegar_dados_youtube_apify(url_input)
-                if yt_data and yt_data.get('sucesso'):
-                    texto_extraido = yt_data.get('transcricao', '')
-                    dados_para_salvar = {
-                        "id_unico": yt_data.get('id_unico'),
-                        "perfil": yt_data.get('canal'),
-                        "data_postagem": yt_data.get('data_post'),
-                        "url": url_input,
-                        "views": yt_data.get('views'),
-                        "likes": yt_data.get('likes'),
-                        "comments": 0,
-                        "caption": yt_data.get('description', '')
-                    }
-                else:
-                    status.update(label="Falha no YouTube", state="error")
-                    st.error("Não foi possível extrair dados.")
 
-            # --- REELS (INSTAGRAM) ---
-            elif tipo_conteudo == "Reels (Instagram)":
-                status.write("🕵️ Acessando Apify (Instagram)...")
-                data = get_instagram_data_apify(url_input)
-                if data:
-                    dados_para_salvar = {
-                        "id_unico": data.get('id', ''),
-                        "perfil": data.get('ownerUsername', ''),
-                        "data_postagem": data.get('timestamp', '')[:10],
-                        "url": url_input,
-                        "views": data.get('videoViewCount') or data.get('playCount', 0),
-                        "likes": data.get('likesCount', 0),
-                        "comments": data.get('commentsCount', 0),
-                        "caption": data.get('caption', '') 
-                    }
-                    v_url = data.get('videoUrl') or data.get('video_url')
-                    if v_url and download_file(v_url, "temp.mp4"):
-                        try:
-                            vc = VideoFileClip("temp.mp4")
-                            vc.audio.write_audiofile("temp.mp3", verbose=False, logger=None)
-                            vc.close()
-                            status.write("👂 Transcrevendo áudio...")
-                            texto_extraido = transcrever_audio_groq("temp.mp3")
-                        except Exception as e: 
-                            st.error(f"Erro áudio: {e}")
-                        finally:
-                            if os.path.exists("temp.mp4"): os.remove("temp.mp4")
-                            if os.path.exists("temp.mp3"): os.remove("temp.mp3")
+        st.query_params["job"] = st.session_state['trace_pag04'] = enviar_job(TIPO_JOB, {
+            "tipo_conteudo": tipo_conteudo,
+            "url": url_input,
+            "foco": foco_analise,
+        })
+        st.rerun()
 
-            # --- CARROSSEL (INSTAGRAM) - NOVO ---
-            elif tipo_conteudo == "Carrossel (Instagram)":
-                status.write("🕵️ Lendo Carrossel (Apify)...")
-                data = get_instagram_data_apify(url_input)
-                
-                if data:
-                    # Monta o objeto para salvar
-                    dados_para_salvar = {
-                        "id_unico": data.get('id', ''),
-                        "perfil": data.get('ownerUsername', ''),
-                        "data_postagem": data.get('timestamp', '')[:10],
-                        "url": url_input,
-                        "views": data.get('viewCount') or data.get('playCount', 0), # As vezes vem viewCount em posts
-                        "likes": data.get('likesCount', 0),
-                        "comments": data.get('commentsCount', 0),
-                        "caption": data.get('caption', '') 
-                    }
-                    
-                    # Lógica de Extração de Texto do Carrossel
-                    # A Groq não vê imagem, então montamos um "Roteiro de Leitura"
-                    status.write("📑 Extraindo textos dos slides...")
-                    
-                    # 1. Pega a legenda
-                    txt_final = f"=== LEGENDA DO POST ===\n{data.get('caption', '')}\n\n"
-                    txt_final += "=== CONTEÚDO DOS SLIDES (TEXTO ALTERNATIVO/OCR) ===\n"
-                    
-                    # 2. Itera sobre os slides (childPosts)
-                    slides = data.get('childPosts', [])
-                    if not slides:
-                        # As vezes o carrossel vem sem childPosts se for imagem única ou erro
-                        # Tenta pegar displayUrl ou alt da imagem principal
-                        alt = data.get('alt') or "Imagem única sem descrição."
-                        txt_final += f"Slide Único: {alt}"
-                    else:
-                        for i, slide in enumerate(slides):
-                            # Tenta pegar Alt Text ou Descrição
-                            texto_slide = slide.get('alt') or slide.get('description') or slide.get('accessibilityCaption')
-                            if not texto_slide:
-                                texto_slide = "[Imagem sem texto detectado pela API]"
-                            
-                            txt_final += f"SLIDE {i+1}: {texto_slide}\n"
-                    
-                    texto_extraido = txt_final
 
-            # 4. SALVAR NO BANCO
-            if texto_extraido and gs_client:
-                dados_para_salvar["transcricao"] = texto_extraido
-                
-                # Reels tem gancho, Carrossel não necessariamente (salva direto na col Transcricao_Carrossel)
-                if aba_alvo == "instagram":
-                    dados_para_salvar["gancho_verbal"] = texto_extraido[:100] + "..."
-                
-                status.write("💾 Salvando na Planilha...")
-                salvar_no_db(gs_client, aba_alvo, dados_para_salvar)
+def mostrar_eventos(job, container):
+    for evento in job["eventos"]:
+        getattr(container, evento["tipo"])(evento["msg"])
+
+
+@st.fragment(run_every=2)
+def acompanhar_job(job_id):
+    job = consultar_job(job_id)
+    if job is None or job["status"] in FINALIZADOS:
+        st.rerun()  # página inteira: carrega o resultado fora do fragmento
+
+    if job["status"] == NA_FILA:
+        label = f"⏳ Na fila (posição {job.get('posicao_fila', '-')})..."
+    else:
+        label = job["etapa"] or "Iniciando processo..."
+    with st.status(label, expanded=True) as status:
+        mostrar_eventos(job, status)
+    if st.button("⛔ Cancelar", key=f"cancelar_{job_id}"):
+        cancelar_job(job_id)
 
-        # 5. GERAÇÃO DAS IDEIAS (IA)
-        if texto_extraido:
-            st.session_state['conteudo_base'] = texto_extraido
-            
-            status.write(f"🧠 Gerando conceitos (Modo: {foco_analise})...")
-            ideias = agente_tempestade_ideias(texto_extraido, modo=foco_analise)
-            
-            if ideias:
-                st.session_state['ideias_geradas'] = ideias
-                status.update(label="Sucesso! Ideias Geradas.", state="complete", expanded=False)
-            else:
-                status.update(label="Erro na IA (JSON)", state="error")
-        else:
-            status.update(label="Falha na extração ou texto vazio", state="error")
+
+job_id = st.query_params.get("job")
+if job_id:
+    job = consultar_job(job_id)
+    if job is None:
+        del st.query_params["job"]
+    elif job["status"] not in FINALIZADOS:
+        acompanhar_job(job_id)
+    else:
+        # Resultado entra na sessão uma vez; depois disso o job sai da URL
+        del st.query_params["job"]
+        st.session_state['trace_pag04'] = job_id  # spans do job ficam na execução de mesmo ID
+        if job["status"] == CONCLUIDO:
+            resultado = job["resultado"]
+            st.session_state['conteudo_base'] = resultado["conteudo_base"]
+            st.session_state['ideias_geradas'] = resultado["ideias"]
+            st.session_state['url_ref'] = resultado["url"]
+            with st.status("Sucesso! Ideias Geradas.", state="complete", expanded=False) as status:
+                mostrar_eventos(job, status)
+        elif job["status"] == CANCELADO:
+            st.warning("⛔ Análise cancelada.")
+        elif job["status"] == ERRO:
+            with st.status(job["erro"] or "Erro", state="error", expanded=True) as status:
+                mostrar_eventos(job, status)
 
 # --- VISUALIZAÇÃO DOS RESULTADOS ---
 if 'ideias_geradas' in st.session_state and st.session_state['ideias_geradas']:
@@ -205,6 +123,13 @@ if 'ideias_geradas' in st.session_state and st.session_state['ideias_geradas']:
     st.subheader(f"⛈️ Estruturas Identificadas ({foco_analise})")
     
     ideias = st.session_state['ideias_geradas']
+    conteudo_base = st.session_state.get('conteudo_base', '')
+    chaves = [None] * len(ideias)
+    if pre_gerar and not st.session_state.get('ideia_ativa'):
+        # Idempotente: só dispara as ideias que ainda não estão rodando/prontas.
+        # O escopo separa as chaves desta sessão das de outros usuários (o pool é do processo).
+        escopo = st.session_state.setdefault('escopo_pag04', uuid.uuid4().hex)
+        chaves = st.session_state['chaves_pre_geradas'] = pre_gerar_carrosseis(ideias, conteudo_base, escopo)
     
     for i, ideia in enumerate(ideias):
         with st.container(border=True):
@@ -213,10 +138,18 @@ if 'ideias_geradas' in st.session_state and st.session_state['ideias_geradas']:
                 st.markdown(f"### {i+1}. {ideia.get('titulo', 'Sem Título')}")
                 st.caption(f"📐 **Estrutura:** {ideia.get('estrutura', '-')}")
                 st.write(f"💡 {ideia.get('por_que_funciona', '-')}")
+                if chaves[i]:
+                    st.caption({
+                        "pronto": "✅ Carrossel pronto", "gerando": "⏳ Pré-gerando...", "erro": "⚠️ Falhou (gera ao clicar)",
+                    }.get(estado_pre_geracao(chaves[i]), ""))
             with col_btn:
                 st.write("")
                 st.write("")
                 if st.button("🎨 Gerar Carrossel", key=f"btn_car_{i}"):
+                    # As outras ideias não serão usadas: cancela/descarta a pré-geração delas
+                    descartar_pre_geracoes([c for c in chaves if c and c != chaves[i]])
+                    st.session_state['chaves_pre_geradas'] = [chaves[i]] if chaves[i] else []
+                    st.session_state['chave_ativa'] = chaves[i]
                     st.session_state['ideia_ativa'] = ideia
                     st.session_state['roteiro_final'] = None 
                     st.rerun()
@@ -227,14 +160,38 @@ if 'ideia_ativa' in st.session_state and st.session_state['ideia_ativa']:
     st.info(f"🏗️ Projetando Carrossel: **{st.session_state['ideia_ativa'].get('titulo')}**")
     
     # Gera o roteiro se ainda não existir
+    if st.session_state.get('roteiro_final') is None and st.session_state.get('chave_ativa'):
+        # Já pré-gerado (ou rodando): usa o resultado em vez de chamar a IA de novo
+        with tracing.execucao("arquiteto_pre_gerado") as execucao, tracing.span("espera:pre_geracao"):
+            with st.spinner("Finalizando o carrossel pré-gerado..."):
+                roteiro_json = roteiro_pre_gerado(st.session_state['chave_ativa'])
+        if roteiro_json:
+            st.session_state['trace_pag04'] = execucao.id
+            # Cópia: o editor altera o roteiro da sessão, o pré-gerado fica intacto
+            st.session_state['roteiro_final'] = copy.deepcopy(roteiro_json)
+            st.rerun()
+
     if st.session_state.get('roteiro_final') is None:
-        with st.spinner("O Arquiteto está desenhando os slides..."):
-            roteiro_json = agente_arquiteto_carrossel(
+        st.caption("O Arquiteto está desenhando os slides...")
+        previa = st.container()
+        roteiro_json = None
+        # Streaming: cada slide aparece assim que o objeto JSON dele fecha
+        with tracing.execucao("arquiteto") as execucao, tracing.span("groq:stream_completo"):
+            for evento, dado in agente_arquiteto_carrossel_stream(
                 st.session_state['ideia_ativa'], 
                 st.session_state.get('conteudo_base', '')
-            )
-            st.session_state['roteiro_final'] = roteiro_json
-            st.rerun()
+            ):
+                if evento == "slide":
+                    with previa.container(border=True):
+                        st.markdown(f"#### Slide {dado.get('painel', '-')}")
+                        st.caption(f"**Fase:** {dado.get('fase', '-')}")
+                        st.write(dado.get('texto', ''))
+                else:
+                    roteiro_json = dado
+        st.session_state['trace_pag04'] = execucao.id
+        # {} em caso de erro para não gerar de novo em loop a cada rerun
+        st.session_state['roteiro_final'] = roteiro_json or {}
+        st.rerun()
             
     roteiro = st.session_state.get('roteiro_final')
     
@@ -295,4 +252,10 @@ if 'ideia_ativa' in st.session_state and st.session_state['ideia_ativa']:
     if st.button("Fechar Projeto", type="secondary"):
         del st.session_state['ideia_ativa']
         st.session_state['roteiro_final'] = None
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+
+# --- DESEMPENHO (última execução medida nesta página) ---
+execucao = tracing.obter_execucao(st.session_state.get('trace_pag04'))
+if execucao:
+    with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+        tracing.painel(execucao)
@@ -5,7 +5,8 @@ import os
 # --- IMPORTS DA ESTRUTURA ANTIGA ---
 from modules.auth import check_password
 from modules.ui import carregar_css
-from modules.ai_processor import transcrever_arquivo_upload_groq
+from modules import tracing
+from modules.ai_processor import transcrever_arquivo_upload_groq, transcrever_upload_em_partes, costurar_transcricoes, LIMITE_UPLOAD_MB
 
 # --- CONFIGURAÇÃO ---
 st.set_page_config(page_title="Transcritor Pro", page_icon="🎙️", layout="wide")
@@ -39,7 +40,7 @@ st.markdown("""
 uploaded_file = st.file_uploader(
     "Arraste seu arquivo de áudio ou vídeo aqui", 
     type=["mp3", "mp4", "mpeg", "mpga", "m4a", "wav", "webm"],
-    help="Limite sugerido: 25MB (aprox. 20 a 30 min de áudio dependendo da qualidade)."
+    help="Até 25MB vai direto para a API; arquivos maiores são divididos em partes automaticamente."
 )
 
 if uploaded_file is not None:
@@ -47,9 +48,10 @@ if uploaded_file is not None:
     tamanho_mb = uploaded_file.size / 1e6
     st.info(f"📁 Arquivo: **{uploaded_file.name}** ({tamanho_mb:.2f} MB)")
 
-    # Aviso de limite da API
-    if tamanho_mb > 25:
-        st.warning("⚠️ Atenção: Este arquivo é maior que 25MB. A API pode rejeitar. Se falhar, tente comprimir o áudio antes.")
+    # Acima do limite da API o arquivo é dividido em partes transcritas em paralelo
+    em_partes = tamanho_mb > LIMITE_UPLOAD_MB
+    if em_partes:
+        st.info("✂️ Arquivo maior que 25MB: será dividido em partes (nos silêncios) e transcrito em paralelo.")
 
     # Botão de Ação
     if st.button("⚡ Iniciar Transcrição Turbo", type="primary"):
@@ -58,8 +60,29 @@ if uploaded_file is not None:
         with st.status("Processando áudio em alta velocidade...", expanded=True) as status:
             st.write("📤 Enviando para processamento na Nuvem (LPU)...")
             
-            # Chama a função que adicionamos no passo 1
-            texto_final = transcrever_arquivo_upload_groq(uploaded_file)
+            if em_partes:
+                progresso = st.progress(0.0)
+                parcial = st.empty()
+                partes_prontas = {}
+
+                def mostrar_parcial(indice, texto, total):
+                    partes_prontas[indice] = texto
+                    progresso.progress(len(partes_prontas) / total, text=f"Parte {indice + 1} de {total} concluída")
+                    # Mostra o texto contínuo já disponível (partes 0..N sem buracos)
+                    continuas = []
+                    while len(continuas) in partes_prontas:
+                        continuas.append(partes_prontas[len(continuas)])
+                    if continuas:
+                        parcial.text_area("Parcial", value=costurar_transcricoes(continuas), height=200)
+
+                with tracing.execucao("transcricao_em_partes") as execucao:
+                    texto_final = transcrever_upload_em_partes(uploaded_file, ao_concluir=mostrar_parcial)
+                parcial.empty()
+            else:
+                # Chama a função que adicionamos no passo 1
+                with tracing.execucao("transcricao_upload") as execucao:
+                    texto_final = transcrever_arquivo_upload_groq(uploaded_file)
+            st.session_state['trace_pag05'] = execucao.id
             
             if texto_final:
                 end_time = time.time()
@@ -79,4 +102,10 @@ if uploaded_file is not None:
                     mime="text/plain"
                 )
             else:
-                status.update(label="❌ Falha na transcrição", state="error")
\ No newline at end of file
+                status.update(label="❌ Falha na transcrição", state="error")
+
+# --- DESEMPENHO (última execução medida nesta página) ---
+execucao = tracing.obter_execucao(st.session_state.get('trace_pag05'))
+if execucao:
+    with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+        tracing.painel(execucao)
@@ -0,0 +1,96 @@
+import time
+from datetime import date
+
+import streamlit as st
+
+# --- IMPORTAÇÃO DOS MÓDULOS ---
+from modules.auth import check_password
+from modules import clients, local_store, tracing
+
+# Configuração da Página
+st.set_page_config(page_title="Busca nos Conteúdos", page_icon="🔎", layout="wide")
+
+st.title("🔎 Busca nos Conteúdos")
+st.caption("Transcrições, ganchos verbais e legendas de tudo o que já foi coletado (instagram, carrossel e Youtube).")
+
+# --- LOGIN ---
+if not check_password():
+    st.stop()
+
+NOMES_ABAS = {"instagram": "📸 Reels", "carrossel": "🗂️ Carrossel", "Youtube": "▶️ YouTube"}
+ORDENS = {"Relevância": "relevancia", "Mais views": "views", "Mais recentes": "recentes"}
+
+
+# --- SINCRONIZAÇÃO ---
+# A réplica local só baixa as linhas novas (e respeita o intervalo mínimo entre syncs),
+# então rodar a cada busca custa pouco; o índice é atualizado pelos triggers do SQLite.
+def sincronizar():
+    try:
+        planilha = clients.planilha_db()
+        for aba in local_store.ABAS:
+            local_store.sincronizar_aba(planilha.worksheet(aba))
+    except Exception as e:
+        st.warning(f"⚠️ Não foi possível atualizar com a planilha ({e}). Buscando na cópia local.")
+
+
+with st.spinner("Atualizando índice..."):
+    sincronizar()
+
+# --- FILTROS NA BARRA LATERAL ---
+with st.sidebar:
+    st.header("⚙️ Filtros")
+    ABAS = st.multiselect("Origem", list(NOMES_ABAS), default=list(NOMES_ABAS), format_func=NOMES_ABAS.get)
+    PERFIL = st.text_input("Perfil / canal", placeholder="@perfil")
+    USAR_DATAS = st.checkbox("Filtrar por data de postagem")
+    if USAR_DATAS:
+        DATA_DE = st.date_input("De", value=date(date.today().year, 1, 1))
+        DATA_ATE = st.date_input("Até", value=date.today())
+    else:
+        DATA_DE = DATA_ATE = None
+    MIN_VIEWS = st.number_input("Views mínimas", min_value=0, value=0, step=10000)
+    ORDEM = st.selectbox("Ordenar por", list(ORDENS))
+    LIMITE = st.slider("Resultados", 10, 200, 50, step=10)
+
+    indexados = local_store.total_indexado()
+    st.caption("📚 Indexados: " + " · ".join(f"{NOMES_ABAS[a]} {indexados.get(a, 0)}" for a in NOMES_ABAS))
+
+# --- BUSCA ---
+TEXTO = st.text_input(
+    "Buscar",
+    placeholder='ex.: herança imposto   |   "você está perdendo"   |   holding OU inventário',
+    help='Palavras soltas acham variações (herança → heranças). Use "aspas" para a frase exata e OU para alternativas.',
+)
+
+if not TEXTO.strip() and not PERFIL.strip() and not MIN_VIEWS and not USAR_DATAS:
+    st.info("Digite um termo ou use os filtros da barra lateral.")
+    st.stop()
+
+with tracing.execucao("busca") as execucao:
+    inicio = time.perf_counter()
+    resultados = local_store.buscar_texto(
+        TEXTO, abas=ABAS, perfil=PERFIL, data_de=DATA_DE, data_ate=DATA_ATE,
+        min_views=MIN_VIEWS, ordem=ORDENS[ORDEM], limite=LIMITE,
+    )
+    ms = (time.perf_counter() - inicio) * 1000
+
+st.caption(f"{len(resultados)} resultado(s) em {ms:.0f} ms")
+
+for r in resultados:
+    with st.container(border=True):
+        col_info, col_link = st.columns([5, 1])
+        with col_info:
+            views = f"{r['views'] or 0:,}".replace(",", ".")
+            st.markdown(
+                f"**{r['perfil'] or '—'}** · {NOMES_ABAS.get(r['aba'], r['aba'])} · "
+                f"{r['data'] or 'sem data'} · 👁️ {views}"
+            )
+            if r["gancho"]:
+                st.markdown(f"🎣 *{r['gancho']}*")
+            st.markdown(r["trecho"] or "")
+        with col_link:
+            if r["url"]:
+                st.link_button("Abrir", r["url"], use_container_width=True)
+
+# --- DESEMPENHO ---
+with st.sidebar.expander("⏱️ Desempenho", expanded=False):
+    tracing.painel(execucao)